@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from money import format_money
+from storage import CSVStorage, to_cents, to_flag, write_json_atomic
+from typing import Dict, Any, Iterable, List, Optional
+
+STATE_FIELDS = ('customers', 'active_customers', 'checking_accounts', 'savings_accounts',
+                'checking_total', 'savings_total', 'overdrawn_accounts', 'overdrawn_total')
+DERIVED_FIELDS = ('deactivated_customers', 'deposits_held')
+FLOW_FIELDS = ('overdraft_fees', 'overdraft_fee_revenue')
+REPORT_FIELDS = ('customers', 'active_customers', 'deactivated_customers', 'checking_accounts', 'savings_accounts',
+                 'checking_total', 'savings_total', 'deposits_held', 'overdrawn_accounts', 'overdrawn_total') + FLOW_FIELDS
+MONEY_FIELDS = ('checking_total', 'savings_total', 'deposits_held', 'overdrawn_total', 'overdraft_fee_revenue')
+
+
+def contribution(has_checking: bool, has_savings: bool, active: bool, checking: int, savings: int) -> tuple:
+    # One customer's share of every state aggregate, in STATE_FIELDS order. This runs twice per posting,
+    # so it leans on bools counting as 1 and leaves the derived figures to to_dict().
+    return (1, active, has_checking, has_savings, checking, savings, (checking < 0) + (savings < 0),
+            (checking if checking < 0 else 0) + (savings if savings < 0 else 0))
+
+
+def customer_contribution(customer) -> tuple:
+    return contribution(customer.has_checking, customer.has_savings, customer.active,
+                        customer.checking_balance, customer.savings_balance)
+
+
+def row_contribution(row: Dict) -> tuple:
+    return contribution(to_flag(row.get('has_checking', 'False')), to_flag(row.get('has_savings', 'False')),
+                        to_flag(row.get('active', 'True')), to_cents(row.get('checking_balance', '0')),
+                        to_cents(row.get('savings_balance', '0')))
+
+
+class Aggregates:
+    # Bank-wide totals kept up to date as postings happen: state figures move by the difference between a
+    # customer's contribution before and after each locked change, flows (fees) are counted once the posting
+    # that charged them is journaled.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.journal_lock = threading.Lock()
+        self.state = [0] * len(STATE_FIELDS)
+        self.flows = dict.fromkeys(FLOW_FIELDS, 0)
+        self.unsaved = {}
+        self.ready = False
+
+    @classmethod
+    def from_contributions(cls, contributions: Iterable[tuple]) -> 'Aggregates':
+        aggregates = cls()
+        state = aggregates.state
+        for values in contributions:
+            for index, value in enumerate(values):
+                state[index] += value
+        aggregates.ready = True
+        return aggregates
+
+    def reset(self, state: List[int]):
+        with self.lock:
+            self.state[:] = state
+            self.ready = True
+
+    def apply(self, before: tuple, after: tuple):
+        if before == after:
+            return
+        state = self.state
+        with self.lock:
+            for index, new in enumerate(after):
+                old = before[index]
+                if new != old:
+                    state[index] += new - old
+
+    def add(self, customer):
+        self.apply((0,) * len(STATE_FIELDS), customer_contribution(customer))
+
+    def record_overdraft_fee(self, cust_id: str, amount: int):
+        with self.lock:
+            fees = self.unsaved.setdefault(cust_id, [0] * len(FLOW_FIELDS))
+            fees[0] += 1
+            fees[1] += amount
+
+    def journaled(self, cust_ids: Iterable[str]) -> List[int]:
+        # Called under journal_lock with the rows about to be saved; the totals returned are stamped on
+        # them, so the journal always holds the fees of every posting in it.
+        with self.lock:
+            for cust_id in cust_ids:
+                for name, value in zip(FLOW_FIELDS, self.unsaved.pop(cust_id, ())):
+                    self.flows[name] += value
+            return [self.flows[name] for name in FLOW_FIELDS]
+
+    def to_dict(self) -> Dict[str, int]:
+        with self.lock:
+            values = dict(zip(STATE_FIELDS, self.state))
+            values.update(self.flows)
+        values['deactivated_customers'] = values['customers'] - values['active_customers']
+        values['deposits_held'] = values['checking_total'] + values['savings_total'] - values['overdrawn_total']
+        return {name: int(values[name]) for name in REPORT_FIELDS}
+
+    def load_flows(self, path: str, journaled: List[int]):
+        # State figures are rebuilt from the customers. Fee totals only grow, so the latest are the larger of
+        # the file saved at the last checkpoint and the stamps on the rows journaled since.
+        saved = read_aggregates(path)
+        with self.lock:
+            for index, name in enumerate(FLOW_FIELDS):
+                values = [saved['aggregates'].get(name, 0)] if saved else []
+                values += journaled[index:index + 1]
+                self.flows[name] = max(values, default=0)
+
+    def save(self, path: str):
+        write_json_atomic(path, {'saved_at': time.time(), 'aggregates': self.to_dict()})
+
+    def differences(self, expected: 'Aggregates') -> List[str]:
+        found = self.to_dict()
+        wanted = expected.to_dict()
+        return [f"{name}: {found[name]} != {wanted[name]} (recomputed)"
+                for name in STATE_FIELDS if found[name] != wanted[name]]
+
+
+def read_aggregates(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def recompute(rows: Iterable[Dict]) -> Aggregates:
+    return Aggregates.from_contributions(row_contribution(row) for row in rows)
+
+
+def render(values: Dict[str, int], saved_at: Optional[float] = None) -> str:
+    lines = ["AHMED Bank - Dashboard"]
+    if saved_at is not None:
+        lines[0] += time.strftime(" (as of %Y-%m-%d %H:%M:%S)", time.localtime(saved_at))
+    for name in REPORT_FIELDS:
+        value = format_money(values[name]) if name in MONEY_FIELDS else str(values[name])
+        lines.append(f"  {name.replace('_', ' ').capitalize():<24}{value:>18}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the bank-wide dashboard from the saved aggregates")
+    parser.add_argument("--bank", default="bank.csv")
+    parser.add_argument("--verify", action="store_true", help="recompute from every customer and compare")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    saved = read_aggregates(args.bank + ".aggregates")
+    if saved is None:
+        sys.exit(f"No saved aggregates for {args.bank}; they are written at each checkpoint")
+
+    if args.json:
+        print(json.dumps(dict(saved['aggregates'], saved_at=saved['saved_at'])))
+    else:
+        print(render(saved['aggregates'], saved['saved_at']))
+
+    if args.verify:
+        storage = CSVStorage(args.bank)
+        try:
+            expected = recompute(storage.rows())
+        finally:
+            storage.close()
+        found = Aggregates()
+        found.state = [saved['aggregates'][name] for name in STATE_FIELDS]
+        problems = found.differences(expected)
+        for problem in problems:
+            print(problem)
+        print("Aggregates match a full recompute" if not problems else "Aggregates differ from a full recompute")
+        sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
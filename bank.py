@@ -1,131 +1,543 @@
-import csv
-import os
-from customer import Customer
-from typing import Optional
-
-class Bank:    
-    def __init__(self, csv_file: str = "bank.csv"):
-        self.csv_file = csv_file
-        self.customers = {}
-        self.load_customers()
-    
-    def load_customers(self):
-        if not os.path.exists(self.csv_file):
-            return
-        
-        with open(self.csv_file, 'r', newline='') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                cust_id = row['id']
-                customer = Customer(
-                    cust_id,
-                    row['first_name'],
-                    row['last_name'],
-                    row['password']
-                )
-                customer.has_checking = row.get('has_checking', 'False').lower() == 'true'
-                customer.has_savings = row.get('has_savings', 'False').lower() == 'true'
-                customer.active = row.get('active', 'True').lower() == 'true'
-                customer.checking_balance = float(row.get('checking_balance', '0'))
-                customer.savings_balance = float(row.get('savings_balance', '0'))
-                customer.overdraft_count = int(row.get('overdraft_count', '0'))
-                
-                self.customers[cust_id] = customer
-    
-    def save_customers(self):
-        with open(self.csv_file, 'w', newline='') as file:
-            fieldnames = ['id', 'first_name', 'last_name', 'password', 'has_checking', 'has_savings', 'active', 'checking_balance', 'savings_balance', 'overdraft_count']
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for customer in self.customers.values():
-                writer.writerow(customer.to_dict())
-    
-    def add_customer(self, first_name: str, last_name: str, password: str, 
-                    checking: bool = False, savings: bool = False) -> str:
-        cust_id = str(10000 + len(self.customers) + 1)
-        
-        customer = Customer(cust_id, first_name, last_name, password)
-        
-        if checking:
-            customer.add_checking_account()
-        
-        if savings:
-            customer.add_savings_account()
-        
-        self.customers[cust_id] = customer
-        self.save_customers()
-        return cust_id
-    
-    def get_customer(self, cust_id: str) -> Optional[Customer]:
-        return self.customers.get(cust_id)
-    
-    def auth_customer(self, cust_id: str, password: str) -> Optional[Customer]:
-        customer = self.get_customer(cust_id)
-        if customer and customer.auth(password):
-            return customer
-        return None
-    
-    def transfer_between_customers(self, from_cust_id: str, to_cust_id: str, 
-                                 from_account_type: str, to_account_type: str, amount: float) -> tuple[bool, str]:
-        from_customer = self.get_customer(from_cust_id)
-        to_customer = self.get_customer(to_cust_id)
-        
-        if not from_customer:
-            return False, "Sender customer not found"
-        
-        if not to_customer:
-            return False, "Receiver customer not found"
-        
-        if not from_customer.active:
-            return False, "Sender account is deactivated"
-        
-        if not to_customer.active:
-            return False, "Receiver account is deactivated"
-        
-        if amount <= 0:
-            return False, "Amount must be positive"
-        
-        if from_account_type == "CHECKING":
-            if not from_customer.has_checking:
-                return False, "Sender does not have a checking account"
-            if from_customer.checking_balance < amount:
-                return False, "Insufficient funds in sender's checking account"
-        elif from_account_type == "SAVINGS":
-            if not from_customer.has_savings:
-                return False, "Sender does not have a savings account"
-            if from_customer.savings_balance < amount:
-                return False, "Insufficient funds in sender's savings account"
-        else:
-            return False, "Invalid sender account type"
-  
-        if to_account_type == "CHECKING":
-            if not to_customer.has_checking:
-                return False, "Receiver does not have a checking account"
-        elif to_account_type == "SAVINGS":
-            if not to_customer.has_savings:
-                return False, "Receiver does not have a savings account"
-        else:
-            return False, "Invalid receiver account type"
-        
-        if from_account_type == "CHECKING":
-            from_customer.checking_balance -= amount
-            from_customer.log_transaction("TRANSFER_OUT", "CHECKING", amount, from_customer.checking_balance, 
-                                        f"Transfer to {to_customer.first_name} {to_customer.last_name}")
-        else:
-            from_customer.savings_balance -= amount
-            from_customer.log_transaction("TRANSFER_OUT", "SAVINGS", amount, from_customer.savings_balance, 
-                                        f"Transfer to {to_customer.first_name} {to_customer.last_name}")
-        
-        if to_account_type == "CHECKING":
-            to_customer.checking_balance += amount
-            to_customer.log_transaction("TRANSFER_IN", "CHECKING", amount, to_customer.checking_balance, 
-                                      f"Transfer from {from_customer.first_name} {from_customer.last_name}")
-        else:
-            to_customer.savings_balance += amount
-            to_customer.log_transaction("TRANSFER_IN", "SAVINGS", amount, to_customer.savings_balance, 
-                                      f"Transfer from {from_customer.first_name} {from_customer.last_name}")
-        
-        self.save_customers()
-        
-        return True, f"Transfer successful! ${amount:.2f} transferred from {from_customer.first_name}'s {from_account_type.lower()} to {to_customer.first_name}'s {to_account_type.lower()}"
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from aggregates import Aggregates, customer_contribution, recompute
+from batch import BatchReport
+from checkpoint import Checkpointer, CheckpointStats
+from customer import Customer
+from events import EventStore
+from fraud import RuleEngine
+from history import TransactionStore
+from idempotency import DedupStore, idempotent
+from index import CustomerIndex, IdAllocator, highest_id
+from metrics import instrument
+from money import format_money, parse_amount
+from security import CredentialCache, hash_password, is_hashed
+from storage import Storage, CSVStorage, MmapCSVStorage, format_row, to_cents, to_flag
+from typing import Optional
+
+
+def lock_order(customer: Customer) -> tuple:
+    return len(customer.cust_id), customer.cust_id
+
+
+def transfer_message(sender: str, receiver: str, from_account_type: str, to_account_type: str, amount: int) -> str:
+    return (f"Transfer successful! ${format_money(amount)} transferred from {sender}'s {from_account_type.lower()} "
+            f"to {receiver}'s {to_account_type.lower()}")
+
+
+class Bank:    
+    def __init__(self, csv_file: str = "bank.csv", journal_file: Optional[str] = None,
+                 compact_every: int = 10000, checkpoint_interval: Optional[float] = None,
+                 history_file: Optional[str] = None, keep_history: bool = True,
+                 storage: Optional[Storage] = None, lazy: bool = False,
+                 auth_cache_ttl: Optional[float] = 300.0, rules: Optional[RuleEngine] = None,
+                 keep_events: Optional[bool] = None, idempotency_ttl: Optional[float] = 24 * 3600.0):
+        self.csv_file = csv_file
+        if storage is None:
+            storage = MmapCSVStorage(csv_file, journal_file) if lazy else CSVStorage(csv_file, journal_file)
+        self.storage = storage
+        self.history = None
+        if keep_history:
+            self.history = TransactionStore(history_file or os.path.splitext(csv_file)[0] + "_history.db")
+        self.events = None
+        if keep_history if keep_events is None else keep_events:
+            self.events = EventStore(os.path.splitext(csv_file)[0] + "_events.db")
+        self.compact_every = compact_every
+        self.customers = {}
+        self.lock = threading.Lock()
+        self.batch_state = threading.local()
+        self.credentials = CredentialCache(ttl=auth_cache_ttl) if auth_cache_ttl else None
+        self.dedup = DedupStore(csv_file + ".idempotency", ttl=idempotency_ttl) if idempotency_ttl else None
+        self.ids = IdAllocator(self.storage)
+        self.rules = rules
+        self.index = None
+        self.aggregates_file = csv_file + ".aggregates"
+        self.aggregates = Aggregates()
+        self.aggregates.load_flows(self.aggregates_file, self.storage.flows())
+        self.checkpoint_stats = CheckpointStats()
+        self.checkpoint_lock = threading.Lock()
+        self.load_customers()
+        if self.events and self.events.latest_snapshot() is None:
+            self.events.baseline(self.storage.rows())
+        
+        self.checkpointer = None
+        if checkpoint_interval is not None:
+            self.checkpointer = Checkpointer(self, compact_every, checkpoint_interval)
+            self.checkpointer.start()
+    
+    @instrument('load_customers')
+    def load_customers(self):
+        if not self.storage.preload:
+            return
+        
+        self.index = CustomerIndex()
+        for row in self.storage.records():
+            self.customers[row['id']] = self.build_customer(row)
+            self.index.update(row['id'], row)
+        self.aggregates.reset(Aggregates.from_contributions(
+            customer_contribution(customer) for customer in self.customers.values()).state)
+    
+    def build_customer(self, row: dict) -> Customer:
+        customer = Customer(
+            row['id'],
+            row['first_name'],
+            row['last_name'],
+            row['password']
+        )
+        customer.has_checking = to_flag(row.get('has_checking', 'False'))
+        customer.has_savings = to_flag(row.get('has_savings', 'False'))
+        customer.active = to_flag(row.get('active', 'True'))
+        customer.checking_balance = to_cents(row.get('checking_balance', '0'))
+        customer.savings_balance = to_cents(row.get('savings_balance', '0'))
+        customer.overdraft_count = int(row.get('overdraft_count', '0'))
+        customer.history = self.history
+        customer.aggregates = self.aggregates
+        return customer
+    
+    def save_customer(self, *customers: Customer):
+        dirty = getattr(self.batch_state, 'dirty', None)
+        if dirty is not None:
+            for customer in customers:
+                dirty[customer.cust_id] = customer
+            return
+        
+        records = [format_row(customer.to_dict()) for customer in customers]
+        if self.index:
+            for record in records:
+                self.index.update(record['id'], record)
+        with self.aggregates.journal_lock:
+            flows = self.aggregates.journaled(record['id'] for record in records)
+            if any(flows):
+                for record in records:
+                    record['flows'] = flows
+            pending = self.storage.save(records)
+        if self.events:
+            self.events.append(records)
+        
+        if self.checkpointer:
+            self.checkpointer.notify(len(records))
+        elif pending >= self.compact_every:
+            if getattr(self.batch_state, 'held', 0):
+                # The checkpoint takes every customer lock in order, which this thread cannot do while it
+                # holds some already, so it runs once locked() lets them go.
+                self.batch_state.checkpoint_due = True
+            else:
+                self.checkpoint()
+    
+    @contextmanager
+    def batch(self):
+        # Postings made by this thread inside the block are persisted together when it exits.
+        if getattr(self.batch_state, 'dirty', None) is not None:
+            yield
+            return
+        
+        self.batch_state.dirty = {}
+        try:
+            with ExitStack() as stack:
+                if self.history:
+                    stack.enter_context(self.history.deferred_commit())
+                yield
+        finally:
+            dirty = self.batch_state.dirty
+            self.batch_state.dirty = None
+            if dirty:
+                self.save_customer(*dirty.values())
+            if self.dedup:
+                self.dedup.flush()
+    
+    def post_instruction(self, instruction) -> tuple[bool, str]:
+        # Lines come from files as any JSON value, so nothing about their shape or field types is assumed.
+        if not isinstance(instruction, dict):
+            return False, "Invalid instruction"
+        
+        def field(name: str) -> str:
+            return str(instruction.get(name) or '').strip()
+        
+        op = field('op').lower()
+        cust_id = field('cust_id')
+        account_type = field('account').upper()
+        if op not in ('deposit', 'withdraw', 'internal_transfer', 'transfer'):
+            return False, f"Unknown operation: {op or '(blank)'}"
+        
+        try:
+            amount = parse_amount(field('amount'))
+        except ValueError:
+            return False, "Invalid amount"
+        
+        key = field('idempotency_key') or None
+        if op == 'deposit':
+            return self.deposit(cust_id, account_type, amount, idempotency_key=key)
+        if op == 'withdraw':
+            return self.withdraw(cust_id, account_type, amount, idempotency_key=key)
+        if op == 'internal_transfer':
+            return self.transfer_internal(cust_id, account_type, amount, idempotency_key=key)
+        to_cust_id = field('to_cust_id')
+        to_account_type = field('to_account').upper()
+        return self.transfer_between_customers(cust_id, to_cust_id, account_type, to_account_type, amount,
+                                               idempotency_key=key)
+    
+    def post_batch(self, instructions) -> BatchReport:
+        # instructions yields (line number, instruction) pairs, as batch.read_instructions does.
+        report = BatchReport()
+        with self.batch():
+            for line, instruction in instructions:
+                success, message = self.post_instruction(instruction)
+                report.add(line, success, message)
+        report.finish()
+        return report
+    
+    @instrument('save_customers')
+    def save_customers(self):
+        self.checkpoint()
+    
+    @instrument('checkpoint')
+    def checkpoint(self) -> int:
+        # One at a time: inline checkpoints from several posting threads would share the temp file.
+        with self.checkpoint_lock:
+            self.dashboard()
+            started = time.perf_counter()
+            bytes_written, rows = self.storage.checkpoint(self.customers, self.quiesced)
+            self.checkpoint_stats.record(time.perf_counter() - started, bytes_written, rows)
+            self.aggregates.save(self.aggregates_file)
+            if self.events:
+                self.events.maybe_snapshot()
+        return bytes_written
+    
+    def close(self):
+        failure = None
+        if self.checkpointer:
+            self.checkpointer.stop()
+            failure = self.checkpointer.failure
+            self.checkpointer = None
+        # The dashboard command reads the saved file, so it is brought up to date on every close; a lazy bank
+        # that never asked for the dashboard builds its state totals here first.
+        self.dashboard()
+        self.aggregates.save(self.aggregates_file)
+        self.storage.close()
+        if self.dedup:
+            self.dedup.close()
+        if self.history:
+            self.history.close()
+        if self.events:
+            self.events.close()
+        if failure is not None:
+            # Nothing is lost, since the journal still holds every change, but the snapshot on disk is stale.
+            raise RuntimeError("The final checkpoint failed; changes remain in the journal") from failure
+    
+    @contextmanager
+    def locked(self, *customers: Customer):
+        # Always lock in customer id order so two opposite transfers can never deadlock.
+        ordered = sorted({customer.cust_id: customer for customer in customers}.values(), key=lock_order)
+        # Whatever changes inside the block moves the bank-wide totals by the customers' before/after difference.
+        before = []
+        held = getattr(self.batch_state, 'held', 0)
+        self.batch_state.held = held + 1
+        try:
+            with ExitStack() as stack:
+                for customer in ordered:
+                    stack.enter_context(customer.lock)
+                    before.append(customer_contribution(customer))
+                try:
+                    yield
+                finally:
+                    for customer, values in zip(ordered, before):
+                        self.aggregates.apply(values, customer_contribution(customer))
+        finally:
+            self.batch_state.held = held
+        if not held and getattr(self.batch_state, 'checkpoint_due', False):
+            self.batch_state.checkpoint_due = False
+            self.checkpoint()
+    
+    @contextmanager
+    def quiesced(self):
+        # Holds every loaded customer's lock, in the same order as locked(), so no posting is half-applied
+        # while it is held; a checkpoint copies the balances under it. Nothing is journaled meanwhile either,
+        # and the fee totals are saved first, since the stamps on the rotated journal go when it is discarded.
+        with ExitStack() as stack:
+            for customer in sorted(list(self.customers.values()), key=lock_order):
+                stack.enter_context(customer.lock)
+            stack.enter_context(self.aggregates.journal_lock)
+            self.aggregates.save(self.aggregates_file)
+            yield
+    
+    def add_customer(self, first_name: str, last_name: str, password: str, 
+                    checking: bool = False, savings: bool = False, cust_id: Optional[str] = None) -> str:
+        if cust_id is None:
+            cust_id = self.ids.allocate(self.next_id_floor)
+        
+        customer = Customer(cust_id, first_name, last_name, hash_password(password))
+        customer.history = self.history
+        customer.aggregates = self.aggregates
+        
+        if checking:
+            customer.add_checking_account()
+        
+        if savings:
+            customer.add_savings_account()
+        
+        self.customers[cust_id] = customer
+        self.aggregates.add(customer)
+        self.save_customer(customer)
+        return cust_id
+    
+    def next_id_floor(self) -> int:
+        if self.storage.preload:
+            return highest_id(list(self.customers)) + 1
+        return highest_id(row['id'] for row in self.storage.rows()) + 1
+    
+    def find_customers(self, first_name: Optional[str] = None, last_name: Optional[str] = None,
+                       active: Optional[bool] = None, has_checking: Optional[bool] = None,
+                       has_savings: Optional[bool] = None) -> list[Customer]:
+        if self.index is None:
+            with self.lock:
+                if self.index is None:
+                    index = CustomerIndex()
+                    for row in self.storage.rows():
+                        index.update(row['id'], row)
+                    self.index = index
+        
+        ids = self.index.find(first_name, last_name, active, has_checking, has_savings)
+        customers = [self.get_customer(cust_id) for cust_id in sorted(ids, key=lambda cust_id: (len(cust_id), cust_id))]
+        return [customer for customer in customers if customer]
+    
+    def dashboard(self) -> dict:
+        # Lazy banks have no customers in memory to start from, so their totals are built on first use.
+        if not self.aggregates.ready:
+            with self.lock:
+                if not self.aggregates.ready:
+                    self.aggregates.reset(recompute(self.storage.rows()).state)
+        return self.aggregates.to_dict()
+    
+    def verify_aggregates(self) -> list[str]:
+        if self.storage.preload:
+            expected = Aggregates.from_contributions(
+                customer_contribution(customer) for customer in list(self.customers.values()))
+        else:
+            expected = recompute(self.storage.rows())
+        self.dashboard()
+        return self.aggregates.differences(expected)
+    
+    def get_customer(self, cust_id: str) -> Optional[Customer]:
+        customer = self.customers.get(cust_id)
+        if customer is None and not self.storage.preload:
+            row = self.storage.get(cust_id)
+            if row:
+                customer = self.customers.setdefault(cust_id, self.build_customer(row))
+        return customer
+    
+    @instrument('auth_customer', falsy_declines=True)
+    def auth_customer(self, cust_id: str, password: str) -> Optional[Customer]:
+        customer = self.get_customer(cust_id)
+        if not customer or not customer.active:
+            return None
+        
+        if self.credentials and self.credentials.check(self.credentials.fingerprint(cust_id, password, customer.password)):
+            return customer
+        
+        if not customer.auth(password):
+            return None
+        
+        if not is_hashed(customer.password):
+            with self.locked(customer):
+                customer.password = hash_password(password)
+                self.save_customer(customer)
+        
+        if self.credentials:
+            self.credentials.remember(self.credentials.fingerprint(cust_id, password, customer.password))
+        return customer
+    
+    def login(self, cust_id: str, password: str) -> Optional[str]:
+        customer = self.auth_customer(cust_id, password)
+        if not customer or not self.credentials:
+            return None
+        return self.credentials.open_session(cust_id)
+    
+    def session_customer(self, token: str) -> Optional[Customer]:
+        cust_id = self.credentials.session(token) if self.credentials else None
+        customer = self.get_customer(cust_id) if cust_id else None
+        if customer and customer.active:
+            return customer
+        return None
+    
+    def logout(self, token: str):
+        if self.credentials:
+            self.credentials.close_session(token)
+    
+    def migrate_passwords(self) -> int:
+        plaintext = [row['id'] for row in self.storage.rows() if not is_hashed(row['password'])]
+        migrated = 0
+        with self.batch():
+            for cust_id in plaintext:
+                customer = self.get_customer(cust_id)
+                with self.locked(customer):
+                    if not is_hashed(customer.password):
+                        customer.password = hash_password(customer.password)
+                        self.save_customer(customer)
+                        migrated += 1
+        return migrated
+    
+    def screen(self, op: str, cust_id: str, amount: int, counterparty: Optional[str] = None) -> Optional[str]:
+        # Rules are checked under the customer lock before anything is applied, and only
+        # postings that succeed count towards the velocity windows.
+        if self.rules is None:
+            return None
+        return self.rules.check(op, cust_id, amount, counterparty)
+    
+    def remember_posting(self, op: str, cust_id: str, amount: int, counterparty: Optional[str] = None):
+        if self.rules is not None:
+            self.rules.record(op, cust_id, amount, counterparty)
+    
+    @instrument('deposit')
+    @idempotent('deposit')
+    def deposit(self, cust_id: str, account_type: str, amount: int) -> tuple[bool, str]:
+        customer = self.get_customer(cust_id)
+        if not customer:
+            return False, "Customer not found"
+        
+        if amount <= 0:
+            return False, "Amount must be positive"
+        
+        with self.locked(customer):
+            reason = self.screen('deposit', cust_id, amount)
+            if reason:
+                return False, reason
+            
+            if account_type == "CHECKING":
+                success = customer.deposit_to_checking(amount)
+            elif account_type == "SAVINGS":
+                success = customer.deposit_to_savings(amount)
+            else:
+                return False, "Invalid account type"
+            
+            if not success:
+                return False, f"No {account_type.lower()} account available"
+            
+            self.save_customer(customer)
+            self.remember_posting('deposit', cust_id, amount)
+            return True, "Deposit successful"
+    
+    @instrument('withdraw')
+    @idempotent('withdraw')
+    def withdraw(self, cust_id: str, account_type: str, amount: int) -> tuple[bool, str]:
+        customer = self.get_customer(cust_id)
+        if not customer:
+            return False, "Customer not found"
+        
+        if amount <= 0:
+            return False, "Amount must be positive"
+        
+        with self.locked(customer):
+            reason = self.screen('withdraw', cust_id, amount)
+            if reason:
+                return False, reason
+            
+            if account_type == "CHECKING":
+                success, message = customer.withdraw_from_checking(amount)
+            elif account_type == "SAVINGS":
+                success, message = customer.withdraw_from_savings(amount)
+            else:
+                return False, "Invalid account type"
+            
+            if success:
+                self.save_customer(customer)
+                self.remember_posting('withdraw', cust_id, amount)
+            return success, message
+    
+    @instrument('internal_transfer')
+    @idempotent('internal_transfer')
+    def transfer_internal(self, cust_id: str, from_account_type: str, amount: int) -> tuple[bool, str]:
+        customer = self.get_customer(cust_id)
+        if not customer:
+            return False, "Customer not found"
+        
+        with self.locked(customer):
+            reason = self.screen('internal_transfer', cust_id, amount)
+            if reason:
+                return False, reason
+            
+            if from_account_type == "SAVINGS":
+                success, message = customer.transfer_to_checking(amount)
+            elif from_account_type == "CHECKING":
+                success, message = customer.transfer_to_savings(amount)
+            else:
+                return False, "Invalid account type"
+            
+            if success:
+                self.save_customer(customer)
+                self.remember_posting('internal_transfer', cust_id, amount)
+            return success, message
+    
+    @instrument('transfer')
+    @idempotent('transfer')
+    def transfer_between_customers(self, from_cust_id: str, to_cust_id: str, 
+                                 from_account_type: str, to_account_type: str, amount: int) -> tuple[bool, str]:
+        from_customer = self.get_customer(from_cust_id)
+        to_customer = self.get_customer(to_cust_id)
+        
+        if not from_customer:
+            return False, "Sender customer not found"
+        
+        if not to_customer:
+            return False, "Receiver customer not found"
+        
+        with self.locked(from_customer, to_customer):
+            if not from_customer.active:
+                return False, "Sender account is deactivated"
+        
+            if not to_customer.active:
+                return False, "Receiver account is deactivated"
+        
+            if amount <= 0:
+                return False, "Amount must be positive"
+        
+            if from_account_type == "CHECKING":
+                if not from_customer.has_checking:
+                    return False, "Sender does not have a checking account"
+                if from_customer.checking_balance < amount:
+                    return False, "Insufficient funds in sender's checking account"
+            elif from_account_type == "SAVINGS":
+                if not from_customer.has_savings:
+                    return False, "Sender does not have a savings account"
+                if from_customer.savings_balance < amount:
+                    return False, "Insufficient funds in sender's savings account"
+            else:
+                return False, "Invalid sender account type"
+  
+            if to_account_type == "CHECKING":
+                if not to_customer.has_checking:
+                    return False, "Receiver does not have a checking account"
+            elif to_account_type == "SAVINGS":
+                if not to_customer.has_savings:
+                    return False, "Receiver does not have a savings account"
+            else:
+                return False, "Invalid receiver account type"
+        
+            reason = self.screen('transfer', from_cust_id, amount, to_cust_id)
+            if reason:
+                return False, reason
+        
+            if from_account_type == "CHECKING":
+                from_customer.checking_balance -= amount
+                from_customer.log_transaction("TRANSFER_OUT", "CHECKING", amount, from_customer.checking_balance, 
+                                            f"Transfer to {to_customer.first_name} {to_customer.last_name}")
+            else:
+                from_customer.savings_balance -= amount
+                from_customer.log_transaction("TRANSFER_OUT", "SAVINGS", amount, from_customer.savings_balance, 
+                                            f"Transfer to {to_customer.first_name} {to_customer.last_name}")
+        
+            if to_account_type == "CHECKING":
+                to_customer.checking_balance += amount
+                to_customer.log_transaction("TRANSFER_IN", "CHECKING", amount, to_customer.checking_balance, 
+                                          f"Transfer from {from_customer.first_name} {from_customer.last_name}")
+            else:
+                to_customer.savings_balance += amount
+                to_customer.log_transaction("TRANSFER_IN", "SAVINGS", amount, to_customer.savings_balance, 
+                                          f"Transfer from {from_customer.first_name} {from_customer.last_name}")
+        
+            self.save_customer(from_customer, to_customer)
+            self.remember_posting('transfer', from_cust_id, amount, to_cust_id)
+        
+            return True, transfer_message(from_customer.first_name, to_customer.first_name, from_account_type,
+                                          to_account_type, amount)
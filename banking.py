@@ -1,347 +1,410 @@
-from bank import Bank
-from termcolor import colored, cprint
-
-class BankingMenu:
-    
-    def __init__(self):
-        self.bank = Bank()
-        self.current_customer = None
-    
-    def display_menu(self):
-        print(colored("\n" + "="*100, 'yellow'))
-        print (colored("WELCOME TO AHMED BANK", 'cyan', attrs=['bold']))
-        print(colored("="*100,'yellow'))
-        
-        if self.current_customer:
-            print (colored(f"Welcome, {self.current_customer.first_name} {self.current_customer.last_name}!", 'green'))
-            print(colored("\n1. View Account Information", 'yellow'))
-            print(colored("2. Add Checking Account",'blue'))
-            print(colored("3. Add Savings Account",'blue'))
-            print(colored("4. Withdraw Money",'blue'))
-            print(colored("5. Deposit Money",'blue'))
-            print(colored("6. Transfer Money",'blue'))
-            print(colored("7. Logout", 'red'))
-        else:
-            print(colored("\n1. Login",'blue'))
-            print(colored("2. Register New Customer",'blue'))
-            print(colored("3. Exit",'red'))
-        
-        print(colored("="*100,'yellow'))
-    
-    def login(self):
-        print(colored("\nCUSTOMER LOGIN",'blue'))
-        cust_id = input(colored("Enter Customer ID: ", 'green')).strip()
-        password = input(colored("Enter Password: ", 'red')).strip()
-        
-        customer = self.bank.auth_customer(cust_id, password)
-        if customer:
-            self.current_customer = customer
-            print(colored(f"Login successful! Welcome, {customer.first_name}!", 'green'))
-        else:
-            print(colored("Invalid credentials or account deactivated.", 'red'))
-    
-    def register(self):
-        print(colored("\nNEW CUSTOMER REGISTRATION",'blue'))
-        first_name = input(colored("Enter First Name: ", 'green')).strip()
-        last_name = input(colored("Enter Last Name: ",'green')).strip()
-        password = input(colored("Enter Password: ", 'red')).strip()
-        
-        print(colored("\nAccount Types:",'magenta'))
-        print(colored("1. Checking only",'blue'))
-        print(colored("2. Savings only",'blue'))
-        print(colored("3. Both checking and savings",'blue'))
-        print(colored("4. No accounts (add later)",'blue'))
-        
-        ch = input(colored("Select account type (1-4): ", 'green')).strip()
-        
-        checking = ch in ['1', '3']
-        savings = ch in ['2', '3']
-        
-        cust_id = self.bank.add_customer(first_name, last_name, password, checking, savings)
-        print(f"Registration successful! Your Customer ID is: {cust_id}")
-        print("Please login to access your account.")
-    
-    def view_account_info(self):
-        print(colored("\nACCOUNT INFORMATION",'blue'))
-        print(colored("-" * 30, 'yellow'))
-        print(colored(f"Customer ID: {self.current_customer.cust_id}", 'blue'))
-        print(colored(f"Name: {self.current_customer.first_name} {self.current_customer.last_name}", 'blue'))
-        print(colored(f"Checking Account: {'Yes' if self.current_customer.has_checking else 'No'}", 'blue'))
-        if self.current_customer.has_checking:
-            print(colored(f"  Balance: ${self.current_customer.checking_balance:.2f}", 'green'))
-        print(colored(f"Savings Account: {'Yes' if self.current_customer.has_savings else 'No'}", 'blue'))
-        if self.current_customer.has_savings:
-            print(colored(f"  Balance: ${self.current_customer.savings_balance:.2f}", 'green'))
-        print(colored(f"Account Status: {'Active' if self.current_customer.active else 'Inactive'}", 'green'))
-        print(colored(f"Overdraft Count: {self.current_customer.overdraft_count}", 'red'))
-    
-    def add_checking_account(self):
-        print(colored("\nADD CHECKING ACCOUNT",'magenta'))
-        
-        if self.current_customer.has_checking:
-            print(colored("You already have a checking account.", 'red'))
-            return
-        
-        self.current_customer.add_checking_account()
-        self.bank.save_customers()
-        print(colored("Checking account added successfully!", 'green'))
-    
-    def add_savings_account(self):
-        print(colored("\nADD SAVINGS ACCOUNT",'magenta'))
-        
-        if self.current_customer.has_savings:
-            print(colored("You already have a savings account.", 'red'))
-            return
-        
-        self.current_customer.add_savings_account()
-        self.bank.save_customers()
-        print(colored("Savings account added successfully!", 'green'))
-    
-    def withdraw_money(self):
-        print(colored("\nWITHDRAW MONEY",'magenta'))
-        
-        if not self.current_customer.has_checking and not self.current_customer.has_savings:
-            print(colored("No accounts available for withdrawal.", 'red'))
-            return
-        
-        print(colored("\nSelect account to withdraw from:",'magenta'))
-        if self.current_customer.has_checking:
-            print(colored(f"1. Checking Account (Balance: ${self.current_customer.checking_balance:.2f})",'green'))
-        if self.current_customer.has_savings:
-            print(colored(f"2. Savings Account (Balance: ${self.current_customer.savings_balance:.2f})",'green'))
-        
-        ch = input(colored("Enter choice (1-2): ",'magenta')).strip()
-        
-        try:
-            amount = float(input(colored("Enter amount to withdraw: $",'green')))
-            if amount <= 0:
-                print(colored("Amount must be positive.",'red'))
-                return
-        except ValueError:
-            print(colored("Invalid amount. Please enter a number.",'red'))
-            return
-        
-        if ch == '1' and self.current_customer.has_checking:
-            success, message = self.current_customer.withdraw_from_checking(amount)
-            print(message)
-            if success:
-                self.bank.save_customers()
-        elif ch == '2' and self.current_customer.has_savings:
-            success, message = self.current_customer.withdraw_from_savings(amount)
-            print(message)
-            if success:
-                self.bank.save_customers()
-        else:
-            print(colored("Invalid choice.", 'red'))
-    
-    def deposit_money(self):
-        print(colored("\nDEPOSIT MONEY",'magenta'))
-        
-        if not self.current_customer.has_checking and not self.current_customer.has_savings:
-            print(colored("No accounts available for deposit.", 'red'))
-            return
-        
-        print(colored("\nSelect account to deposit to:",'magenta'))
-        if self.current_customer.has_checking:
-            print(colored(f"1. Checking Account (Balance: ${self.current_customer.checking_balance:.2f})",'green'))
-        if self.current_customer.has_savings:
-            print(colored(f"2. Savings Account (Balance: ${self.current_customer.savings_balance:.2f})",'green'))
-        
-        ch = input(colored("Enter choice (1-2): ", 'magenta')).strip()
-        
-        try:
-            amount = float(input(colored("Enter amount to deposit: $", 'green')))
-            if amount <= 0:
-                print(colored("Amount must be positive.", 'red'))
-                return
-        except ValueError:
-            print(colored("Invalid amount. Please enter a number.", 'red'))
-            return
-        
-        if ch == '1' and self.current_customer.has_checking:
-            success = self.current_customer.deposit_to_checking(amount)
-            if success:
-                print(colored("Deposit successful!", 'green'))
-                self.bank.save_customers()
-            else:
-                print(colored("Deposit failed.", 'red'))
-        elif ch == '2' and self.current_customer.has_savings:
-            success = self.current_customer.deposit_to_savings(amount)
-            if success:
-                print(colored("Deposit successful!", 'green'))
-                self.bank.save_customers()
-            else:
-                print(colored("Deposit failed.", 'red'))
-        else:
-            print(colored("Invalid choice.", 'red'))
-    
-    def transfer_money(self):
-        print(colored("\nTRANSFER MONEY",'magenta'))
-        print(colored("1. Transfer between your own accounts",'green'))
-        print(colored("2. Transfer to another customer",'green'))
-        
-        ch = input(colored("Enter choice (1-2): ", 'magenta')).strip()
-        
-        if ch == '1':
-            self.internal_transfer()
-        elif ch == '2':
-            self.external_transfer()
-        else:
-            print(colored("Invalid choice.", 'red'))
-    
-    def internal_transfer(self):
-        if not self.current_customer.has_checking or not self.current_customer.has_savings:
-            print(colored("You need both checking and savings accounts to transfer between them.", 'red'))
-            return
-        
-        print(colored("\nSelect transfer direction:",'magenta'))
-        print(colored(f"1. Savings to Checking (Savings Balance: ${self.current_customer.savings_balance:.2f})",'green'))
-        print(colored(f"2. Checking to Savings (Checking Balance: ${self.current_customer.checking_balance:.2f})",'green'))
-        
-        ch = input(colored("Enter choice (1-2): ", 'magenta')).strip()
-        
-        try:
-            amount = float(input(colored("Enter amount to transfer: $", 'green')))
-            if amount <= 0:
-                print(colored("Amount must be positive.", 'red'))
-                return
-        except ValueError:
-            print(colored("Invalid amount. Please enter a number.", 'red'))
-            return
-        
-        if ch == '1':
-            success, message = self.current_customer.transfer_to_checking(amount)
-            print(message)
-            if success:
-                self.bank.save_customers()
-        elif ch == '2':
-            success, message = self.current_customer.transfer_to_savings(amount)
-            print(message)
-            if success:
-                self.bank.save_customers()
-        else:
-            print(colored("Invalid choice.", 'red'))
-    
-    def external_transfer(self):
-        if not self.current_customer.has_checking and not self.current_customer.has_savings:
-            print(colored("No accounts available for transfer.", 'red'))
-            return
-        
-        receiver_id = input(colored("Enter receiver's Customer ID: ", 'magenta')).strip()
-        receiver = self.bank.get_customer(receiver_id)
-        
-        if not receiver:
-            print(colored("Receiver customer not found.", 'red'))
-            return
-        
-        if not receiver.active:
-            print(colored("Receiver account is deactivated.", 'red'))
-            return
-        
-        print(colored("\nSelect your account to transfer from:",'magenta'))
-        sender_account = None
-        if self.current_customer.has_checking:
-            print(colored(f"1. Checking Account (Balance: ${self.current_customer.checking_balance:.2f})",'green'))
-        if self.current_customer.has_savings:
-            print(colored(f"2. Savings Account (Balance: ${self.current_customer.savings_balance:.2f})",'green'))
-        
-        ch = input(colored("Enter choice (1-2): ", 'magenta')).strip()
-        
-        if ch == '1' and self.current_customer.has_checking:
-            sender_account = "CHECKING"
-        elif ch == '2' and self.current_customer.has_savings:
-            sender_account = "SAVINGS"
-        else:
-            print(colored("Invalid choice.", 'red'))
-            return
-        
-        print(colored(f"\nSelect {receiver.first_name}'s account to transfer to:",'magenta'))
-        receiver_account = None
-        if receiver.has_checking:
-            print(colored(f"1. Checking Account (Balance: ${receiver.checking_balance:.2f})",'green'))
-        if receiver.has_savings:
-            print(colored(f"2. Savings Account (Balance: ${receiver.savings_balance:.2f})",'green'))
-        
-        ch = input(colored("Enter choice (1-2): ", 'magenta')).strip()
-        
-        if ch == '1' and receiver.has_checking:
-            receiver_account = "CHECKING"
-        elif ch == '2' and receiver.has_savings:
-            receiver_account = "SAVINGS"
-        else:
-            print(colored("Invalid choice.", 'red'))
-            return
-        
-        try:
-            amount = float(input(colored("Enter amount to transfer: $", 'green')))
-            if amount <= 0:
-                print(colored("Amount must be positive.", 'red'))
-                return
-        except ValueError:
-            print(colored("Invalid amount. Please enter a number.", 'red'))
-            return
-        
-        print(colored("\nTransfer Summary:",'magenta'))
-        print(colored(f"From: {self.current_customer.first_name} {self.current_customer.last_name} ({sender_account})",'green'))
-        print(colored(f"To: {receiver.first_name} {receiver.last_name} ({receiver_account})",'green'))
-        print(colored(f"Amount: ${amount:.2f}",'green'))
-        
-        confirm = input(colored("Confirm transfer? (y/n): ", 'magenta')).strip().lower()
-        if confirm != 'y':
-            print(colored("Transfer cancelled.", 'red'))
-            return
-        
-        success, message = self.bank.transfer_between_customers(
-            self.current_customer.cust_id, receiver_id, 
-            sender_account, receiver_account, amount
-        )
-        print(message)
-    
-    def logout(self):
-        self.current_customer = None
-        print(colored("Logged out successfully.", 'green'))
-    
-    def run(self):
-        print(colored("Welcome to AHMED Bank", 'blue'))
-        
-        while True:
-            self.display_menu()
-            
-            if self.current_customer:
-                ch = input(colored("Enter your choice (1-7): ", 'magenta')).strip()
-                
-                if ch == '1':
-                    self.view_account_info()
-                elif ch == '2':
-                    self.add_checking_account()
-                elif ch == '3':
-                    self.add_savings_account()
-                elif ch == '4':
-                    self.withdraw_money()
-                elif ch == '5':
-                    self.deposit_money()
-                elif ch == '6':
-                    self.transfer_money()
-                elif ch == '7':
-                    self.logout()
-                else:
-                    print(colored("Invalid choice. Please try again.", 'red'))
-            else:
-                ch = input(colored("Enter your choice (1-3): ", 'magenta')).strip()
-                
-                if ch == '1':
-                    self.login()
-                elif ch == '2':
-                    self.register()
-                elif ch == '3':
-                    print(colored("Thank you for using AHMED Bank Goodbye!", 'blue'))
-                    break
-                else:
-                    print(colored("Invalid choice. Please try again.", 'red'))
-
-def main():
-    app = BankingMenu()
-    app.run()
-
-if __name__ == "__main__":
+import json
+import sys
+import metrics
+from bank import Bank
+from fraud import RuleEngine, default_rules
+from money import format_money, parse_amount
+from snapshot import open_snapshot_storage
+from transaction import Transaction
+from termcolor import colored, cprint
+from typing import List, Optional
+
+GUEST_ACTIONS = {'1': 'login', '2': 'register', '3': 'exit'}
+MEMBER_ACTIONS = {'1': 'view_account_info', '2': 'add_checking_account', '3': 'add_savings_account',
+                  '4': 'withdraw_money', '5': 'deposit_money', '6': 'transfer_money',
+                  '7': 'logout', '8': 'view_transaction_history'}
+
+class BankingMenu:
+    
+    def __init__(self, lazy: bool = False, snapshot: bool = False, bank: Optional[Bank] = None):
+        if bank is None:
+            storage = open_snapshot_storage("bank.snap", "bank.csv") if snapshot else None
+            bank = Bank(checkpoint_interval=30.0, lazy=lazy, rules=RuleEngine(default_rules()), storage=storage)
+        self.bank = bank
+        self.current_customer = None
+        self.recording = None
+    
+    # Every prompt and line of output goes through ask() and say(), so a headless driver (teller.py)
+    # can feed recorded answers and buffer or drop the output. A secret answer is recorded only as
+    # {"password": secret}, the key (customer ID, or name when registering) teller.py looks it up by.
+    def ask(self, prompt: str, color: str, secret: Optional[str] = None) -> str:
+        answer = input(colored(prompt, color))
+        if self.recording is not None:
+            self.recording.append({'password': secret} if secret is not None else answer)
+        return answer
+    
+    def say(self, text: str, color: Optional[str] = None, attrs: Optional[List[str]] = None):
+        print(colored(text, color, attrs=attrs) if color else text)
+    
+    def display_menu(self):
+        self.say("\n" + "="*100, 'yellow')
+        self.say("WELCOME TO AHMED BANK", 'cyan', attrs=['bold'])
+        self.say("="*100,'yellow')
+        
+        if self.current_customer:
+            self.say(f"Welcome, {self.current_customer.first_name} {self.current_customer.last_name}!", 'green')
+            self.say("\n1. View Account Information", 'yellow')
+            self.say("2. Add Checking Account",'blue')
+            self.say("3. Add Savings Account",'blue')
+            self.say("4. Withdraw Money",'blue')
+            self.say("5. Deposit Money",'blue')
+            self.say("6. Transfer Money",'blue')
+            self.say("7. Logout", 'red')
+            self.say("8. Transaction History",'blue')
+        else:
+            self.say("\n1. Login",'blue')
+            self.say("2. Register New Customer",'blue')
+            self.say("3. Exit",'red')
+        
+        self.say("="*100,'yellow')
+    
+    def login(self):
+        self.say("\nCUSTOMER LOGIN",'blue')
+        cust_id = self.ask("Enter Customer ID: ", 'green').strip()
+        password = self.ask("Enter Password: ", 'red', secret=cust_id).strip()
+        
+        customer = self.bank.auth_customer(cust_id, password)
+        if customer:
+            self.current_customer = customer
+            self.say(f"Login successful! Welcome, {customer.first_name}!", 'green')
+        else:
+            self.say("Invalid credentials or account deactivated.", 'red')
+    
+    def register(self):
+        self.say("\nNEW CUSTOMER REGISTRATION",'blue')
+        first_name = self.ask("Enter First Name: ", 'green').strip()
+        last_name = self.ask("Enter Last Name: ",'green').strip()
+        password = self.ask("Enter Password: ", 'red', secret=f"{first_name} {last_name}").strip()
+        
+        self.say("\nAccount Types:",'magenta')
+        self.say("1. Checking only",'blue')
+        self.say("2. Savings only",'blue')
+        self.say("3. Both checking and savings",'blue')
+        self.say("4. No accounts (add later)",'blue')
+        
+        ch = self.ask("Select account type (1-4): ", 'green').strip()
+        
+        checking = ch in ['1', '3']
+        savings = ch in ['2', '3']
+        
+        cust_id = self.bank.add_customer(first_name, last_name, password, checking, savings)
+        self.say(f"Registration successful! Your Customer ID is: {cust_id}")
+        self.say("Please login to access your account.")
+    
+    def view_account_info(self):
+        self.say("\nACCOUNT INFORMATION",'blue')
+        self.say("-" * 30, 'yellow')
+        self.say(f"Customer ID: {self.current_customer.cust_id}", 'blue')
+        self.say(f"Name: {self.current_customer.first_name} {self.current_customer.last_name}", 'blue')
+        self.say(f"Checking Account: {'Yes' if self.current_customer.has_checking else 'No'}", 'blue')
+        if self.current_customer.has_checking:
+            self.say(f"  Balance: ${format_money(self.current_customer.checking_balance)}", 'green')
+        self.say(f"Savings Account: {'Yes' if self.current_customer.has_savings else 'No'}", 'blue')
+        if self.current_customer.has_savings:
+            self.say(f"  Balance: ${format_money(self.current_customer.savings_balance)}", 'green')
+        self.say(f"Account Status: {'Active' if self.current_customer.active else 'Inactive'}", 'green')
+        self.say(f"Overdraft Count: {self.current_customer.overdraft_count}", 'red')
+    
+    def view_transaction_history(self):
+        self.say("\nTRANSACTION HISTORY",'blue')
+        self.say("-" * 30, 'yellow')
+        
+        if not self.bank.history:
+            self.say("Transaction history is not available.", 'red')
+            return
+        
+        transactions = self.bank.history.last(self.current_customer.cust_id, 10)
+        if not transactions:
+            self.say("No transactions yet.", 'yellow')
+            return
+        
+        for row in transactions:
+            self.say(str(Transaction.from_dict(row)), 'green')
+    
+    def add_checking_account(self):
+        self.say("\nADD CHECKING ACCOUNT",'magenta')
+        
+        if self.current_customer.has_checking:
+            self.say("You already have a checking account.", 'red')
+            return
+        
+        with self.bank.locked(self.current_customer):
+            self.current_customer.add_checking_account()
+            self.bank.save_customer(self.current_customer)
+        self.say("Checking account added successfully!", 'green')
+    
+    def add_savings_account(self):
+        self.say("\nADD SAVINGS ACCOUNT",'magenta')
+        
+        if self.current_customer.has_savings:
+            self.say("You already have a savings account.", 'red')
+            return
+        
+        with self.bank.locked(self.current_customer):
+            self.current_customer.add_savings_account()
+            self.bank.save_customer(self.current_customer)
+        self.say("Savings account added successfully!", 'green')
+    
+    def withdraw_money(self):
+        self.say("\nWITHDRAW MONEY",'magenta')
+        
+        if not self.current_customer.has_checking and not self.current_customer.has_savings:
+            self.say("No accounts available for withdrawal.", 'red')
+            return
+        
+        self.say("\nSelect account to withdraw from:",'magenta')
+        if self.current_customer.has_checking:
+            self.say(f"1. Checking Account (Balance: ${format_money(self.current_customer.checking_balance)})",'green')
+        if self.current_customer.has_savings:
+            self.say(f"2. Savings Account (Balance: ${format_money(self.current_customer.savings_balance)})",'green')
+        
+        ch = self.ask("Enter choice (1-2): ",'magenta').strip()
+        
+        try:
+            amount = parse_amount(self.ask("Enter amount to withdraw: $",'green'))
+            if amount <= 0:
+                self.say("Amount must be positive.",'red')
+                return
+        except ValueError:
+            self.say("Invalid amount. Please enter a number.",'red')
+            return
+        
+        if ch == '1' and self.current_customer.has_checking:
+            success, message = self.bank.withdraw(self.current_customer.cust_id, "CHECKING", amount)
+            self.say(message)
+        elif ch == '2' and self.current_customer.has_savings:
+            success, message = self.bank.withdraw(self.current_customer.cust_id, "SAVINGS", amount)
+            self.say(message)
+        else:
+            self.say("Invalid choice.", 'red')
+    
+    def deposit_money(self):
+        self.say("\nDEPOSIT MONEY",'magenta')
+        
+        if not self.current_customer.has_checking and not self.current_customer.has_savings:
+            self.say("No accounts available for deposit.", 'red')
+            return
+        
+        self.say("\nSelect account to deposit to:",'magenta')
+        if self.current_customer.has_checking:
+            self.say(f"1. Checking Account (Balance: ${format_money(self.current_customer.checking_balance)})",'green')
+        if self.current_customer.has_savings:
+            self.say(f"2. Savings Account (Balance: ${format_money(self.current_customer.savings_balance)})",'green')
+        
+        ch = self.ask("Enter choice (1-2): ", 'magenta').strip()
+        
+        try:
+            amount = parse_amount(self.ask("Enter amount to deposit: $", 'green'))
+            if amount <= 0:
+                self.say("Amount must be positive.", 'red')
+                return
+        except ValueError:
+            self.say("Invalid amount. Please enter a number.", 'red')
+            return
+        
+        if ch == '1' and self.current_customer.has_checking:
+            success, message = self.bank.deposit(self.current_customer.cust_id, "CHECKING", amount)
+            if success:
+                self.say("Deposit successful!", 'green')
+            else:
+                self.say("Deposit failed.", 'red')
+        elif ch == '2' and self.current_customer.has_savings:
+            success, message = self.bank.deposit(self.current_customer.cust_id, "SAVINGS", amount)
+            if success:
+                self.say("Deposit successful!", 'green')
+            else:
+                self.say("Deposit failed.", 'red')
+        else:
+            self.say("Invalid choice.", 'red')
+    
+    def transfer_money(self):
+        self.say("\nTRANSFER MONEY",'magenta')
+        self.say("1. Transfer between your own accounts",'green')
+        self.say("2. Transfer to another customer",'green')
+        
+        ch = self.ask("Enter choice (1-2): ", 'magenta').strip()
+        
+        if ch == '1':
+            self.internal_transfer()
+        elif ch == '2':
+            self.external_transfer()
+        else:
+            self.say("Invalid choice.", 'red')
+    
+    def internal_transfer(self):
+        if not self.current_customer.has_checking or not self.current_customer.has_savings:
+            self.say("You need both checking and savings accounts to transfer between them.", 'red')
+            return
+        
+        self.say("\nSelect transfer direction:",'magenta')
+        self.say(f"1. Savings to Checking (Savings Balance: ${format_money(self.current_customer.savings_balance)})",'green')
+        self.say(f"2. Checking to Savings (Checking Balance: ${format_money(self.current_customer.checking_balance)})",'green')
+        
+        ch = self.ask("Enter choice (1-2): ", 'magenta').strip()
+        
+        try:
+            amount = parse_amount(self.ask("Enter amount to transfer: $", 'green'))
+            if amount <= 0:
+                self.say("Amount must be positive.", 'red')
+                return
+        except ValueError:
+            self.say("Invalid amount. Please enter a number.", 'red')
+            return
+        
+        if ch == '1':
+            success, message = self.bank.transfer_internal(self.current_customer.cust_id, "SAVINGS", amount)
+            self.say(message)
+        elif ch == '2':
+            success, message = self.bank.transfer_internal(self.current_customer.cust_id, "CHECKING", amount)
+            self.say(message)
+        else:
+            self.say("Invalid choice.", 'red')
+    
+    def find_receiver(self, query: str):
+        if not query or query.isdigit():
+            return self.bank.get_customer(query)
+        
+        names = query.split()
+        if len(names) >= 2:
+            matches = self.bank.find_customers(first_name=names[0], last_name=" ".join(names[1:]))
+        else:
+            matches = self.bank.find_customers(last_name=names[0])
+        
+        if len(matches) <= 1:
+            return matches[0] if matches else None
+        
+        self.say("\nMultiple customers match:",'magenta')
+        for match in matches:
+            self.say(f"{match.cust_id}: {match.first_name} {match.last_name}",'green')
+        return self.bank.get_customer(self.ask("Enter receiver's Customer ID: ", 'magenta').strip())
+    
+    def external_transfer(self):
+        if not self.current_customer.has_checking and not self.current_customer.has_savings:
+            self.say("No accounts available for transfer.", 'red')
+            return
+        
+        receiver = self.find_receiver(self.ask("Enter receiver's Customer ID or name: ", 'magenta').strip())
+        
+        if not receiver:
+            self.say("Receiver customer not found.", 'red')
+            return
+        receiver_id = receiver.cust_id
+        
+        if not receiver.active:
+            self.say("Receiver account is deactivated.", 'red')
+            return
+        
+        self.say("\nSelect your account to transfer from:",'magenta')
+        sender_account = None
+        if self.current_customer.has_checking:
+            self.say(f"1. Checking Account (Balance: ${format_money(self.current_customer.checking_balance)})",'green')
+        if self.current_customer.has_savings:
+            self.say(f"2. Savings Account (Balance: ${format_money(self.current_customer.savings_balance)})",'green')
+        
+        ch = self.ask("Enter choice (1-2): ", 'magenta').strip()
+        
+        if ch == '1' and self.current_customer.has_checking:
+            sender_account = "CHECKING"
+        elif ch == '2' and self.current_customer.has_savings:
+            sender_account = "SAVINGS"
+        else:
+            self.say("Invalid choice.", 'red')
+            return
+        
+        self.say(f"\nSelect {receiver.first_name}'s account to transfer to:",'magenta')
+        receiver_account = None
+        if receiver.has_checking:
+            self.say(f"1. Checking Account (Balance: ${format_money(receiver.checking_balance)})",'green')
+        if receiver.has_savings:
+            self.say(f"2. Savings Account (Balance: ${format_money(receiver.savings_balance)})",'green')
+        
+        ch = self.ask("Enter choice (1-2): ", 'magenta').strip()
+        
+        if ch == '1' and receiver.has_checking:
+            receiver_account = "CHECKING"
+        elif ch == '2' and receiver.has_savings:
+            receiver_account = "SAVINGS"
+        else:
+            self.say("Invalid choice.", 'red')
+            return
+        
+        try:
+            amount = parse_amount(self.ask("Enter amount to transfer: $", 'green'))
+            if amount <= 0:
+                self.say("Amount must be positive.", 'red')
+                return
+        except ValueError:
+            self.say("Invalid amount. Please enter a number.", 'red')
+            return
+        
+        self.say("\nTransfer Summary:",'magenta')
+        self.say(f"From: {self.current_customer.first_name} {self.current_customer.last_name} ({sender_account})",'green')
+        self.say(f"To: {receiver.first_name} {receiver.last_name} ({receiver_account})",'green')
+        self.say(f"Amount: ${format_money(amount)}",'green')
+        
+        confirm = self.ask("Confirm transfer? (y/n): ", 'magenta').strip().lower()
+        if confirm != 'y':
+            self.say("Transfer cancelled.", 'red')
+            return
+        
+        success, message = self.bank.transfer_between_customers(
+            self.current_customer.cust_id, receiver_id, 
+            sender_account, receiver_account, amount
+        )
+        self.say(message)
+    
+    def logout(self):
+        self.current_customer = None
+        self.say("Logged out successfully.", 'green')
+    
+    def exit(self):
+        self.say("Thank you for using AHMED Bank Goodbye!", 'blue')
+    
+    def action(self, ch: str) -> Optional[str]:
+        return (MEMBER_ACTIONS if self.current_customer else GUEST_ACTIONS).get(ch)
+    
+    def choose(self) -> str:
+        self.display_menu()
+        if self.current_customer:
+            return self.ask("Enter your choice (1-8): ", 'magenta').strip()
+        return self.ask("Enter your choice (1-3): ", 'magenta').strip()
+    
+    def handle(self, ch: str) -> bool:
+        name = self.action(ch)
+        if name is None:
+            self.say("Invalid choice. Please try again.", 'red')
+            return True
+        
+        getattr(self, name)()
+        return name != 'exit'
+    
+    def run(self):
+        self.say("Welcome to AHMED Bank", 'blue')
+        
+        while self.handle(self.choose()):
+            pass
+        self.bank.close()
+
+def main():
+    args = sys.argv[1:]
+    metrics_file = next((arg.split('=', 1)[1] for arg in args if arg.startswith("--metrics=")), None)
+    if metrics_file:
+        metrics.enable()
+    
+    record_file = next((arg.split('=', 1)[1] for arg in args if arg.startswith("--record=")), None)
+    
+    app = BankingMenu(lazy="--lazy" in args, snapshot="--snapshot" in args)
+    if record_file:
+        app.recording = []
+    try:
+        app.run()
+    finally:
+        if record_file and app.recording:
+            # One session per line, in the format teller.py replays.
+            with open(record_file, 'a') as file:
+                file.write(json.dumps({'inputs': app.recording}) + "\n")
+        if metrics_file:
+            metrics.REGISTRY.write(metrics_file, 'json' if metrics_file.endswith('.json') else 'prometheus')
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,90 @@
+import argparse
+import csv
+import json
+import time
+from typing import Dict, Any, Iterator, Tuple
+
+INSTRUCTION_FIELDS = ['op', 'cust_id', 'account', 'amount', 'to_cust_id', 'to_account', 'idempotency_key']
+
+
+class BatchReport:
+    def __init__(self):
+        self.outcomes = []
+        self.succeeded = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def add(self, line: int, success: bool, message: str):
+        self.outcomes.append((line, success, message))
+        if success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.succeeded + self.failed
+        return {
+            'instructions': total,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'seconds': self.seconds,
+            'per_second': total / self.seconds if self.seconds else 0.0
+        }
+
+
+def read_instructions(path: str) -> Iterator[Tuple[int, Any]]:
+    # Each instruction comes with the file line it was read from, so the report points at the right line.
+    with open(path, 'r', newline='') as file:
+        if path.endswith('.jsonl'):
+            for number, line in enumerate(file, start=1):
+                if line.strip():
+                    try:
+                        yield number, json.loads(line)
+                    except ValueError:
+                        # post_instruction reports it as invalid.
+                        yield number, None
+        else:
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+
+
+def write_report(report: BatchReport, path: str):
+    with open(path, 'w') as file:
+        for line, success, message in report.outcomes:
+            file.write(json.dumps({'line': line, 'success': success, 'message': message}) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Post a file of deposits, withdrawals and transfers in one batch")
+    parser.add_argument("instructions", help=f"CSV with columns {','.join(INSTRUCTION_FIELDS)} or JSONL with the same keys")
+    parser.add_argument("--bank", default="bank.csv")
+    parser.add_argument("--report", help="write one JSON outcome per instruction to this file")
+    args = parser.parse_args()
+
+    from bank import Bank
+
+    bank = Bank(args.bank)
+    try:
+        report = bank.post_batch(read_instructions(args.instructions))
+    finally:
+        bank.close()
+
+    if args.report:
+        write_report(report, args.report)
+    else:
+        for line, success, message in report.outcomes:
+            if not success:
+                print(f"line {line}: {message}")
+
+    stats = report.stats()
+    print(f"{stats['succeeded']} of {stats['instructions']} instructions posted in {stats['seconds']:.3f}s "
+          f"({stats['per_second']:.0f}/s), {stats['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from aggregates import Aggregates, customer_contribution
+from bank import Bank
+from benchmarks.common import emit
+from benchmarks.generate import generate, parse_count
+
+# Run from the repository root: python -m benchmarks.aggregates [--customers 1M]
+# Dashboard read from the running totals against recomputing it over every customer.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Running aggregates against a full recompute")
+    parser.add_argument("--customers", type=parse_count, default=parse_count("200k"))
+    parser.add_argument("--postings", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, "bank.csv")
+        generate(csv_file, args.customers, args.seed)
+        bank = Bank(csv_file, keep_history=False, compact_every=10 ** 9)
+        ids = list(bank.customers)
+        rng = random.Random(args.seed)
+
+        started = time.perf_counter()
+        with bank.batch():
+            for _ in range(args.postings):
+                if rng.random() < 0.5:
+                    bank.deposit(rng.choice(ids), "CHECKING", rng.randint(1_00, 500_00))
+                else:
+                    bank.withdraw(rng.choice(ids), "CHECKING", rng.randint(1_00, 100_00))
+        posting_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        bank.dashboard()
+        dashboard_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        Aggregates.from_contributions(customer_contribution(customer) for customer in bank.customers.values())
+        recompute_seconds = time.perf_counter() - started
+
+        problems = bank.verify_aggregates()
+        bank.close()
+
+    emit("aggregates", {
+        'customers': args.customers,
+        'postings_per_second': args.postings / posting_seconds,
+        'dashboard_us': dashboard_seconds * 1e6,
+        'recompute_seconds': recompute_seconds,
+        'consistent': not problems
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import os
+import tempfile
+import time
+from bank import Bank
+from benchmarks.common import emit, latency_summary
+
+# Run from the repository root: python -m benchmarks.auth [--customers 20 --logins 2000]
+
+
+def run_logins(bank: Bank, ids: list, logins: int) -> tuple:
+    samples = []
+    started = time.perf_counter()
+    for index in range(logins):
+        cust_id = ids[index % len(ids)]
+        begun = time.perf_counter()
+        customer = bank.auth_customer(cust_id, f"secret-{cust_id}")
+        samples.append(time.perf_counter() - begun)
+        assert customer is not None
+    return time.perf_counter() - started, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput with and without the credential cache")
+    parser.add_argument("--customers", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=2000, help="logins with the cache enabled")
+    parser.add_argument("--uncached-logins", type=int, default=40)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = {'customers': args.customers}
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, "bank.csv")
+        bank = Bank(csv_file, keep_history=False)
+        ids = [bank.add_customer(f"First{index}", "Last", "pending") for index in range(args.customers)]
+        for cust_id in ids:
+            customer = bank.get_customer(cust_id)
+            customer.password = f"secret-{cust_id}"
+        bank.migrate_passwords()
+
+        for name, enabled, logins in (('uncached', False, args.uncached_logins), ('cached', True, args.logins)):
+            credentials = bank.credentials
+            if not enabled:
+                bank.credentials = None
+            else:
+                run_logins(bank, ids, len(ids))
+            elapsed, samples = run_logins(bank, ids, logins)
+            bank.credentials = credentials
+            results[name] = dict(latency_summary(samples), logins=logins, seconds=elapsed,
+                                 logins_per_second=logins / elapsed)
+        bank.close()
+
+    results['speedup'] = results['cached']['logins_per_second'] / results['uncached']['logins_per_second']
+    emit("auth", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
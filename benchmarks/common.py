@@ -0,0 +1,38 @@
+import json
+import platform
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        'count': len(samples),
+        'p50_us': percentile(samples, 0.50) * 1e6,
+        'p99_us': percentile(samples, 0.99) * 1e6,
+        'max_us': max(samples) * 1e6 if samples else 0.0
+    }
+
+
+def emit(name: str, results: Dict[str, Any], output: Optional[str] = None):
+    report = {
+        'benchmark': name,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': int(time.time()),
+        'results': results
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w') as file:
+            file.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
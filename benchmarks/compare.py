@@ -0,0 +1,67 @@
+import argparse
+import json
+import sys
+from typing import Dict, Any, List
+
+# Run from the repository root: python -m benchmarks.compare baseline.json current.json [--tolerance 0.25]
+# Exits non-zero if any metric regressed by more than the tolerance.
+
+LOWER_IS_BETTER = ('_seconds', '_us', '_bytes')
+HIGHER_IS_BETTER = ('_per_second',)
+# Single worst samples are mostly scheduler noise, so they are left out of the comparison.
+IGNORED = ('max_us',)
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    metrics = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = value
+    return metrics
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.25) -> List[Dict[str, Any]]:
+    before = flatten(baseline.get('results', baseline))
+    after = flatten(current.get('results', current))
+    regressions = []
+    for name, old in before.items():
+        new = after.get(name)
+        if new is None or old <= 0 or name.endswith(IGNORED):
+            continue
+        if name.endswith(LOWER_IS_BETTER):
+            change = new / old - 1
+        elif name.endswith(HIGHER_IS_BETTER):
+            change = old / new - 1 if new > 0 else float('inf')
+        else:
+            continue
+        if change > tolerance:
+            regressions.append({'metric': name, 'baseline': old, 'current': new, 'worse_by': change})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark JSON reports")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown as a fraction")
+    args = parser.parse_args()
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+
+    regressions = compare(baseline, current, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression['metric']}: {regression['baseline']:.6g} -> "
+              f"{regression['current']:.6g} ({regression['worse_by']:+.0%})")
+    if not regressions:
+        print("No regressions")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from bank import Bank
+from benchmarks.common import emit
+
+# Run from the repository root: python -m benchmarks.concurrency [--threads 16 --transfers 5000]
+# Exits non-zero if money is created or destroyed by concurrent transfers.
+
+
+def total_money(bank: Bank) -> int:
+    return sum(customer.checking_balance + customer.savings_balance for customer in bank.customers.values())
+
+
+def seed_bank(bank: Bank, customers: int, opening_balance: int) -> list:
+    ids = []
+    for index in range(customers):
+        cust_id = bank.add_customer(f"First{index}", f"Last{index}", "secret", True, True)
+        bank.deposit(cust_id, "CHECKING", opening_balance)
+        bank.deposit(cust_id, "SAVINGS", opening_balance)
+        ids.append(cust_id)
+    return ids
+
+
+def worker(bank: Bank, ids: list, transfers: int, seed: int, outcomes: list, lock: threading.Lock):
+    rng = random.Random(seed)
+    succeeded = 0
+    for _ in range(transfers):
+        amount = rng.randint(1, 5000)
+        if rng.random() < 0.2:
+            success, _ = bank.transfer_internal(rng.choice(ids), rng.choice(["CHECKING", "SAVINGS"]), amount)
+        else:
+            sender, receiver = rng.sample(ids, 2)
+            success, _ = bank.transfer_between_customers(
+                sender, receiver, rng.choice(["CHECKING", "SAVINGS"]), rng.choice(["CHECKING", "SAVINGS"]), amount)
+        succeeded += success
+    with lock:
+        outcomes.append(succeeded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent transfer stress test")
+    parser.add_argument("--customers", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--transfers", type=int, default=500, help="transfers per thread")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, "bank.csv")
+        bank = Bank(csv_file, keep_history=False)
+        ids = seed_bank(bank, args.customers, 100_00)
+        expected = total_money(bank)
+
+        outcomes = []
+        lock = threading.Lock()
+        threads = [threading.Thread(target=worker, args=(bank, ids, args.transfers, args.seed + index, outcomes, lock))
+                   for index in range(args.threads)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        in_memory = total_money(bank)
+        negative = [customer.cust_id for customer in bank.customers.values()
+                    if customer.checking_balance < 0 or customer.savings_balance < 0]
+        bank.close()
+        reloaded = Bank(csv_file, keep_history=False)
+        on_disk = total_money(reloaded)
+        reloaded.close()
+
+    attempted = args.threads * args.transfers
+    results = {
+        'threads': args.threads,
+        'attempted': attempted,
+        'succeeded': sum(outcomes),
+        'seconds': elapsed,
+        'transfers_per_second': attempted / elapsed,
+        'expected_total': expected,
+        'in_memory_total': in_memory,
+        'on_disk_total': on_disk,
+        'negative_accounts': negative,
+        'conserved': expected == in_memory == on_disk and not negative
+    }
+    emit("concurrency", results, args.output)
+    if not results['conserved']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
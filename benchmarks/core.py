@@ -0,0 +1,173 @@
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from bank import Bank
+from benchmarks.common import emit, latency_summary
+from benchmarks.compare import compare
+from benchmarks.generate import PASSWORD, generate, parse_count
+
+# Run from the repository root: python -m benchmarks.core [--customers 10k] [--csv bank.csv]
+#     [--output run.json] [--baseline previous.json --tolerance 0.25]
+# Generates a synthetic bank unless --csv is given; exits non-zero on a regression against --baseline.
+
+
+def open_bank(csv_file: str, history: bool) -> Bank:
+    # Compaction is left to the explicit save stage so it does not land inside a timed workload.
+    return Bank(csv_file, keep_history=history, compact_every=10 ** 9)
+
+
+def measure_load(csv_file: str, history: bool) -> tuple:
+    gc.collect()
+    started = time.perf_counter()
+    bank = open_bank(csv_file, history)
+    elapsed = time.perf_counter() - started
+    return bank, {'seconds': elapsed, 'customers_per_second': len(bank.customers) / elapsed}
+
+
+def measure_load_memory(csv_file: str) -> int:
+    gc.collect()
+    tracemalloc.start()
+    bank = open_bank(csv_file, False)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    bank.close()
+    del bank
+    gc.collect()
+    return current
+
+
+def measure_save(bank: Bank) -> dict:
+    started = time.perf_counter()
+    bank.save_customers()
+    elapsed = time.perf_counter() - started
+    return {'seconds': elapsed, 'file_bytes': os.path.getsize(bank.csv_file)}
+
+
+def measure_auth(bank: Bank, ids: list, logins: int) -> dict:
+    uncached = []
+    for cust_id in ids:
+        started = time.perf_counter()
+        assert bank.auth_customer(cust_id, PASSWORD)
+        uncached.append(time.perf_counter() - started)
+
+    cached = []
+    for index in range(logins):
+        started = time.perf_counter()
+        assert bank.auth_customer(ids[index % len(ids)], PASSWORD)
+        cached.append(time.perf_counter() - started)
+    return {'uncached': latency_summary(uncached), 'cached': latency_summary(cached)}
+
+
+def run_threads(threads: int, target, *args) -> tuple:
+    samples = [[] for _ in range(threads)]
+    workers = [threading.Thread(target=target, args=args + (index, samples[index])) for index in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    merged = [sample for thread_samples in samples for sample in thread_samples]
+    return dict(latency_summary(merged), seconds=elapsed, ops_per_second=len(merged) / elapsed)
+
+
+def transfer_worker(bank: Bank, ids: list, operations: int, seed: int, samples: list):
+    rng = random.Random(seed)
+    for _ in range(operations):
+        sender, receiver = rng.sample(ids, 2)
+        started = time.perf_counter()
+        bank.transfer_between_customers(sender, receiver, "CHECKING", "CHECKING", rng.randint(1, 10_00))
+        samples.append(time.perf_counter() - started)
+
+
+def customer_worker(bank: Bank, ids: list, operations: int, seed: int, samples: list):
+    rng = random.Random(seed)
+    for index in range(operations):
+        customer = bank.customers[rng.choice(ids)]
+        started = time.perf_counter()
+        if index % 2:
+            customer.withdraw_from_checking(1_00)
+        else:
+            customer.deposit_to_checking(1_00)
+        samples.append(time.perf_counter() - started)
+
+
+def measure_postings(bank: Bank, ids: list, worker, operations: int, threads: int) -> dict:
+    return {
+        'single': run_threads(1, worker, bank, ids, operations),
+        'concurrent': run_threads(threads, worker, bank, ids, max(1, operations // threads))
+    }
+
+
+def run(csv_file: str, args) -> dict:
+    results = {'threads': args.threads}
+    if not args.skip_memory:
+        results['load_memory'] = {'traced_bytes': measure_load_memory(csv_file)}
+
+    bank, results['load'] = measure_load(csv_file, args.history)
+    try:
+        results['customers'] = len(bank.customers)
+        ids = [cust_id for cust_id, customer in bank.customers.items()
+               if customer.active and customer.has_checking]
+        rng = random.Random(args.seed)
+        sample = rng.sample(ids, min(len(ids), args.auth_customers))
+
+        results['auth'] = measure_auth(bank, sample, args.logins)
+        results['transfer_between_customers'] = measure_postings(bank, ids, transfer_worker, args.transfers,
+                                                                 args.threads)
+        results['customer_deposit_withdraw'] = measure_postings(bank, ids, customer_worker, args.customer_ops,
+                                                                args.threads)
+        results['save'] = measure_save(bank)
+    finally:
+        bank.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Core Bank/Customer benchmark suite")
+    parser.add_argument("--customers", type=parse_count, default=parse_count("10k"), help="e.g. 10k, 1M, 10M")
+    parser.add_argument("--csv", help="benchmark a copy of an existing bank.csv instead of generating one")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--transfers", type=int, default=2000)
+    parser.add_argument("--customer-ops", type=int, default=200_000)
+    parser.add_argument("--auth-customers", type=int, default=10, help="first logins, each a full hash")
+    parser.add_argument("--logins", type=int, default=20_000, help="repeat logins served from the cache")
+    parser.add_argument("--history", action="store_true", help="record transactions in the history database")
+    parser.add_argument("--skip-memory", action="store_true", help="skip the traced load, which is slow")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, "bank.csv")
+        if args.csv:
+            shutil.copyfile(args.csv, csv_file)
+        else:
+            started = time.perf_counter()
+            generate(csv_file, args.customers, args.seed)
+            print(f"Generated {args.customers} customers in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        results = run(csv_file, args)
+
+    emit("core", results, args.output)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(json.load(file), {'results': results}, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['metric']}: {regression['baseline']:.6g} -> "
+                  f"{regression['current']:.6g} ({regression['worse_by']:+.0%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
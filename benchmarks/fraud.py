@@ -0,0 +1,87 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from bank import Bank
+from benchmarks.common import emit, latency_summary
+from fraud import RuleEngine, default_rules
+from index import FIRST_CUSTOMER_ID
+
+# Run from the repository root: python -m benchmarks.fraud [--customers 100000 --events 200000]
+# Exits non-zero if screening a posting costs more than --budget-us at p99.
+
+
+def screen_events(engine: RuleEngine, ids: list, events: int, seed: int) -> list:
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(events):
+        cust_id = rng.choice(ids)
+        choice = rng.random()
+        if choice < 0.4:
+            op, counterparty = 'withdraw', None
+        elif choice < 0.7:
+            op, counterparty = 'deposit', None
+        else:
+            op, counterparty = 'transfer', rng.choice(ids)
+        amount = rng.randint(1_00, 99_00)
+
+        started = time.perf_counter()
+        if engine.check(op, cust_id, amount, counterparty) is None:
+            engine.record(op, cust_id, amount, counterparty)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def posting_latency(rules: bool, postings: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        bank = Bank(os.path.join(directory, "bank.csv"), keep_history=False, compact_every=10 ** 9,
+                    rules=RuleEngine(default_rules()) if rules else None)
+        ids = [str(FIRST_CUSTOMER_ID + index) for index in range(100)]
+        for cust_id in ids:
+            bank.customers[cust_id] = bank.build_customer({'id': cust_id, 'first_name': "Rule", 'last_name': cust_id,
+                                                           'password': "secret", 'has_checking': 'True'})
+        samples = []
+        # Inside one batch nothing is written until the end, so the samples isolate the in-memory path.
+        with bank.batch():
+            for _ in range(postings):
+                cust_id = rng.choice(ids)
+                started = time.perf_counter()
+                bank.deposit(cust_id, "CHECKING", 1_00)
+                samples.append(time.perf_counter() - started)
+        bank.close()
+    return latency_summary(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Velocity rule engine overhead per posting")
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--postings", type=int, default=20_000)
+    parser.add_argument("--budget-us", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    engine = RuleEngine(default_rules())
+    ids = [str(FIRST_CUSTOMER_ID + index) for index in range(args.customers)]
+    screening = latency_summary(screen_events(engine, ids, args.events, args.seed))
+    without_rules = posting_latency(False, args.postings, args.seed)
+    with_rules = posting_latency(True, args.postings, args.seed)
+
+    emit("fraud", {
+        'screening': screening,
+        'declined': dict(engine.declined),
+        'deposit_without_rules': without_rules,
+        'deposit_with_rules': with_rules,
+        'added_p99_us': with_rules['p99_us'] - without_rules['p99_us'],
+        'budget_us': args.budget_us
+    }, args.output)
+    if screening['p99_us'] > args.budget_us:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import random
+import time
+from index import FIRST_CUSTOMER_ID
+from money import format_money
+from security import hash_password
+from storage import write_csv_atomic
+
+# Run from the repository root: python -m benchmarks.generate --customers 1M [--output bank.csv]
+# Every generated customer has the password "secret".
+
+PASSWORD = "secret"
+SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+
+def parse_count(text: str) -> int:
+    text = text.strip().lower().replace('_', '')
+    if text and text[-1] in SUFFIXES:
+        return int(float(text[:-1]) * SUFFIXES[text[-1]])
+    return int(text)
+
+
+def synthetic_rows(customers: int, seed: int = 1, password_hash: str = None):
+    # One hash is shared by every row: hashing millions of passwords would dominate generation.
+    rng = random.Random(seed)
+    password_hash = password_hash or hash_password(PASSWORD)
+    for index in range(customers):
+        has_checking = rng.random() < 0.9
+        has_savings = rng.random() < 0.6
+        yield {
+            'id': str(FIRST_CUSTOMER_ID + index),
+            'first_name': f"First{rng.randrange(5000)}",
+            'last_name': f"Last{rng.randrange(20000)}",
+            'password': password_hash,
+            'has_checking': str(has_checking),
+            'has_savings': str(has_savings),
+            'active': str(rng.random() < 0.98),
+            'checking_balance': format_money(rng.randint(0, 5_000_00) if has_checking else 0),
+            'savings_balance': format_money(rng.randint(0, 50_000_00) if has_savings else 0),
+            'overdraft_count': '0'
+        }
+
+
+def generate(path: str, customers: int, seed: int = 1) -> int:
+    return write_csv_atomic(path, synthetic_rows(customers, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic bank.csv")
+    parser.add_argument("--customers", type=parse_count, default=parse_count("10k"), help="e.g. 10k, 1M, 10M")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="synthetic_bank.csv")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    size = generate(args.output, args.customers, args.seed)
+    print(f"Wrote {args.customers} customers ({size} bytes) to {args.output} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import os
+import tempfile
+import time
+from bank import Bank
+from benchmarks.common import emit, latency_summary
+from index import FIRST_CUSTOMER_ID
+
+# Run from the repository root: python -m benchmarks.idempotency [--postings 100000]
+# Deposit latency without a key, with a fresh key per posting and when replaying known keys,
+# on the in-memory path (inside one batch) so the dedup work is not hidden behind fsyncs.
+
+
+def deposit_latency(bank: Bank, ids: list, postings: int, keys=None) -> dict:
+    samples = []
+    with bank.batch():
+        for index in range(postings):
+            key = keys(index) if keys else None
+            started = time.perf_counter()
+            bank.deposit(ids[index % len(ids)], "CHECKING", 1_00, idempotency_key=key)
+            samples.append(time.perf_counter() - started)
+    return latency_summary(samples)
+
+
+def unbatched_latency(bank: Bank, ids: list, postings: int, keys=None) -> dict:
+    # Outside a batch every keyed posting is followed by its own append and fsync of the dedup file.
+    samples = []
+    for index in range(postings):
+        key = keys(index) if keys else None
+        started = time.perf_counter()
+        bank.deposit(ids[index % len(ids)], "CHECKING", 1_00, idempotency_key=key)
+        samples.append(time.perf_counter() - started)
+    return latency_summary(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead of idempotency keys on the posting path")
+    parser.add_argument("--postings", type=int, default=100_000)
+    parser.add_argument("--unbatched", type=int, default=500, help="keyed postings timed outside a batch")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, "bank.csv")
+        bank = Bank(csv_file, keep_history=False, compact_every=10 ** 9)
+        bank.dedup.capacity = args.postings
+        ids = [str(FIRST_CUSTOMER_ID + index) for index in range(100)]
+        for cust_id in ids:
+            bank.customers[cust_id] = bank.build_customer({'id': cust_id, 'first_name': "Dedup", 'last_name': cust_id,
+                                                           'password': "secret", 'has_checking': 'True'})
+
+        deposit_latency(bank, ids, args.postings // 10)
+        plain = deposit_latency(bank, ids, args.postings)
+        first = deposit_latency(bank, ids, args.postings, lambda index: f"key-{index}")
+        replayed = deposit_latency(bank, ids, args.postings, lambda index: f"key-{index}")
+        unbatched_plain = unbatched_latency(bank, ids, args.unbatched)
+        unbatched_keyed = unbatched_latency(bank, ids, args.unbatched, lambda index: f"unbatched-{index}")
+        remembered = len(bank.dedup)
+        bank.close()
+
+        started = time.perf_counter()
+        reloaded = Bank(csv_file, keep_history=False, compact_every=10 ** 9)
+        reload_seconds = time.perf_counter() - started
+        reloaded.close()
+
+    emit("idempotency", {
+        'plain': plain,
+        'first_attempt': first,
+        'replay': replayed,
+        'added_p50_us': first['p50_us'] - plain['p50_us'],
+        'added_p99_us': first['p99_us'] - plain['p99_us'],
+        'unbatched_plain': unbatched_plain,
+        'unbatched_keyed': unbatched_keyed,
+        'remembered_keys': remembered,
+        'reload_seconds': reload_seconds
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import os
+import tempfile
+import time
+import metrics
+from bank import Bank
+from benchmarks.common import emit, latency_summary
+from index import FIRST_CUSTOMER_ID
+
+# Run from the repository root: python -m benchmarks.instrumentation [--postings 100000]
+# Deposit latency with metrics switched off and on, on the in-memory path (inside one batch).
+
+
+def deposit_latency(bank: Bank, ids: list, postings: int) -> dict:
+    samples = []
+    with bank.batch():
+        for index in range(postings):
+            started = time.perf_counter()
+            bank.deposit(ids[index % len(ids)], "CHECKING", 1_00)
+            samples.append(time.perf_counter() - started)
+    return latency_summary(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead of the metrics layer on the posting path")
+    parser.add_argument("--postings", type=int, default=100_000)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        bank = Bank(os.path.join(directory, "bank.csv"), keep_history=False, compact_every=10 ** 9)
+        ids = [str(FIRST_CUSTOMER_ID + index) for index in range(100)]
+        for cust_id in ids:
+            bank.customers[cust_id] = bank.build_customer({'id': cust_id, 'first_name': "Metric", 'last_name': cust_id,
+                                                           'password': "secret", 'has_checking': 'True'})
+
+        deposit_latency(bank, ids, args.postings // 10)
+        metrics.disable()
+        disabled = deposit_latency(bank, ids, args.postings)
+        metrics.enable()
+        enabled = deposit_latency(bank, ids, args.postings)
+        metrics.disable()
+        bank.close()
+
+    recorded = metrics.REGISTRY.histogram('bank_operation_seconds', op='deposit').summary()
+    emit("instrumentation", {
+        'disabled': disabled,
+        'enabled': enabled,
+        'added_p50_us': enabled['p50_us'] - disabled['p50_us'],
+        'added_p99_us': enabled['p99_us'] - disabled['p99_us'],
+        'histogram_p99_us': recorded['p99_seconds'] * 1e6
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
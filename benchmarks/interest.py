@@ -0,0 +1,79 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from bank import Bank
+from benchmarks.common import emit
+from index import FIRST_CUSTOMER_ID
+from interest import RateSchedule, assess, load_balances, run_end_of_day, DAYS_PER_YEAR
+from money import format_money
+from storage import write_csv_atomic
+
+# Run from the repository root: python -m benchmarks.interest [--accounts 1000000]
+# Times the end-of-day job and compares the vectorized assessment with a per-customer loop.
+
+
+def generate_rows(accounts: int, seed: int):
+    rng = random.Random(seed)
+    for index in range(accounts):
+        yield {
+            'id': str(FIRST_CUSTOMER_ID + index), 'first_name': f"First{index}", 'last_name': "Interest",
+            'password': "secret", 'has_checking': str(rng.random() < 0.9), 'has_savings': str(rng.random() < 0.6),
+            'active': str(rng.random() < 0.97), 'checking_balance': format_money(rng.randint(-100_00, 2_000_00)),
+            'savings_balance': format_money(rng.randint(-50_00, 20_000_00)), 'overdraft_count': '0'
+        }
+
+
+def assess_loop(bank: Bank, schedule: RateSchedule, days: int, month_end: bool) -> int:
+    postings = 0
+    for customer in bank.customers.values():
+        interest = 0
+        if customer.has_savings and customer.active and customer.savings_balance > 0:
+            interest = customer.savings_balance * (schedule.savings_rate_bp * days) // (10000 * DAYS_PER_YEAR)
+            postings += interest > 0
+        maintenance = 0
+        if month_end and customer.has_checking and customer.active and customer.checking_balance < schedule.minimum_balance:
+            maintenance = schedule.maintenance_fee
+            postings += 1
+        if customer.has_checking and customer.checking_balance - maintenance < 0:
+            postings += 1
+        if customer.has_savings and customer.savings_balance + interest < 0:
+            postings += 1
+    return postings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-of-day interest and fee job timings")
+    parser.add_argument("--accounts", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    schedule = RateSchedule()
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, "bank.csv")
+        write_csv_atomic(csv_file, generate_rows(args.accounts, args.seed))
+        bank = Bank(csv_file, keep_history=False)
+
+        started = time.perf_counter()
+        loop_postings = assess_loop(bank, schedule, args.days, True)
+        loop_seconds = time.perf_counter() - started
+
+        balances = load_balances(bank)
+        started = time.perf_counter()
+        assessments = assess(balances, schedule, args.days, True)
+        vector_seconds = time.perf_counter() - started
+        vector_postings = sum(int((values != 0).sum()) for values in assessments.values())
+
+        report = run_end_of_day(bank, schedule, args.days, True)
+        bank.close()
+
+    emit("interest", dict(report, loop_assess_seconds=loop_seconds, vector_assess_seconds=vector_seconds,
+                          assess_speedup=loop_seconds / vector_seconds,
+                          postings_match=loop_postings == vector_postings == report['postings']), args.output)
+
+
+if __name__ == "__main__":
+    main()
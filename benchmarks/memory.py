@@ -0,0 +1,113 @@
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime
+from benchmarks.common import emit
+from customer import Customer
+from transaction import Transaction
+
+# Run from the repository root: python -m benchmarks.memory [--scale 0.01]
+
+
+class LegacyTransaction:
+    def __init__(self, transaction_type, account_type, amount, balance_after, description=""):
+        self.timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.type = transaction_type
+        self.account = account_type
+        self.amount = amount
+        self.balance_after = balance_after
+        self.description = description
+
+    def to_dict(self):
+        return {
+            'timestamp': self.timestamp,
+            'type': self.type,
+            'account': self.account,
+            'amount': self.amount,
+            'balance_after': self.balance_after,
+            'description': self.description
+        }
+
+
+class LegacyCustomer:
+    def __init__(self, cust_id, first_name, last_name, password):
+        self.cust_id = cust_id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.password = password
+        self.has_checking = False
+        self.has_savings = False
+        self.active = True
+        self.checking_balance = 0.0
+        self.savings_balance = 0.0
+        self.overdraft_count = 0
+        self.transaction_log = []
+
+
+def build_legacy(customers: int, transactions: int) -> list:
+    result = []
+    per_customer, extra = divmod(transactions, customers)
+    for index in range(customers):
+        customer = LegacyCustomer(str(10001 + index), f"First{index}", f"Last{index}", "secret")
+        customer.has_checking = True
+        for n in range(per_customer + (1 if index < extra else 0)):
+            customer.checking_balance += 1.0
+            customer.transaction_log.append(
+                LegacyTransaction("DEPOSIT", "CHECKING", 1.0, customer.checking_balance).to_dict())
+        result.append(customer)
+    return result
+
+
+def build_compact(customers: int, transactions: int) -> list:
+    result = []
+    per_customer, extra = divmod(transactions, customers)
+    created = int(time.time())
+    for index in range(customers):
+        customer = Customer(str(10001 + index), f"First{index}", f"Last{index}", "secret")
+        customer.has_checking = True
+        for n in range(per_customer + (1 if index < extra else 0)):
+            customer.checking_balance += 100
+            customer.transaction_log.append(
+                Transaction("DEPOSIT", "CHECKING", 100, customer.checking_balance, created=created))
+        result.append(customer)
+    return result
+
+
+def measure(builder, customers: int, transactions: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    data = builder(customers, transactions)
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    gc.collect()
+    return {'bytes': current, 'peak_bytes': peak, 'build_seconds': elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Customer/Transaction memory layouts")
+    parser.add_argument("--customers", type=int, default=1_000_000)
+    parser.add_argument("--transactions", type=int, default=10_000_000)
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="measure this fraction of the workload and extrapolate linearly")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    customers = max(1, int(args.customers * args.scale))
+    transactions = int(args.transactions * args.scale)
+    results = {'customers': args.customers, 'transactions': args.transactions, 'scale': args.scale}
+
+    for name, builder in (('legacy', build_legacy), ('compact', build_compact)):
+        measured = measure(builder, customers, transactions)
+        measured['projected_bytes'] = int(measured['bytes'] / args.scale)
+        results[name] = measured
+
+    results['reduction'] = 1 - results['compact']['bytes'] / results['legacy']['bytes']
+    emit("memory", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import random
+import time
+from decimal import Decimal
+from benchmarks.common import emit
+from money import format_money, parse_money
+
+# Run from the repository root: python -m benchmarks.money [--postings 1000000]
+
+
+def post_float(amounts: list) -> float:
+    balance = 0.0
+    for amount in amounts:
+        if amount > 0:
+            balance += amount
+        elif balance + amount >= -100:
+            balance += amount
+            if balance < 0:
+                balance -= 35
+    return balance
+
+
+def post_decimal(amounts: list) -> Decimal:
+    floor = Decimal("-100")
+    fee = Decimal("35")
+    zero = Decimal("0")
+    balance = Decimal("0")
+    for amount in amounts:
+        if amount > zero:
+            balance += amount
+        elif balance + amount >= floor:
+            balance += amount
+            if balance < zero:
+                balance -= fee
+    return balance
+
+
+def post_cents(amounts: list) -> int:
+    balance = 0
+    for amount in amounts:
+        if amount > 0:
+            balance += amount
+        elif balance + amount >= -100_00:
+            balance += amount
+            if balance < 0:
+                balance -= 35_00
+    return balance
+
+
+def run(function, amounts: list, repeat: int) -> tuple:
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(amounts)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare float, Decimal and int-cents on the posting hot path")
+    parser.add_argument("--postings", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = [f"{'-' if rng.random() < 0.5 else ''}{rng.randint(0, 99)}.{rng.randint(0, 99):02d}"
+             for _ in range(args.postings)]
+
+    variants = {
+        'float': (post_float, [float(text) for text in texts]),
+        'decimal': (post_decimal, [Decimal(text) for text in texts]),
+        'int_cents': (post_cents, [parse_money(text) for text in texts])
+    }
+
+    results = {'postings': args.postings}
+    for name, (function, amounts) in variants.items():
+        balance, elapsed = run(function, amounts, args.repeat)
+        results[name] = {
+            'seconds': elapsed,
+            'postings_per_second': args.postings / elapsed,
+            'final_balance': str(balance)
+        }
+
+    exact = format_money(post_cents(variants['int_cents'][1]))
+    results['exact_final_balance'] = exact
+    results['float_drift'] = str(abs(Decimal(repr(post_float(variants['float'][1]))) - Decimal(exact)))
+    results['int_cents_speedup_vs_decimal'] = results['decimal']['seconds'] / results['int_cents']['seconds']
+    emit("money", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
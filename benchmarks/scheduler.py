@@ -0,0 +1,96 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from bank import Bank
+from benchmarks.common import emit, latency_summary
+from benchmarks.generate import generate, parse_count
+from scheduler import Scheduler
+
+# Run from the repository root: python -m benchmarks.scheduler [--schedules 1M --customers 100k]
+# Spreads standing orders over a month, then times idle ticks and a payroll tick that posts a burst at once.
+
+MONTH = 30 * 86400
+
+
+def seed_schedules(scheduler: Scheduler, customers: int, count: int, start: int, seed: int):
+    rng = random.Random(seed)
+    batch = []
+    for _ in range(count):
+        cust_id = str(10001 + rng.randrange(customers))
+        to_cust_id = str(10001 + rng.randrange(customers))
+        next_run = start + rng.randrange(MONTH)
+        batch.append((cust_id, "CHECKING", to_cust_id, "CHECKING", rng.randint(1_00, 50_00), 'monthly',
+                      next_run, next_run))
+        if len(batch) >= 50_000:
+            insert(scheduler, batch)
+    insert(scheduler, batch)
+
+
+def insert(scheduler: Scheduler, batch: list):
+    scheduler.conn.executemany(
+        "INSERT INTO schedules (cust_id, from_account, to_cust_id, to_account, amount, every, anchor, next_run) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+    scheduler.conn.commit()
+    batch.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Timer-heap scheduler ticks over many standing orders")
+    parser.add_argument("--customers", type=parse_count, default=parse_count("100k"))
+    parser.add_argument("--schedules", type=parse_count, default=parse_count("1M"))
+    parser.add_argument("--payroll", type=int, default=10_000, help="transfers due in the burst tick")
+    parser.add_argument("--ticks", type=int, default=500, help="minute ticks to time")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    start = int(time.time()) + 86400
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, "bank.csv")
+        generate(csv_file, args.customers, args.seed)
+        bank = Bank(csv_file, keep_history=False, compact_every=10 ** 9)
+        scheduler = Scheduler(os.path.join(directory, "bank_schedules.db"))
+
+        started = time.perf_counter()
+        seed_schedules(scheduler, args.customers, args.schedules, start, args.seed)
+        seed_seconds = time.perf_counter() - started
+
+        samples = []
+        due = posted = 0
+        for minute in range(args.ticks):
+            started = time.perf_counter()
+            report = scheduler.tick(bank, start + minute * 60)
+            samples.append(time.perf_counter() - started)
+            due += report['due']
+            posted += report['posted']
+        heap_size = len(scheduler.heap)
+
+        payday = start + args.ticks * 60
+        rng = random.Random(args.seed)
+        for _ in range(args.payroll):
+            scheduler.add(str(10001 + rng.randrange(args.customers)), "CHECKING", 1_00, payday,
+                          to_cust_id=str(10001 + rng.randrange(args.customers)))
+        payroll = scheduler.tick(bank, payday)
+
+        scheduler.close()
+        bank.close()
+
+    emit("scheduler", {
+        'customers': args.customers,
+        'schedules': args.schedules,
+        'seed_seconds': seed_seconds,
+        'tick': latency_summary(samples),
+        'due_in_ticks': due,
+        'posted_in_ticks': posted,
+        'heap_entries': heap_size,
+        'payroll_due': payroll['due'],
+        'payroll_posted': payroll['posted'],
+        'payroll_seconds': payroll['seconds'],
+        'payroll_transfers_per_second': payroll['due'] / payroll['seconds'] if payroll['seconds'] else 0.0
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
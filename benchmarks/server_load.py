@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from bank import Bank
+from benchmarks.common import emit, latency_summary
+from server import BankServer
+
+# Run from the repository root: python -m benchmarks.server_load [--sessions 1000 --requests 20]
+# Without --connect an in-process server on a temporary bank is started.
+
+
+async def request(reader, writer, payload: dict, samples: list) -> dict:
+    started = time.perf_counter()
+    writer.write(json.dumps(payload).encode('utf-8') + b"\n")
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    samples.append(time.perf_counter() - started)
+    return response
+
+
+async def session(host: str, port: int, cust_id: str, password: str, receivers: list,
+                  requests: int, seed: int, samples: list, login_samples: list, failures: list):
+    rng = random.Random(seed)
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError as error:
+        failures.append(str(error))
+        return
+
+    try:
+        # Logins spend most of their time in password hashing, so they are timed apart from the operations.
+        login = await request(reader, writer, {'op': 'login', 'cust_id': cust_id, 'password': password},
+                              login_samples)
+        if not login['ok']:
+            failures.append(login['message'])
+            return
+        for index in range(requests):
+            choice = rng.random()
+            if choice < 0.4:
+                payload = {'op': 'balance'}
+            elif choice < 0.7:
+                payload = {'op': 'deposit', 'account': 'CHECKING', 'amount': '1.00'}
+            elif choice < 0.85:
+                payload = {'op': 'withdraw', 'account': 'CHECKING', 'amount': '1.00'}
+            else:
+                payload = {'op': 'transfer', 'account': 'CHECKING', 'to_cust_id': rng.choice(receivers),
+                           'to_account': 'CHECKING', 'amount': '0.50'}
+            payload['id'] = index
+            await request(reader, writer, payload, samples)
+    finally:
+        writer.close()
+
+
+async def run(args) -> dict:
+    server = bank = listener = None
+    directory = None
+    if args.connect:
+        host, port = args.connect.rsplit(':', 1)
+        port = int(port)
+        credentials = [line.split(':', 1) for line in open(args.credentials).read().split()]
+    else:
+        directory = tempfile.TemporaryDirectory()
+        bank = Bank(os.path.join(directory.name, "bank.csv"), keep_history=False)
+        credentials = []
+        for index in range(args.customers):
+            cust_id = bank.add_customer(f"Load{index}", "Client", f"pw{index}", True, True)
+            bank.deposit(cust_id, "CHECKING", 1_000_00)
+            credentials.append((cust_id, f"pw{index}"))
+        server = BankServer(bank)
+        listener = await server.start("127.0.0.1", 0)
+        host, port = listener.sockets[0].getsockname()[:2]
+
+    receivers = [cust_id for cust_id, _ in credentials]
+    samples = []
+    login_samples = []
+    failures = []
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        session(host, port, *credentials[index % len(credentials)], receivers, args.requests, index, samples,
+                login_samples, failures)
+        for index in range(args.sessions)
+    ])
+    elapsed = time.perf_counter() - started
+
+    if listener:
+        listener.close()
+        await listener.wait_closed()
+        await server.stop()
+        bank.close()
+        directory.cleanup()
+
+    return dict(latency_summary(samples), sessions=args.sessions, seconds=elapsed,
+                ops_per_second=len(samples) / elapsed, login=latency_summary(login_samples), failures=len(failures))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for server.py")
+    parser.add_argument("--connect", help="host:port of a running server")
+    parser.add_argument("--credentials", help="file of cust_id:password lines, required with --connect")
+    parser.add_argument("--customers", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20, help="requests per session after login")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    emit("server_load", asyncio.run(run(args)), args.output)
+
+
+if __name__ == "__main__":
+    main()
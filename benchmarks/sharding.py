@@ -0,0 +1,106 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from benchmarks.common import emit
+from index import FIRST_CUSTOMER_ID
+from sharding import ShardedBank, shard_for
+from storage import write_csv_atomic
+
+# Run from the repository root: python -m benchmarks.sharding [--shards 1 2 4 --threads 16]
+# Throughput of a deposit/transfer mix per shard count; exits non-zero if money is not conserved.
+
+
+def seed_shards(base: str, shards: int, customers: int, opening_balance: str) -> list:
+    ids = [str(FIRST_CUSTOMER_ID + index) for index in range(customers)]
+    rows = [[] for _ in range(shards)]
+    for cust_id in ids:
+        rows[shard_for(cust_id, shards)].append({
+            'id': cust_id, 'first_name': f"First{cust_id}", 'last_name': "Sharded", 'password': "secret",
+            'has_checking': 'True', 'has_savings': 'True', 'active': 'True',
+            'checking_balance': opening_balance, 'savings_balance': opening_balance, 'overdraft_count': '0'
+        })
+    for index in range(shards):
+        write_csv_atomic(f"{base}.shard{index}.csv", rows[index])
+    return ids
+
+
+def total_money(bank: ShardedBank, ids: list) -> int:
+    total = 0
+    for cust_id in ids:
+        row = bank.get_customer(cust_id)
+        total += row['checking_balance'] + row['savings_balance']
+    return total
+
+
+def worker(bank: ShardedBank, ids: list, operations: int, transfer_ratio: float, seed: int, results: list):
+    rng = random.Random(seed)
+    succeeded = deposited = 0
+    for _ in range(operations):
+        if rng.random() < transfer_ratio:
+            sender, receiver = rng.sample(ids, 2)
+            success, _ = bank.transfer_between_customers(sender, receiver, "CHECKING", "CHECKING", rng.randint(1, 500))
+        else:
+            success, _ = bank.deposit(rng.choice(ids), "SAVINGS", 1)
+            deposited += success
+        succeeded += success
+    results.append((succeeded, deposited))
+
+
+def run(shards: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        base = os.path.join(directory, "bank")
+        ids = seed_shards(base, shards, args.customers, "1000.00")
+        bank = ShardedBank(base, shards, keep_history=False)
+        try:
+            opening = total_money(bank, ids)
+            results = []
+            threads = [threading.Thread(target=worker, args=(bank, ids, args.operations, args.transfer_ratio,
+                                                             args.seed + index, results))
+                       for index in range(args.threads)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            closing = total_money(bank, ids)
+        finally:
+            bank.close()
+
+    operations = args.threads * args.operations
+    deposited = sum(deposited for _, deposited in results)
+    return {
+        'shards': shards,
+        'seconds': elapsed,
+        'ops_per_second': operations / elapsed,
+        'succeeded': sum(succeeded for succeeded, _ in results),
+        'conserved': closing == opening + deposited
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded bank throughput by shard count")
+    parser.add_argument("--shards", type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--operations", type=int, default=200, help="operations per thread")
+    parser.add_argument("--transfer-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    runs = [run(shards, args) for shards in args.shards]
+    baseline = runs[0]['ops_per_second']
+    for result in runs:
+        result['speedup'] = result['ops_per_second'] / baseline
+    emit("sharding", {'cpus': os.cpu_count(), 'runs': runs}, args.output)
+    if not all(result['conserved'] for result in runs):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
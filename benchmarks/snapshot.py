@@ -0,0 +1,97 @@
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+from bank import Bank
+from benchmarks.common import emit
+from benchmarks.generate import parse_count, synthetic_rows
+from snapshot import CODECS, Snapshot, SnapshotStorage, differences, read_snapshot, write_snapshot, zstandard
+from storage import CSVStorage, to_cents, to_flag, write_csv_atomic
+
+# Run from the repository root: python -m benchmarks.snapshot [--customers 1M] [--bank-startup]
+# Load time and file size of bank.csv against the binary columnar snapshot, per codec.
+
+
+def distinct_passwords(rows, seed: int):
+    # The generator shares one hash across rows, which would flatter every codec; real hashes are all distinct.
+    rng = random.Random(seed)
+    for row in rows:
+        row['password'] = f"pbkdf2_sha256$200000${rng.getrandbits(128):032x}${rng.getrandbits(256):064x}"
+        yield row
+
+
+def load_csv(csv_file: str) -> float:
+    # The same per-field work Bank.build_customer does, without building Customer objects.
+    gc.collect()
+    started = time.perf_counter()
+    for row in CSVStorage(csv_file).rows():
+        to_flag(row['has_checking'])
+        to_flag(row['has_savings'])
+        to_flag(row['active'])
+        to_cents(row['checking_balance'])
+        to_cents(row['savings_balance'])
+        int(row['overdraft_count'])
+    return time.perf_counter() - started
+
+
+def load_snapshot(snapshot_file: str) -> float:
+    gc.collect()
+    started = time.perf_counter()
+    read_snapshot(snapshot_file)
+    return time.perf_counter() - started
+
+
+def bank_startup(storage, csv_file: str) -> float:
+    gc.collect()
+    started = time.perf_counter()
+    bank = Bank(csv_file, keep_history=False, storage=storage)
+    elapsed = time.perf_counter() - started
+    bank.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV versus binary snapshot load time and size")
+    parser.add_argument("--customers", type=parse_count, default=parse_count("200k"))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--bank-startup", action="store_true", help="also time a full Bank start on each format")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    codecs = [codec for codec in CODECS if codec != 'zstd' or zstandard is not None]
+    results = {'customers': args.customers}
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, "bank.csv")
+        write_csv_atomic(csv_file, distinct_passwords(synthetic_rows(args.customers, args.seed), args.seed))
+        results['csv'] = {'bytes': os.path.getsize(csv_file), 'load_seconds': load_csv(csv_file)}
+
+        snapshot = Snapshot.from_rows(CSVStorage(csv_file).rows())
+        for codec in codecs:
+            snapshot_file = os.path.join(directory, f"bank.{codec}.snap")
+            started = time.perf_counter()
+            size = write_snapshot(snapshot_file, snapshot, codec)
+            write_seconds = time.perf_counter() - started
+            load_seconds = load_snapshot(snapshot_file)
+            results[codec] = {
+                'bytes': size,
+                'size_ratio': size / results['csv']['bytes'],
+                'write_seconds': write_seconds,
+                'load_seconds': load_seconds,
+                'load_speedup': results['csv']['load_seconds'] / load_seconds,
+                'lossless': not differences(csv_file, snapshot_file)
+            }
+
+        if args.bank_startup:
+            snapshot_file = os.path.join(directory, f"bank.{codecs[-1]}.snap")
+            results['bank_startup'] = {
+                'csv_seconds': bank_startup(CSVStorage(csv_file), csv_file),
+                'snapshot_seconds': bank_startup(SnapshotStorage(snapshot_file), snapshot_file)
+            }
+
+    emit("snapshot", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import os
+import random
+import tempfile
+from benchmarks.common import emit
+from benchmarks.generate import generate, parse_count
+from history import TransactionStore
+from money import parse_money
+from statements import generate_statements
+from storage import CSVStorage
+
+# Run from the repository root: python -m benchmarks.statements [--customers 100k --workers 1 4]
+# Builds a synthetic bank and one month of history, then times the statement pipeline.
+
+MONTH = "2026-09"
+
+
+def seed_history(bank_file: str, history_file: str, per_account: int, seed: int) -> int:
+    rng = random.Random(seed)
+    store = TransactionStore(history_file)
+    batch = []
+    inserted = 0
+    for row in CSVStorage(bank_file).rows():
+        for account, flag, field in (('CHECKING', 'has_checking', 'checking_balance'),
+                                     ('SAVINGS', 'has_savings', 'savings_balance')):
+            if row[flag] != 'True':
+                continue
+            balance = parse_money(row[field])
+            for day in sorted(rng.randint(1, 30) for _ in range(per_account)):
+                amount = rng.randint(1_00, 200_00)
+                kind = 'DEPOSIT' if rng.random() < 0.6 else 'WITHDRAWAL'
+                balance += amount if kind == 'DEPOSIT' else -amount
+                batch.append((row['id'], f"{MONTH}-{day:02d} 12:00:00", kind, account, amount, balance, ""))
+        if len(batch) >= 50_000:
+            inserted += flush(store, batch)
+    inserted += flush(store, batch)
+    store.close()
+    return inserted
+
+
+def flush(store: TransactionStore, batch: list) -> int:
+    count = len(batch)
+    store.conn.executemany(
+        "INSERT INTO transactions (cust_id, timestamp, type, account, amount, balance_after, description) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+    store.conn.commit()
+    batch.clear()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monthly statement pipeline throughput")
+    parser.add_argument("--customers", type=parse_count, default=parse_count("100k"))
+    parser.add_argument("--per-account", type=int, default=5, help="transactions per account in the month")
+    parser.add_argument("--workers", type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument("--format", choices=['text', 'jsonl'], default='text')
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        bank_file = os.path.join(directory, "bank.csv")
+        history_file = os.path.join(directory, "bank_history.db")
+        generate(bank_file, args.customers, args.seed)
+        transactions = seed_history(bank_file, history_file, args.per_account, args.seed)
+
+        runs = []
+        for workers in dict.fromkeys(args.workers):
+            output_dir = os.path.join(directory, f"statements-{workers}")
+            report = generate_statements(bank_file, history_file, MONTH, output_dir, args.format, workers)
+            report['workers'] = workers
+            report['projected_seconds_for_1m'] = 1_000_000 / report['statements_per_second']
+            runs.append(report)
+
+    emit("statements", {'customers': args.customers, 'transactions': transactions, 'cpus': os.cpu_count(),
+                        'format': args.format, 'runs': runs}, args.output)
+
+
+if __name__ == "__main__":
+    main()
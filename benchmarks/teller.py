@@ -0,0 +1,90 @@
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+from bank import Bank
+from banking import BankingMenu
+from benchmarks.common import emit
+from benchmarks.generate import PASSWORD, generate, parse_count
+from teller import HeadlessMenu, replay_sessions
+
+# Run from the repository root: python -m benchmarks.teller [--customers 100k --sessions 200 --workers 1 4]
+# Replays synthetic teller sessions headlessly, and times one menu redraw rendered against suppressed.
+
+
+def synthetic_session(rng: random.Random, customers: int, actions: int) -> list:
+    cust_id = str(10001 + rng.randrange(customers))
+    inputs = ["1", cust_id, PASSWORD]
+    for _ in range(actions):
+        kind = rng.random()
+        if kind < 0.3:
+            inputs += ["5", "1", f"{rng.randint(1, 500)}.00"]
+        elif kind < 0.5:
+            inputs += ["4", "1", f"{rng.randint(1, 50)}.00"]
+        elif kind < 0.65:
+            receiver = str(10001 + rng.randrange(customers))
+            inputs += ["6", "2", receiver, "1", "1", f"{rng.randint(1, 20)}.00", "y"]
+        elif kind < 0.85:
+            inputs += ["1"]
+        else:
+            inputs += ["8"]
+    return inputs + ["7"]
+
+
+def redraw_seconds(menu: BankingMenu, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        menu.display_menu()
+    return (time.perf_counter() - started) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless teller session replay")
+    parser.add_argument("--customers", type=parse_count, default=parse_count("100k"))
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--actions", type=int, default=20, help="menu actions per session after login")
+    parser.add_argument("--workers", type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sessions = [{'name': f"session-{index}", 'inputs': synthetic_session(rng, args.customers, args.actions)}
+                for index in range(args.sessions)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, "bank.csv")
+        generate(csv_file, args.customers, args.seed)
+
+        runs = []
+        for workers in dict.fromkeys(args.workers):
+            report = replay_sessions(csv_file, sessions, workers, rules=False)
+            runs.append({name: report[name] for name in ('workers', 'actions', 'seconds', 'actions_per_second',
+                                                          'load_seconds', 'latency', 'incomplete', 'errors')})
+
+        bank = Bank(csv_file, keep_history=False, idempotency_ttl=None)
+        customer = bank.get_customer("10001")
+        rendered = BankingMenu(bank=bank)
+        rendered.current_customer = customer
+        with contextlib.redirect_stdout(io.StringIO()):
+            rendered_seconds = redraw_seconds(rendered, 2000)
+        headless = HeadlessMenu(bank, [])
+        headless.current_customer = customer
+        headless_seconds = redraw_seconds(headless, 2000)
+        bank.close()
+
+    emit("teller", {
+        'customers': args.customers,
+        'sessions': args.sessions,
+        'cpus': os.cpu_count(),
+        'runs': runs,
+        'redraw_rendered_us': rendered_seconds * 1e6,
+        'redraw_headless_us': headless_seconds * 1e6
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkpoints = 0
+        self.failures = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.last_bytes = 0
+        self.total_bytes = 0
+        self.last_rows = 0
+
+    def record(self, duration: float, bytes_written: int, rows: int):
+        with self.lock:
+            self.checkpoints += 1
+            self.last_duration = duration
+            self.max_duration = max(self.max_duration, duration)
+            self.total_duration += duration
+            self.last_bytes = bytes_written
+            self.total_bytes += bytes_written
+            self.last_rows = rows
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'checkpoints': self.checkpoints,
+                'failures': self.failures,
+                'last_duration': self.last_duration,
+                'max_duration': self.max_duration,
+                'total_duration': self.total_duration,
+                'last_bytes': self.last_bytes,
+                'total_bytes': self.total_bytes,
+                'last_rows': self.last_rows
+            }
+
+
+class Checkpointer(threading.Thread):
+    def __init__(self, bank, dirty_threshold: int = 1000, interval: float = 30.0):
+        super().__init__(name="bank-checkpointer", daemon=True)
+        self.bank = bank
+        self.dirty_threshold = dirty_threshold
+        self.interval = interval
+        # Posting threads add to dirty while this thread resets it, so it is only touched under the lock.
+        self.lock = threading.Lock()
+        self.dirty = 0
+        self.last_checkpoint = time.monotonic()
+        self.wakeup = threading.Event()
+        self.stopping = False
+        # The error from the last checkpoint if it failed; cleared by the next one that succeeds.
+        self.failure: Optional[BaseException] = None
+
+    def notify(self, changes: int = 1):
+        with self.lock:
+            self.dirty += changes
+            due = self.dirty >= self.dirty_threshold
+        if due:
+            self.wakeup.set()
+
+    def run(self):
+        while not self.stopping:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            if self.stopping:
+                break
+
+            due = time.monotonic() - self.last_checkpoint >= self.interval
+            with self.lock:
+                dirty = self.dirty
+            if dirty >= self.dirty_threshold or (due and dirty > 0):
+                self.checkpoint()
+
+    def checkpoint(self):
+        with self.lock:
+            changes = self.dirty
+            self.dirty = 0
+        self.last_checkpoint = time.monotonic()
+        try:
+            self.bank.checkpoint()
+        except Exception as error:
+            # The journal still holds every change, so the thread keeps running and the next round retries.
+            logger.exception("Checkpoint failed; the next round retries it")
+            with self.lock:
+                self.dirty += changes
+            self.failure = error
+            self.bank.checkpoint_stats.record_failure()
+        else:
+            self.failure = None
+
+    def stop(self):
+        self.stopping = True
+        self.wakeup.set()
+        self.join()
+        with self.lock:
+            dirty = self.dirty
+        if dirty > 0:
+            self.checkpoint()
@@ -0,0 +1,250 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from money import format_money
+from storage import to_cents, to_flag
+from transaction import TIMESTAMP_FORMAT
+from typing import Dict, Any, Iterable, Optional
+
+STATE = "cust_id, first_name, last_name, has_checking, has_savings, active, checking_balance, savings_balance, overdraft_count"
+FLAGS = ('has_checking', 'has_savings', 'active')
+
+
+def now() -> str:
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def parse_moment(text: str) -> str:
+    # A bare date means the end of that day: "as of 2026-01-31" includes everything posted on the 31st.
+    text = text.strip()
+    try:
+        return datetime.strptime(text, TIMESTAMP_FORMAT).strftime(TIMESTAMP_FORMAT)
+    except ValueError:
+        return datetime.strptime(text, "%Y-%m-%d").strftime("%Y-%m-%d 23:59:59")
+
+
+def to_state(row: sqlite3.Row) -> Dict[str, Any]:
+    state = dict(row)
+    state['id'] = state.pop('cust_id')
+    for name in FLAGS:
+        state[name] = bool(state[name])
+    return state
+
+
+class EventStore:
+    # Every persisted customer change is one event holding the customer's full state after it, so the
+    # latest event at or before a moment answers a single-customer query; periodic snapshots bound how
+    # far a whole-bank replay has to go.
+    def __init__(self, path: str = "bank_events.db", snapshot_every: int = 100_000):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                seq INTEGER PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                cust_id TEXT NOT NULL,
+                first_name TEXT NOT NULL,
+                last_name TEXT NOT NULL,
+                has_checking INTEGER NOT NULL,
+                has_savings INTEGER NOT NULL,
+                active INTEGER NOT NULL,
+                checking_balance INTEGER NOT NULL,
+                savings_balance INTEGER NOT NULL,
+                overdraft_count INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_events_customer ON events (cust_id, timestamp, seq);
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INTEGER PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                timestamp TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON snapshots (timestamp, seq);
+            CREATE TABLE IF NOT EXISTS snapshot_states (
+                snapshot_id INTEGER NOT NULL,
+                cust_id TEXT NOT NULL,
+                first_name TEXT NOT NULL,
+                last_name TEXT NOT NULL,
+                has_checking INTEGER NOT NULL,
+                has_savings INTEGER NOT NULL,
+                active INTEGER NOT NULL,
+                checking_balance INTEGER NOT NULL,
+                savings_balance INTEGER NOT NULL,
+                overdraft_count INTEGER NOT NULL,
+                PRIMARY KEY (snapshot_id, cust_id)
+            ) WITHOUT ROWID;
+        """)
+
+    def params(self, timestamp: str, row: Dict) -> tuple:
+        return (timestamp, row['id'], row['first_name'], row['last_name'],
+                int(to_flag(row['has_checking'])), int(to_flag(row['has_savings'])), int(to_flag(row['active'])),
+                to_cents(row['checking_balance']), to_cents(row['savings_balance']), int(row['overdraft_count']))
+
+    def append(self, rows: Iterable[Dict], timestamp: Optional[str] = None):
+        timestamp = timestamp or now()
+        params = [self.params(timestamp, row) for row in rows]
+        with self.lock:
+            self.conn.executemany(
+                f"INSERT INTO events (timestamp, {STATE}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", params)
+            self.conn.commit()
+
+    def last_seq(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0]
+
+    def latest_snapshot(self, moment: Optional[str] = None) -> Optional[sqlite3.Row]:
+        if moment is None:
+            sql, params = "SELECT id, seq, timestamp FROM snapshots ORDER BY seq DESC, id DESC LIMIT 1", ()
+        else:
+            sql = "SELECT id, seq, timestamp FROM snapshots WHERE timestamp <= ? ORDER BY timestamp DESC, seq DESC LIMIT 1"
+            params = (moment,)
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def baseline(self, rows: Iterable[Dict]) -> int:
+        # Customers that existed before events were recorded start from a snapshot of their current state.
+        timestamp = now()
+        with self.lock:
+            seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0]
+            snapshot_id = self.conn.execute("INSERT INTO snapshots (seq, timestamp) VALUES (?, ?)",
+                                            (seq, timestamp)).lastrowid
+            self.conn.executemany(
+                f"INSERT INTO snapshot_states (snapshot_id, {STATE}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((snapshot_id,) + self.params(timestamp, row)[1:] for row in rows))
+            self.conn.commit()
+        return snapshot_id
+
+    def snapshot(self) -> Optional[int]:
+        # Built in SQL from the previous snapshot plus each customer's newest event since it,
+        # so taking one never needs the bank's in-memory state or its locks.
+        previous = self.latest_snapshot()
+        with self.lock:
+            last = self.conn.execute("SELECT seq, timestamp FROM events ORDER BY seq DESC LIMIT 1").fetchone()
+            if last is None or (previous is not None and last['seq'] <= previous['seq']):
+                return None
+            previous_id = previous['id'] if previous else 0
+            previous_seq = previous['seq'] if previous else 0
+
+            snapshot_id = self.conn.execute("INSERT INTO snapshots (seq, timestamp) VALUES (?, ?)",
+                                            (last['seq'], last['timestamp'])).lastrowid
+            self.conn.execute(
+                f"""INSERT INTO snapshot_states (snapshot_id, {STATE})
+                    SELECT ?, {STATE} FROM snapshot_states
+                    WHERE snapshot_id = ? AND cust_id NOT IN (SELECT cust_id FROM events WHERE seq > ? AND seq <= ?)""",
+                (snapshot_id, previous_id, previous_seq, last['seq']))
+            # SQLite takes the other columns from the row holding MAX(seq) within each group.
+            self.conn.execute(
+                f"""INSERT INTO snapshot_states (snapshot_id, {STATE})
+                    SELECT ?, {STATE} FROM (
+                        SELECT {STATE}, MAX(seq) FROM events WHERE seq > ? AND seq <= ? GROUP BY cust_id
+                    )""",
+                (snapshot_id, previous_seq, last['seq']))
+            self.conn.commit()
+        return snapshot_id
+
+    def maybe_snapshot(self) -> Optional[int]:
+        previous = self.latest_snapshot()
+        if self.last_seq() - (previous['seq'] if previous else 0) < self.snapshot_every:
+            return None
+        return self.snapshot()
+
+    def customer_at(self, cust_id: str, moment: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT {STATE} FROM events WHERE cust_id = ? AND timestamp <= ? "
+                "ORDER BY timestamp DESC, seq DESC LIMIT 1",
+                (cust_id, moment)).fetchone()
+        if row:
+            return to_state(row)
+
+        # No event yet at that moment: the customer can only be known from the baseline snapshot.
+        snapshot = self.latest_snapshot(moment)
+        if snapshot is None:
+            return None
+        with self.lock:
+            row = self.conn.execute(f"SELECT {STATE} FROM snapshot_states WHERE snapshot_id = ? AND cust_id = ?",
+                                    (snapshot['id'], cust_id)).fetchone()
+        return to_state(row) if row else None
+
+    def bank_at(self, moment: str) -> Dict[str, Dict[str, Any]]:
+        snapshot = self.latest_snapshot(moment)
+        customers = {}
+        after_seq = 0
+        with self.lock:
+            if snapshot is not None:
+                after_seq = snapshot['seq']
+                for row in self.conn.execute(f"SELECT {STATE} FROM snapshot_states WHERE snapshot_id = ?",
+                                             (snapshot['id'],)):
+                    customers[row['cust_id']] = to_state(row)
+            for row in self.conn.execute(f"SELECT {STATE} FROM events WHERE seq > ? AND timestamp <= ? ORDER BY seq",
+                                         (after_seq, moment)):
+                customers[row['cust_id']] = to_state(row)
+        return customers
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def describe(state: Dict[str, Any]) -> str:
+    accounts = []
+    if state['has_checking']:
+        accounts.append(f"checking {format_money(state['checking_balance'])}")
+    if state['has_savings']:
+        accounts.append(f"savings {format_money(state['savings_balance'])}")
+    status = "active" if state['active'] else "inactive"
+    return (f"{state['id']} {state['first_name']} {state['last_name']}: {', '.join(accounts) or 'no accounts'} "
+            f"({status}, {state['overdraft_count']} overdraft(s))")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Customer balances as of a past moment")
+    parser.add_argument("command", choices=["as-of", "snapshot"])
+    parser.add_argument("moment", nargs='?', help="YYYY-MM-DD [HH:MM:SS]; a bare date means the end of that day")
+    parser.add_argument("--customer", help="one customer id (default: the whole bank)")
+    parser.add_argument("--events", default="bank_events.db")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.events):
+        sys.exit(f"{args.events} does not exist")
+    store = EventStore(args.events)
+    try:
+        if args.command == "snapshot":
+            snapshot_id = store.snapshot()
+            print(f"Took snapshot {snapshot_id}" if snapshot_id else "No events since the last snapshot")
+            return
+
+        if not args.moment:
+            parser.error("as-of needs a moment")
+        moment = parse_moment(args.moment)
+        if args.customer:
+            state = store.customer_at(args.customer, moment)
+            if state is None:
+                sys.exit(f"Customer {args.customer} has no recorded state at {moment}")
+            states = [state]
+        else:
+            states = sorted(store.bank_at(moment).values(), key=lambda state: (len(state['id']), state['id']))
+
+        if args.json:
+            for state in states:
+                print(json.dumps(dict(state, as_of=moment, checking_balance=format_money(state['checking_balance']),
+                                      savings_balance=format_money(state['savings_balance']))))
+        else:
+            print(f"As of {moment}:")
+            for state in states:
+                print("  " + describe(state))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
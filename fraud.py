@@ -0,0 +1,202 @@
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Any, List, Optional
+
+POSTING_OPS = ('deposit', 'withdraw', 'internal_transfer', 'transfer')
+
+
+class BucketedWindow:
+    __slots__ = ('bucket_seconds', 'counts', 'amounts', 'current', 'count', 'amount')
+
+    def __init__(self, window: float, buckets: int):
+        self.bucket_seconds = window / buckets
+        self.counts = [0] * buckets
+        self.amounts = [0] * buckets
+        self.current = None
+        self.count = 0
+        self.amount = 0
+
+    def advance(self, now: float):
+        # Running totals are kept alongside the ring, so expiring old buckets and reading the
+        # window are bounded by the bucket count rather than the number of events.
+        bucket = int(now / self.bucket_seconds)
+        if self.current is None:
+            self.current = bucket
+            return
+        steps = bucket - self.current
+        if steps <= 0:
+            return
+
+        size = len(self.counts)
+        if steps >= size:
+            self.counts = [0] * size
+            self.amounts = [0] * size
+            self.count = self.amount = 0
+        else:
+            for offset in range(1, steps + 1):
+                slot = (self.current + offset) % size
+                self.count -= self.counts[slot]
+                self.amount -= self.amounts[slot]
+                self.counts[slot] = 0
+                self.amounts[slot] = 0
+        self.current = bucket
+
+    def totals(self, now: float) -> tuple[int, int]:
+        self.advance(now)
+        return self.count, self.amount
+
+    def add(self, now: float, amount: int):
+        self.advance(now)
+        slot = self.current % len(self.counts)
+        self.counts[slot] += 1
+        self.amounts[slot] += amount
+        self.count += 1
+        self.amount += amount
+
+
+class VelocityRule:
+    def __init__(self, name: str, ops: tuple, window: float, max_count: Optional[int] = None,
+                 max_amount: Optional[int] = None, scope: str = 'customer', buckets: int = 10,
+                 capacity: int = 100_000, message: Optional[str] = None):
+        if scope not in ('customer', 'counterparty', 'pair'):
+            raise ValueError(f"Unknown rule scope: {scope}")
+        self.name = name
+        self.ops = tuple(ops)
+        self.window = window
+        self.max_count = max_count
+        self.max_amount = max_amount
+        self.scope = scope
+        self.buckets = buckets
+        self.capacity = capacity
+        self.message = message or f"Transaction declined: {name.replace('_', ' ')} limit reached"
+        self.windows = OrderedDict()
+
+    def key(self, cust_id: str, counterparty: Optional[str]):
+        if self.scope == 'customer':
+            return cust_id
+        if self.scope == 'counterparty':
+            return counterparty
+        return (cust_id, counterparty)
+
+    def check(self, now: float, cust_id: str, amount: int, counterparty: Optional[str]) -> bool:
+        window = self.windows.get(self.key(cust_id, counterparty))
+        if window is None:
+            count, total = 0, 0
+        else:
+            count, total = window.totals(now)
+        if self.max_count is not None and count + 1 > self.max_count:
+            return False
+        if self.max_amount is not None and total + amount > self.max_amount:
+            return False
+        return True
+
+    def record(self, now: float, cust_id: str, amount: int, counterparty: Optional[str]):
+        key = self.key(cust_id, counterparty)
+        window = self.windows.get(key)
+        if window is None:
+            window = self.windows[key] = BucketedWindow(self.window, self.buckets)
+            # Least recently active keys are dropped first, which only forgets old activity.
+            if len(self.windows) > self.capacity:
+                self.windows.popitem(last=False)
+        else:
+            self.windows.move_to_end(key)
+        window.add(now, amount)
+
+
+class NewCounterpartyRule:
+    def __init__(self, name: str, window: float, max_new: int, ops: tuple = ('transfer',),
+                 buckets: int = 10, capacity: int = 100_000, message: Optional[str] = None):
+        self.name = name
+        self.ops = tuple(ops)
+        self.window = window
+        self.max_new = max_new
+        self.buckets = buckets
+        self.capacity = capacity
+        self.message = message or f"Transaction declined: {name.replace('_', ' ')} limit reached"
+        self.known = OrderedDict()
+        self.windows = OrderedDict()
+
+    def check(self, now: float, cust_id: str, amount: int, counterparty: Optional[str]) -> bool:
+        if (cust_id, counterparty) in self.known:
+            return True
+        window = self.windows.get(cust_id)
+        return window is None or window.totals(now)[0] + 1 <= self.max_new
+
+    def record(self, now: float, cust_id: str, amount: int, counterparty: Optional[str]):
+        pair = (cust_id, counterparty)
+        if pair in self.known:
+            self.known.move_to_end(pair)
+            return
+
+        self.known[pair] = True
+        if len(self.known) > self.capacity:
+            self.known.popitem(last=False)
+        window = self.windows.get(cust_id)
+        if window is None:
+            window = self.windows[cust_id] = BucketedWindow(self.window, self.buckets)
+            if len(self.windows) > self.capacity:
+                self.windows.popitem(last=False)
+        else:
+            self.windows.move_to_end(cust_id)
+        window.add(now, amount)
+
+
+RULE_TYPES = {'velocity': VelocityRule, 'new_counterparty': NewCounterpartyRule}
+
+
+class RuleEngine:
+    def __init__(self, rules: List, clock: Callable[[], float] = time.monotonic):
+        self.rules = rules
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.declined = Counter()
+        self.by_op = {op: [rule for rule in rules if op in rule.ops] for op in POSTING_OPS}
+
+    def check(self, op: str, cust_id: str, amount: int, counterparty: Optional[str] = None) -> Optional[str]:
+        rules = self.by_op.get(op)
+        if not rules:
+            return None
+        now = self.clock()
+        with self.lock:
+            for rule in rules:
+                if not rule.check(now, cust_id, amount, counterparty):
+                    self.declined[rule.name] += 1
+                    return rule.message
+        return None
+
+    def record(self, op: str, cust_id: str, amount: int, counterparty: Optional[str] = None):
+        rules = self.by_op.get(op)
+        if not rules:
+            return
+        now = self.clock()
+        with self.lock:
+            for rule in rules:
+                rule.record(now, cust_id, amount, counterparty)
+
+
+def default_rules() -> List:
+    return [
+        VelocityRule("withdrawal_burst", ('withdraw',), 600, max_count=10),
+        VelocityRule("withdrawal_volume", ('withdraw',), 3600, max_amount=1_000_00),
+        VelocityRule("transfer_burst", ('transfer',), 60, max_count=10),
+        VelocityRule("incoming_transfers", ('transfer',), 3600, max_count=50, scope='counterparty'),
+        NewCounterpartyRule("new_receivers", 3600, max_new=5)
+    ]
+
+
+def rules_from_config(entries: List[Dict[str, Any]]) -> List:
+    rules = []
+    for entry in entries:
+        options = dict(entry)
+        rule_type = options.pop('type', 'velocity')
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"Unknown rule type: {rule_type}")
+        rules.append(RULE_TYPES[rule_type](**options))
+    return rules
+
+
+def load_rules(path: str) -> List:
+    with open(path, 'r') as file:
+        return rules_from_config(json.load(file))
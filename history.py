@@ -0,0 +1,152 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from transaction import Transaction
+from typing import Dict, Any, Iterator, List, Optional
+
+COLUMNS = "seq, cust_id, timestamp, type, account, amount, balance_after, description"
+
+
+class TransactionStore:
+    def __init__(self, path: str = "bank_history.db", page_size: int = 500):
+        self.path = path
+        self.page_size = page_size
+        self.lock = threading.Lock()
+        # Per thread, like Bank's batch state: a batch in one thread must not stop other threads' rows
+        # from being committed before their postings return.
+        self.local = threading.local()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transactions (
+                seq INTEGER PRIMARY KEY,
+                cust_id TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                type TEXT NOT NULL,
+                account TEXT NOT NULL,
+                amount INTEGER NOT NULL,
+                balance_after INTEGER NOT NULL,
+                description TEXT NOT NULL DEFAULT ''
+            );
+            CREATE INDEX IF NOT EXISTS idx_transactions_customer
+                ON transactions (cust_id, timestamp, seq);
+            CREATE INDEX IF NOT EXISTS idx_transactions_account
+                ON transactions (cust_id, account, timestamp, seq);
+            CREATE INDEX IF NOT EXISTS idx_transactions_type
+                ON transactions (cust_id, type, timestamp, seq);
+        """)
+
+    def append(self, cust_id: str, transaction: Transaction):
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO transactions (cust_id, timestamp, type, account, amount, balance_after, description) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (cust_id, transaction.timestamp, transaction.type, transaction.account,
+                 transaction.amount, transaction.balance_after, transaction.description)
+            )
+            if not getattr(self.local, 'deferred', 0):
+                self.conn.commit()
+
+    @contextmanager
+    def deferred_commit(self):
+        self.local.deferred = getattr(self.local, 'deferred', 0) + 1
+        try:
+            yield
+        finally:
+            self.local.deferred -= 1
+            with self.lock:
+                self.conn.commit()
+
+    def build_filter(self, cust_id: str, start: Optional[str], end: Optional[str],
+                     account_type: Optional[str], transaction_type: Optional[str]) -> tuple[str, list]:
+        clauses = ["cust_id = ?"]
+        params = [cust_id]
+        if account_type:
+            clauses.append("account = ?")
+            params.append(account_type)
+        if transaction_type:
+            clauses.append("type = ?")
+            params.append(transaction_type)
+        if start:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        return " AND ".join(clauses), params
+
+    def query(self, cust_id: str, start: Optional[str] = None, end: Optional[str] = None,
+              account_type: Optional[str] = None, transaction_type: Optional[str] = None,
+              newest_first: bool = False) -> Iterator[Dict[str, Any]]:
+        where, params = self.build_filter(cust_id, start, end, account_type, transaction_type)
+        order = "DESC" if newest_first else "ASC"
+        after = "<" if newest_first else ">"
+        cursor = None
+
+        # Keyset pagination: each page resumes after the last (timestamp, seq) seen, so
+        # memory stays at one page no matter how long the customer's history is.
+        while True:
+            sql = f"SELECT {COLUMNS} FROM transactions WHERE {where}"
+            page_params = list(params)
+            if cursor is not None:
+                sql += f" AND (timestamp, seq) {after} (?, ?)"
+                page_params.extend(cursor)
+            sql += f" ORDER BY timestamp {order}, seq {order} LIMIT ?"
+            page_params.append(self.page_size)
+
+            with self.lock:
+                rows = self.conn.execute(sql, page_params).fetchall()
+
+            for row in rows:
+                yield dict(row)
+
+            if len(rows) < self.page_size:
+                return
+            cursor = (rows[-1]['timestamp'], rows[-1]['seq'])
+
+    def scan(self, after_seq: int = 0) -> Iterator[Dict[str, Any]]:
+        # Every customer's rows in insertion order, paged on seq so a scan can resume where it stopped.
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    f"SELECT {COLUMNS} FROM transactions WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (after_seq, self.page_size)
+                ).fetchall()
+
+            for row in rows:
+                yield dict(row)
+
+            if len(rows) < self.page_size:
+                return
+            after_seq = rows[-1]['seq']
+
+    def last(self, cust_id: str, count: int, account_type: Optional[str] = None,
+             transaction_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        where, params = self.build_filter(cust_id, None, None, account_type, transaction_type)
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {COLUMNS} FROM transactions WHERE {where} ORDER BY timestamp DESC, seq DESC LIMIT ?",
+                params + [count]
+            ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def nearest(self, cust_id: str, account_type: str, moment: str, before: bool = True) -> Optional[Dict[str, Any]]:
+        # The last row before moment, or with before=False the first row at or after it.
+        if before:
+            where, params = self.build_filter(cust_id, None, moment, account_type, None)
+            order = "DESC"
+        else:
+            where, params = self.build_filter(cust_id, moment, None, account_type, None)
+            order = "ASC"
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT {COLUMNS} FROM transactions WHERE {where} ORDER BY timestamp {order}, seq {order} LIMIT 1",
+                params
+            ).fetchone()
+        return dict(row) if row else None
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,150 @@
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+import metrics
+from journal import Journal
+from storage import fsync_directory
+from typing import Callable, Optional
+
+REUSED = (False, "Idempotency key was already used for a different request")
+
+
+class DedupStore:
+    # Results of keyed postings, bounded by count (LRU) and age (TTL). Every result is appended to a
+    # JSON-lines file and the file is rewritten with only the live entries once it has grown past twice
+    # the capacity, so a restart still recognizes retries of postings made before it.
+    def __init__(self, path: str = "bank.csv.idempotency", capacity: int = 100_000, ttl: float = 24 * 3600.0,
+                 sync: bool = True, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.journal = Journal(path, sync)
+        self.results = OrderedDict()
+        self.in_flight = {}
+        # Results not yet journaled, per thread: each thread's postings are persisted by its own batch,
+        # so its flush must not journal results another thread has not persisted yet.
+        self.local = threading.local()
+        self.load()
+
+    def load(self):
+        now = self.clock()
+        for record in self.journal.replay():
+            if record['expires'] > now:
+                self.results[record['key']] = (record['expires'], record['fingerprint'],
+                                               (record['success'], record['message']))
+                self.results.move_to_end(record['key'])
+                while len(self.results) > self.capacity:
+                    self.results.popitem(last=False)
+            else:
+                self.results.pop(record['key'], None)
+
+    def lookup(self, key: str) -> Optional[tuple]:
+        entry = self.results.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self.clock():
+            del self.results[key]
+            return None
+        self.results.move_to_end(key)
+        return entry
+
+    def run(self, key: str, fingerprint: str, function: Callable[[], tuple]) -> tuple[bool, str]:
+        # A retry that arrives while the first attempt is still running waits for it instead of posting twice.
+        while True:
+            with self.lock:
+                entry = self.lookup(key)
+                if entry is not None:
+                    return entry[2] if entry[1] == fingerprint else REUSED
+                running = self.in_flight.get(key)
+                if running is None:
+                    running = self.in_flight[key] = threading.Event()
+                    break
+            running.wait()
+
+        try:
+            result = function()
+            self.remember(key, fingerprint, result)
+            return result
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            running.set()
+
+    def remember(self, key: str, fingerprint: str, result: tuple):
+        expires = self.clock() + self.ttl
+        with self.lock:
+            self.results[key] = (expires, fingerprint, tuple(result))
+            self.results.move_to_end(key)
+            while len(self.results) > self.capacity:
+                self.results.popitem(last=False)
+        self.pending().append({'key': key, 'expires': expires, 'fingerprint': fingerprint,
+                               'success': result[0], 'message': result[1]})
+
+    def pending(self) -> list:
+        pending = getattr(self.local, 'pending', None)
+        if pending is None:
+            pending = self.local.pending = []
+        return pending
+
+    def flush(self):
+        # Called by a thread once its postings are persisted, so a remembered result never outlives a
+        # lost posting.
+        pending = self.pending()
+        if not pending:
+            return
+        self.local.pending = []
+        with self.lock:
+            self.journal.append(pending)
+            if self.journal.entries > 2 * self.capacity:
+                self.compact()
+
+    def compact(self):
+        records = [{'key': key, 'expires': expires, 'fingerprint': fingerprint,
+                    'success': result[0], 'message': result[1]}
+                   for key, (expires, fingerprint, result) in self.results.items()]
+        temp = Journal(self.path + ".tmp", sync=True)
+        if records:
+            temp.append(records)
+        temp.close()
+        self.journal.close()
+        os.replace(temp.path, self.path)
+        fsync_directory(self.path)
+        self.journal.entries = len(records)
+        self.journal.valid_size = None
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.journal.close()
+
+
+def idempotent(op: str):
+    # For Bank postings: the first positional argument is the acting customer, which scopes the key.
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(bank, *args, idempotency_key: Optional[str] = None, **kwargs):
+            if idempotency_key is None or bank.dedup is None:
+                return function(bank, *args, **kwargs)
+
+            fingerprint = repr((op, args, sorted(kwargs.items())))
+            executed = []
+
+            def post():
+                executed.append(True)
+                return function(bank, *args, **kwargs)
+
+            result = bank.dedup.run(f"{args[0]}:{idempotency_key}", fingerprint, post)
+            if not executed:
+                metrics.count('bank_idempotent_replays_total', op=op)
+            if getattr(getattr(bank, 'batch_state', None), 'dirty', None) is None:
+                bank.dedup.flush()
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,106 @@
+import threading
+from typing import Callable, Dict, Iterable, Optional, Set
+
+FIRST_CUSTOMER_ID = 10001
+
+
+class IdAllocator:
+    def __init__(self, storage, block_size: int = 1):
+        self.storage = storage
+        self.block_size = block_size
+        self.lock = threading.Lock()
+        self.next_id = 0
+        self.limit = 0
+
+    def allocate(self, floor: Callable[[], int]) -> str:
+        # Ids are reserved from storage a block at a time and the counter is persisted per block;
+        # with larger blocks, ids left unused at a restart are skipped, never handed out twice.
+        with self.lock:
+            if self.next_id >= self.limit:
+                self.next_id = self.storage.reserve_ids(self.block_size, floor)
+                self.limit = self.next_id + self.block_size
+            cust_id = self.next_id
+            self.next_id += 1
+        return str(cust_id)
+
+
+def highest_id(ids: Iterable[str]) -> int:
+    return max((int(cust_id) for cust_id in ids if cust_id.isdigit()), default=FIRST_CUSTOMER_ID - 1)
+
+
+class CustomerIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = {}
+        self.by_first_name = {}
+        self.by_last_name = {}
+        self.by_full_name = {}
+        self.active = set()
+        self.checking = set()
+        self.savings = set()
+
+    def key_for(self, row: Dict) -> tuple:
+        return (row['first_name'].strip().lower(), row['last_name'].strip().lower(),
+                str(row['active']).lower() == 'true',
+                str(row['has_checking']).lower() == 'true',
+                str(row['has_savings']).lower() == 'true')
+
+    def update(self, cust_id: str, row: Dict):
+        key = self.key_for(row)
+        with self.lock:
+            old = self.keys.get(cust_id)
+            if old == key:
+                return
+            if old is not None:
+                self.discard(cust_id, old)
+            self.keys[cust_id] = key
+
+            first_name, last_name, active, checking, savings = key
+            self.by_first_name.setdefault(first_name, set()).add(cust_id)
+            self.by_last_name.setdefault(last_name, set()).add(cust_id)
+            self.by_full_name.setdefault((first_name, last_name), set()).add(cust_id)
+            for flag, members in ((active, self.active), (checking, self.checking), (savings, self.savings)):
+                if flag:
+                    members.add(cust_id)
+
+    def discard(self, cust_id: str, key: tuple):
+        first_name, last_name, *_ = key
+        for buckets, bucket_key in ((self.by_first_name, first_name), (self.by_last_name, last_name),
+                                    (self.by_full_name, (first_name, last_name))):
+            members = buckets.get(bucket_key)
+            if members is not None:
+                members.discard(cust_id)
+                if not members:
+                    del buckets[bucket_key]
+        self.active.discard(cust_id)
+        self.checking.discard(cust_id)
+        self.savings.discard(cust_id)
+
+    def find(self, first_name: Optional[str] = None, last_name: Optional[str] = None,
+             active: Optional[bool] = None, has_checking: Optional[bool] = None,
+             has_savings: Optional[bool] = None) -> Set[str]:
+        with self.lock:
+            candidates = []
+            if first_name is not None and last_name is not None:
+                candidates.append(self.by_full_name.get((first_name.strip().lower(), last_name.strip().lower()), set()))
+            elif last_name is not None:
+                candidates.append(self.by_last_name.get(last_name.strip().lower(), set()))
+            elif first_name is not None:
+                candidates.append(self.by_first_name.get(first_name.strip().lower(), set()))
+
+            excluded = []
+            for flag, members in ((active, self.active), (has_checking, self.checking), (has_savings, self.savings)):
+                if flag is True:
+                    candidates.append(members)
+                elif flag is False:
+                    excluded.append(members)
+
+            if candidates:
+                candidates.sort(key=len)
+                result = set(candidates[0]).intersection(*candidates[1:])
+            else:
+                result = set(self.keys)
+
+            for members in excluded:
+                result -= members
+            return result
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+from bank import Bank
+from money import format_money, parse_money
+from storage import write_json_atomic
+from typing import Dict, Any, Optional
+
+DAYS_PER_YEAR = 365
+
+
+class RateSchedule:
+    def __init__(self, savings_rate_bp: int = 200, maintenance_fee: int = 5_00,
+                 minimum_balance: int = 500_00, overdrawn_fee: int = 10_00):
+        # Savings interest is an annual rate in basis points; fees and thresholds are in cents.
+        self.savings_rate_bp = savings_rate_bp
+        self.maintenance_fee = maintenance_fee
+        self.minimum_balance = minimum_balance
+        self.overdrawn_fee = overdrawn_fee
+
+
+def load_balances(bank: Bank) -> Dict[str, Any]:
+    if bank.storage.preload:
+        customers = list(bank.customers.values())
+        count = len(customers)
+        return {
+            'ids': [customer.cust_id for customer in customers],
+            'checking': np.fromiter((c.checking_balance for c in customers), dtype=np.int64, count=count),
+            'savings': np.fromiter((c.savings_balance for c in customers), dtype=np.int64, count=count),
+            'has_checking': np.fromiter((c.has_checking for c in customers), dtype=bool, count=count),
+            'has_savings': np.fromiter((c.has_savings for c in customers), dtype=bool, count=count),
+            'active': np.fromiter((c.active for c in customers), dtype=bool, count=count)
+        }
+
+    ids, checking, savings, has_checking, has_savings, active = [], [], [], [], [], []
+    for row in bank.storage.rows():
+        ids.append(row['id'])
+        checking.append(parse_money(row['checking_balance']))
+        savings.append(parse_money(row['savings_balance']))
+        has_checking.append(row['has_checking'].lower() == 'true')
+        has_savings.append(row['has_savings'].lower() == 'true')
+        active.append(row['active'].lower() == 'true')
+    return {
+        'ids': ids,
+        'checking': np.array(checking, dtype=np.int64),
+        'savings': np.array(savings, dtype=np.int64),
+        'has_checking': np.array(has_checking, dtype=bool),
+        'has_savings': np.array(has_savings, dtype=bool),
+        'active': np.array(active, dtype=bool)
+    }
+
+
+def assess(balances: Dict[str, Any], schedule: RateSchedule, days: int = 1,
+           month_end: bool = False) -> Dict[str, np.ndarray]:
+    checking = balances['checking']
+    savings = balances['savings']
+    has_checking = balances['has_checking']
+    has_savings = balances['has_savings']
+    active = balances['active']
+
+    # Interest is truncated to whole cents, so accrual never pays out money that was not earned.
+    earning = has_savings & active & (savings > 0)
+    interest = np.where(earning, savings * (schedule.savings_rate_bp * days) // (10000 * DAYS_PER_YEAR), 0)
+
+    maintenance = np.zeros_like(checking)
+    if month_end:
+        maintenance[has_checking & active & (checking < schedule.minimum_balance)] = schedule.maintenance_fee
+
+    # Only accounts already overdrawn when the run starts pay the overdrawn fee; this run's own
+    # maintenance fee never tips an account into it.
+    checking_overdrawn = np.where(has_checking & (checking < 0), schedule.overdrawn_fee, 0)
+    savings_overdrawn = np.where(has_savings & (savings < 0), schedule.overdrawn_fee, 0)
+    return {
+        'interest': interest,
+        'maintenance': maintenance,
+        'checking_overdrawn': checking_overdrawn,
+        'savings_overdrawn': savings_overdrawn
+    }
+
+
+def post_assessments(bank: Bank, balances: Dict[str, Any], assessments: Dict[str, np.ndarray]) -> Dict[str, int]:
+    interest = assessments['interest']
+    maintenance = assessments['maintenance']
+    checking_overdrawn = assessments['checking_overdrawn']
+    savings_overdrawn = assessments['savings_overdrawn']
+    touched = np.flatnonzero(interest | maintenance | checking_overdrawn | savings_overdrawn)
+
+    ids = balances['ids']
+    rows = zip(touched.tolist(), interest[touched].tolist(), maintenance[touched].tolist(),
+               checking_overdrawn[touched].tolist(), savings_overdrawn[touched].tolist())
+    postings = 0
+    # Amounts are applied as deltas under the customer lock, so postings made since the
+    # balances were loaded are kept.
+    with bank.batch():
+        for index, interest_amount, maintenance_fee, checking_fee, savings_fee in rows:
+            customer = bank.get_customer(ids[index])
+            if not customer:
+                continue
+            with bank.locked(customer):
+                if interest_amount:
+                    customer.savings_balance += interest_amount
+                    customer.log_transaction("INTEREST", "SAVINGS", interest_amount,
+                                             customer.savings_balance, "Savings interest")
+                    postings += 1
+                if maintenance_fee:
+                    customer.checking_balance -= maintenance_fee
+                    customer.log_transaction("FEE", "CHECKING", maintenance_fee,
+                                             customer.checking_balance, "Monthly maintenance fee")
+                    postings += 1
+                if checking_fee:
+                    customer.checking_balance -= checking_fee
+                    customer.log_transaction("FEE", "CHECKING", checking_fee,
+                                             customer.checking_balance, "Overdrawn balance fee")
+                    postings += 1
+                if savings_fee:
+                    customer.savings_balance -= savings_fee
+                    customer.log_transaction("FEE", "SAVINGS", savings_fee,
+                                             customer.savings_balance, "Overdrawn balance fee")
+                    postings += 1
+                bank.save_customer(customer)
+
+    return {
+        'accounts': len(touched),
+        'postings': postings,
+        'interest': int(interest.sum()),
+        'fees': int(maintenance.sum() + checking_overdrawn.sum() + savings_overdrawn.sum())
+    }
+
+
+def load_periods(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def repeat_reason(periods: Dict[str, Any], day: str, month_end: bool) -> Optional[str]:
+    if periods.get('in_progress'):
+        return (f"The run for {periods['in_progress']} did not finish; check the ledger with reconcile.py "
+                f"before running again with --force")
+    if periods.get('last_day') and day <= periods['last_day']:
+        return f"Interest and fees were already posted for {periods['last_day']}"
+    if month_end and periods.get('last_month') == day[:7]:
+        return f"Month-end fees were already posted for {day[:7]}"
+    return None
+
+
+def run_end_of_day(bank: Bank, schedule: RateSchedule = None, days: int = 1,
+                   month_end: bool = False, day: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+    # Each business day (YYYY-MM-DD) is posted once: a rerun, say a cron retry, would pay interest and charge
+    # fees again. The day is marked in progress before posting and done after it, in <bank>.interest.
+    day = day or time.strftime("%Y-%m-%d")
+    periods_file = bank.csv_file + ".interest"
+    periods = load_periods(periods_file)
+    reason = repeat_reason(periods, day, month_end)
+    if reason and not force:
+        raise ValueError(reason)
+    write_json_atomic(periods_file, dict(periods, in_progress=day))
+
+    schedule = schedule or RateSchedule()
+    started = time.perf_counter()
+    balances = load_balances(bank)
+    loaded = time.perf_counter()
+    assessments = assess(balances, schedule, days, month_end)
+    assessed = time.perf_counter()
+    report = post_assessments(bank, balances, assessments)
+    posted = time.perf_counter()
+
+    periods = dict(periods, last_day=max(day, periods.get('last_day') or day), in_progress=None)
+    if month_end:
+        periods['last_month'] = day[:7]
+    write_json_atomic(periods_file, periods)
+    report.update(customers=len(balances['ids']), load_seconds=loaded - started,
+                  assess_seconds=assessed - loaded, post_seconds=posted - assessed)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accrue savings interest and assess account fees")
+    parser.add_argument("--bank", default="bank.csv")
+    parser.add_argument("--days", type=int, default=1, help="days of interest to accrue")
+    parser.add_argument("--month-end", action="store_true", help="also assess the monthly maintenance fee")
+    parser.add_argument("--rate-bp", type=int, default=200, help="annual savings rate in basis points")
+    parser.add_argument("--date", help="business day being posted, YYYY-MM-DD (default: today)")
+    parser.add_argument("--force", action="store_true", help="post even if this day was already posted")
+    args = parser.parse_args()
+
+    bank = Bank(args.bank, lazy=True)
+    try:
+        report = run_end_of_day(bank, RateSchedule(savings_rate_bp=args.rate_bp), args.days, args.month_end,
+                                args.date, args.force)
+    except ValueError as error:
+        sys.exit(str(error))
+    finally:
+        bank.close()
+    print(f"Accounts posted: {report['accounts']} ({report['postings']} transactions)")
+    print(f"Interest paid: ${format_money(report['interest'])}")
+    print(f"Fees assessed: ${format_money(report['fees'])}")
+
+
+if __name__ == "__main__":
+    main()
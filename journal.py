@@ -0,0 +1,80 @@
+import json
+import os
+import shutil
+from typing import Dict, Iterator, List
+
+
+class Journal:
+    def __init__(self, path: str, sync: bool = True):
+        self.path = path
+        self.sync = sync
+        self.entries = 0
+        self.valid_size = None
+        self.file = None
+
+    @property
+    def pending_path(self) -> str:
+        return self.path + ".1"
+
+    def replay(self) -> Iterator[Dict[str, str]]:
+        self.entries = 0
+        self.valid_size = 0
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'rb') as file:
+            for line in file:
+                # A crash mid-append leaves a torn last line; everything before it is valid.
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self.valid_size += len(line)
+                self.entries += 1
+                yield record
+
+    def drop_torn_tail(self):
+        if self.valid_size is not None and os.path.exists(self.path):
+            if os.path.getsize(self.path) > self.valid_size:
+                os.truncate(self.path, self.valid_size)
+
+    def open(self):
+        self.drop_torn_tail()
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def append(self, records: List[Dict[str, str]]):
+        if self.file is None:
+            self.open()
+
+        self.file.write(''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records))
+        self.file.flush()
+        if self.sync:
+            os.fsync(self.file.fileno())
+        self.entries += len(records)
+
+    def rotate(self):
+        self.close()
+        self.drop_torn_tail()
+        if os.path.exists(self.path):
+            if os.path.exists(self.pending_path):
+                # The previous checkpoint never finished, so its records must stay ahead of ours.
+                with open(self.path, 'rb') as src, open(self.pending_path, 'ab') as dst:
+                    shutil.copyfileobj(src, dst)
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self.pending_path)
+        self.entries = 0
+        self.valid_size = 0
+
+    def discard_pending(self):
+        if os.path.exists(self.pending_path):
+            os.remove(self.pending_path)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,283 @@
+import functools
+import json
+import os
+import socketserver
+import threading
+import time
+from typing import Dict, Any
+
+# Prometheus bucket bounds in seconds; the histogram itself keeps much finer buckets for percentiles.
+EXPORT_BOUNDS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SUB_BUCKETS = 16
+
+
+def bucket_index(value: int) -> int:
+    # Log-linear buckets as in HdrHistogram: exact below 32, then 16 buckets per power of two,
+    # so every bucket is within 1/16 of the values it holds.
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - 5
+    return SUB_BUCKETS * shift + (value >> shift)
+
+
+def bucket_upper(index: int) -> int:
+    if index < 2 * SUB_BUCKETS:
+        return index + 1
+    shift = index // SUB_BUCKETS - 1
+    return (index - SUB_BUCKETS * shift + 1) << shift
+
+
+class Counter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        with self.lock:
+            self.value += amount
+
+
+class Gauge:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount: int = 1):
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        with self.lock:
+            self.value = value
+
+
+class Histogram:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = []
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, seconds: float):
+        micros = int(seconds * 1e6)
+        index = bucket_index(micros)
+        with self.lock:
+            if index >= len(self.counts):
+                self.counts.extend([0] * (index + 1 - len(self.counts)))
+            self.counts[index] += 1
+            self.count += 1
+            self.total += micros
+            if micros > self.max:
+                self.max = micros
+
+    def percentile(self, fraction: float) -> float:
+        with self.lock:
+            target = fraction * self.count
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if count and seen >= target:
+                    return min(bucket_upper(index), self.max) / 1e6
+        return 0.0
+
+    def cumulative(self, bounds: tuple) -> list:
+        with self.lock:
+            result = []
+            seen = 0
+            index = 0
+            for bound in bounds:
+                limit = bound * 1e6
+                while index < len(self.counts) and bucket_upper(index) <= limit:
+                    seen += self.counts[index]
+                    index += 1
+                result.append(seen)
+            return result
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum_seconds': self.total / 1e6,
+            'p50_seconds': self.percentile(0.50),
+            'p90_seconds': self.percentile(0.90),
+            'p99_seconds': self.percentile(0.99),
+            'p999_seconds': self.percentile(0.999),
+            'max_seconds': self.max / 1e6
+        }
+
+
+class Registry:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.help = {}
+
+    def get(self, kind, name: str, labels: Dict[str, str]):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self.metrics.get(key)
+        if metric is None:
+            with self.lock:
+                metric = self.metrics.get(key)
+                if metric is None:
+                    metric = self.metrics[key] = kind()
+        return metric
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self.get(Counter, name, labels)
+
+    def gauge(self, name: str, **labels) -> Gauge:
+        return self.get(Gauge, name, labels)
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        return self.get(Histogram, name, labels)
+
+    def describe(self, name: str, text: str):
+        self.help[name] = text
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {}
+        for (name, labels), metric in sorted(self.metrics.items(), key=lambda item: item[0]):
+            value = metric.summary() if isinstance(metric, Histogram) else metric.value
+            result.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+        return result
+
+    def to_prometheus(self) -> str:
+        lines = []
+        described = set()
+        for (name, labels), metric in sorted(self.metrics.items(), key=lambda item: item[0]):
+            if name not in described:
+                described.add(name)
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                kind = {Counter: 'counter', Gauge: 'gauge', Histogram: 'histogram'}[type(metric)]
+                lines.append(f"# TYPE {name} {kind}")
+
+            if isinstance(metric, Histogram):
+                for bound, count in zip(EXPORT_BOUNDS, metric.cumulative(EXPORT_BOUNDS)):
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', repr(bound)),))} {count}")
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {metric.count}")
+                lines.append(f"{name}_sum{format_labels(labels)} {metric.total / 1e6}")
+                lines.append(f"{name}_count{format_labels(labels)} {metric.count}")
+            else:
+                lines.append(f"{name}{format_labels(labels)} {metric.value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, fmt: str = 'prometheus') -> str:
+        if fmt == 'json':
+            return json.dumps(self.to_dict(), indent=2) + "\n"
+        return self.to_prometheus()
+
+    def write(self, path: str, fmt: str = 'prometheus'):
+        temp_file = path + ".tmp"
+        with open(temp_file, 'w') as file:
+            file.write(self.export(fmt))
+        os.replace(temp_file, path)
+
+
+def format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{key}="{str(value)}"'.replace("\n", " ") for key, value in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+REGISTRY = Registry(enabled=os.environ.get('BANK_METRICS', '').lower() in ('1', 'true', 'yes'))
+REGISTRY.describe('bank_operation_seconds', "Latency of bank operations")
+REGISTRY.describe('bank_operations_total', "Bank operations by outcome")
+REGISTRY.describe('bank_operations_in_flight', "Bank operations currently running")
+REGISTRY.describe('bank_overdrafts_total', "Withdrawals that overdrew an account")
+REGISTRY.describe('bank_deactivations_total', "Accounts deactivated after repeated overdrafts")
+REGISTRY.describe('bank_idempotent_replays_total', "Keyed postings answered from the dedup store")
+REGISTRY.describe('bank_scheduled_transfers_total', "Scheduled transfer attempts by outcome")
+
+
+def enable():
+    REGISTRY.enabled = True
+
+
+def disable():
+    REGISTRY.enabled = False
+
+
+def instrument(op: str, falsy_declines: bool = False):
+    def decorator(function):
+        handles = []
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            # Disabled metrics cost one attribute check per call.
+            if not REGISTRY.enabled:
+                return function(*args, **kwargs)
+
+            if not handles:
+                # Metric objects are looked up once per decorated function, not on every call.
+                handles.append((
+                    REGISTRY.gauge('bank_operations_in_flight', op=op),
+                    REGISTRY.histogram('bank_operation_seconds', op=op),
+                    {outcome: REGISTRY.counter('bank_operations_total', op=op, outcome=outcome)
+                     for outcome in ('ok', 'declined', 'error')}
+                ))
+            in_flight, latency, outcomes = handles[0]
+
+            in_flight.inc()
+            started = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = function(*args, **kwargs)
+                if isinstance(result, tuple) and result and isinstance(result[0], bool):
+                    outcome = 'ok' if result[0] else 'declined'
+                elif falsy_declines and not result:
+                    outcome = 'declined'
+                else:
+                    outcome = 'ok'
+                return result
+            finally:
+                latency.record(time.perf_counter() - started)
+                outcomes[outcome].inc()
+                in_flight.dec()
+        return wrapper
+    return decorator
+
+
+def count(name: str, **labels):
+    if REGISTRY.enabled:
+        REGISTRY.counter(name, **labels).inc()
+
+
+class MetricsHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.wfile.write(self.server.registry.export(self.server.fmt).encode('utf-8'))
+
+
+class MetricsSocket(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, registry: Registry = REGISTRY, fmt: str = 'prometheus'):
+        if os.path.exists(path):
+            os.remove(path)
+        super().__init__(path, MetricsHandler)
+        self.registry = registry
+        self.fmt = fmt
+        self.thread = None
+
+    def start(self) -> 'MetricsSocket':
+        # Each connection receives one export and is closed, e.g. `nc -U bank.metrics.sock`.
+        self.thread = threading.Thread(target=self.serve_forever, name="bank-metrics", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def serve_socket(path: str, fmt: str = 'prometheus') -> MetricsSocket:
+    return MetricsSocket(path, REGISTRY, fmt).start()
@@ -0,0 +1,44 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Union
+
+# Money is held as a plain int number of cents; dollars only exist at the edges (CSV, prompts, output).
+CENTS_PER_DOLLAR = 100
+
+
+def parse_money(text: Union[str, float]) -> int:
+    if isinstance(text, float):
+        text = repr(text)
+
+    text = text.strip()
+    negative = text.startswith('-')
+    digits = text[1:] if negative or text.startswith('+') else text
+    whole, _, fraction = digits.partition('.')
+
+    if whole.isdigit() and (fraction == '' or (fraction.isdigit() and len(fraction) <= 2)):
+        cents = int(whole) * CENTS_PER_DOLLAR + int(fraction.ljust(2, '0') or 0)
+        return -cents if negative else cents
+
+    # Slow path for legacy values such as "1e-05" or "12.3400000001" written by float balances.
+    try:
+        value = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {text!r}")
+    if not value.is_finite():
+        raise ValueError(f"Invalid amount: {text!r}")
+    return int((value * CENTS_PER_DOLLAR).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def parse_amount(text: str) -> int:
+    text = text.strip()
+    whole, _, fraction = text.partition('.')
+    if not whole.isdigit() and not (whole == '' and fraction):
+        raise ValueError(f"Invalid amount: {text!r}")
+    if fraction and (not fraction.isdigit() or len(fraction) > 2):
+        raise ValueError(f"Invalid amount: {text!r}")
+    return int(whole or 0) * CENTS_PER_DOLLAR + int(fraction.ljust(2, '0') or 0)
+
+
+def format_money(cents: int) -> str:
+    sign = '-' if cents < 0 else ''
+    whole, fraction = divmod(abs(cents), CENTS_PER_DOLLAR)
+    return f"{sign}{whole}.{fraction:02d}"
@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from customer import OVERDRAFT_FEE, balance_change
+from history import TransactionStore
+from journal import Journal
+from money import format_money, parse_money
+from storage import CSVStorage, Storage, write_json_atomic
+from typing import Dict, Any, Optional
+
+ACCOUNT_FIELDS = {'CHECKING': 'checking_balance', 'SAVINGS': 'savings_balance'}
+
+
+class ReconciliationState:
+    def __init__(self, path: str):
+        self.path = path
+        self.last_seq = 0
+        self.transactions = 0
+        self.transfer_net = 0
+        # Last balance_after seen per "cust_id:ACCOUNT", and the balance an account already had
+        # when its history starts (customers created before history was kept).
+        self.balances = {}
+        self.openings = {}
+        # Checkpoints append only the accounts changed since the previous one to <path>.journal; the full
+        # state is rewritten once the journal has grown as large as it.
+        self.journal = Journal(path + ".journal")
+        self.changed = set()
+        self.journaled = 0
+        saved_seq = 0
+        if os.path.exists(path):
+            with open(path, 'r') as file:
+                state = json.load(file)
+            self.load(state)
+            saved_seq = self.last_seq
+        for record in self.journal.replay():
+            # A crash between rewriting the state and removing the journal leaves records it already holds.
+            if record['last_seq'] > saved_seq:
+                self.load(record)
+                self.journaled += len(record['balances'])
+
+    def load(self, state: Dict[str, Any]):
+        self.last_seq = state['last_seq']
+        self.transactions = state['transactions']
+        self.transfer_net = state['transfer_net']
+        self.balances.update(state['balances'])
+        self.openings.update(state['openings'])
+
+    def save(self):
+        if not self.changed:
+            return
+        if self.journaled + len(self.changed) > len(self.balances):
+            self.compact()
+            return
+        self.journal.append([{
+            'last_seq': self.last_seq,
+            'transactions': self.transactions,
+            'transfer_net': self.transfer_net,
+            'balances': {key: self.balances[key] for key in self.changed},
+            'openings': {key: self.openings[key] for key in self.changed if key in self.openings}
+        }])
+        self.journaled += len(self.changed)
+        self.changed.clear()
+
+    def compact(self):
+        write_json_atomic(self.path, {
+            'last_seq': self.last_seq,
+            'transactions': self.transactions,
+            'transfer_net': self.transfer_net,
+            'balances': self.balances,
+            'openings': self.openings
+        })
+        self.journal.close()
+        if os.path.exists(self.journal.path):
+            os.remove(self.journal.path)
+        self.journal.valid_size = None
+        self.journaled = 0
+        self.changed.clear()
+
+    def close(self):
+        self.journal.close()
+
+
+class Reconciler:
+    def __init__(self, history: TransactionStore, storage: Storage, state_file: str,
+                 checkpoint_every: int = 10000, max_examples: int = 100):
+        self.history = history
+        self.storage = storage
+        self.state = ReconciliationState(state_file)
+        self.checkpoint_every = checkpoint_every
+        self.max_examples = max_examples
+        self.issues = Counter()
+        self.examples = []
+        # Balances held by accounts with no history at all, e.g. customers loaded from a legacy bank.csv.
+        # Like an opening balance there is nothing to check them against, so they are counted, not flagged.
+        self.untracked = 0
+
+    def flag(self, kind: str, **details):
+        self.issues[kind] += 1
+        if len(self.examples) < self.max_examples:
+            self.examples.append(dict(details, kind=kind))
+
+    def movements(self, row: Dict[str, Any]) -> Optional[tuple]:
+        change = balance_change(row)
+        if change is None:
+            return None
+        if row['type'] == 'WITHDRAWAL':
+            # The description is only a hint, so a withdrawal may chain with or without the overdraft fee.
+            if change < -row['amount']:
+                return (change, -row['amount'])
+            return (change, change - OVERDRAFT_FEE)
+        return (change,)
+
+    def scan_history(self) -> int:
+        state = self.state
+        processed = 0
+        for row in self.history.scan(state.last_seq):
+            key = f"{row['cust_id']}:{row['account']}"
+            balance = row['balance_after']
+            previous = state.balances.get(key)
+            movements = self.movements(row)
+
+            if movements is None:
+                self.flag('unknown_type', seq=row['seq'], cust_id=row['cust_id'], type=row['type'])
+            elif previous is None:
+                opening = balance - movements[0]
+                if opening:
+                    state.openings[key] = opening
+            elif balance - previous not in movements:
+                self.flag('broken_chain', seq=row['seq'], cust_id=row['cust_id'], account=row['account'],
+                          expected=previous + movements[0], actual=balance)
+            # Resynchronise on the recorded balance so one bad row is reported once, not for every row after it.
+            state.balances[key] = balance
+            state.changed.add(key)
+
+            if row['type'] == 'TRANSFER_OUT':
+                state.transfer_net -= row['amount']
+            elif row['type'] == 'TRANSFER_IN':
+                state.transfer_net += row['amount']
+
+            state.last_seq = row['seq']
+            state.transactions += 1
+            processed += 1
+            if processed % self.checkpoint_every == 0:
+                state.save()
+
+        state.save()
+        return processed
+
+    def check_snapshot(self) -> int:
+        # Run against an idle bank: postings made while this streams would show up as drift.
+        balances = self.state.balances
+        seen = set()
+        customers = 0
+        for row in self.storage.rows():
+            customers += 1
+            for account, field in ACCOUNT_FIELDS.items():
+                key = f"{row['id']}:{account}"
+                actual = parse_money(row.get(field) or '0')
+                expected = balances.get(key)
+                if expected is None:
+                    if actual:
+                        self.untracked += 1
+                    continue
+                seen.add(key)
+                if expected != actual:
+                    self.flag('drift', cust_id=row['id'], account=account, expected=expected, actual=actual)
+
+        for key in balances.keys() - seen:
+            cust_id, account = key.rsplit(':', 1)
+            self.flag('missing_from_snapshot', cust_id=cust_id, account=account, expected=balances[key])
+        return customers
+
+    def run(self) -> Dict[str, Any]:
+        processed = self.scan_history()
+        customers = self.check_snapshot()
+        if self.state.transfer_net:
+            self.flag('transfer_imbalance', net=self.state.transfer_net)
+        return {
+            'processed': processed,
+            'last_seq': self.state.last_seq,
+            'transactions': self.state.transactions,
+            'customers': customers,
+            'accounts': len(self.state.balances),
+            'unverified_openings': len(self.state.openings),
+            'untracked_balances': self.untracked,
+            'transfer_net': self.state.transfer_net,
+            'issues': dict(self.issues),
+            'examples': self.examples
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile bank.csv against the persisted transaction history")
+    parser.add_argument("--bank", default="bank.csv")
+    parser.add_argument("--history", help="history database (default: <bank>_history.db)")
+    parser.add_argument("--state", help="checkpoint file (default: <bank>_reconcile.json)")
+    parser.add_argument("--reset", action="store_true", help="discard the checkpoint and rescan all history")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    stem = os.path.splitext(args.bank)[0]
+    state_file = args.state or stem + "_reconcile.json"
+    if args.reset:
+        for path in (state_file, state_file + ".journal"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    history = TransactionStore(args.history or stem + "_history.db")
+    storage = CSVStorage(args.bank)
+    reconciler = Reconciler(history, storage, state_file)
+    try:
+        report = reconciler.run()
+    finally:
+        reconciler.state.close()
+        storage.close()
+        history.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Transactions checked: {report['processed']} new, {report['transactions']} total")
+        print(f"Customers checked: {report['customers']} ({report['accounts']} accounts with history)")
+        print(f"Transfer net: ${format_money(report['transfer_net'])}")
+        if report['unverified_openings']:
+            print(f"Accounts with history starting mid-balance: {report['unverified_openings']}")
+        if report['untracked_balances']:
+            print(f"Accounts with a balance but no history yet: {report['untracked_balances']}")
+        for kind, count in sorted(report['issues'].items()):
+            print(f"{kind}: {count}")
+        for example in report['examples'][:10]:
+            print(f"  {example}")
+        print("Ledger reconciled" if not report['issues'] else "Discrepancies found")
+    sys.exit(1 if report['issues'] else 0)
+
+
+if __name__ == "__main__":
+    main()
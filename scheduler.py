@@ -0,0 +1,369 @@
+import argparse
+import calendar
+import heapq
+import json
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+import metrics
+from bank import Bank
+from money import format_money, parse_amount
+from transaction import TIMESTAMP_FORMAT
+from typing import Dict, Any, List, Optional
+
+FREQUENCIES = ('once', 'daily', 'weekly', 'monthly')
+ACCOUNTS = ('CHECKING', 'SAVINGS')
+# Failures worth trying again later; anything else (a missing customer or account) will not fix itself.
+RETRYABLE = ("Insufficient funds", "deactivated", "declined")
+UPDATE = """UPDATE schedules SET status = ?, next_run = ?, occurrence = ?, remaining = ?, attempts = ?,
+                   last_run = ?, last_result = ?
+            WHERE id = ? AND status = 'active' AND next_run = ?"""
+
+
+def occurrence_time(anchor: int, every: str, occurrence: int) -> int:
+    # Occurrences are counted from the first run rather than chained, so a monthly order on the 31st
+    # lands on the last day of short months and goes back to the 31st afterwards.
+    start = datetime.fromtimestamp(anchor)
+    if every == 'daily':
+        moment = start + timedelta(days=occurrence)
+    elif every == 'weekly':
+        moment = start + timedelta(weeks=occurrence)
+    elif every == 'monthly':
+        months = start.month - 1 + occurrence
+        year, month = start.year + months // 12, months % 12 + 1
+        moment = start.replace(year=year, month=month, day=min(start.day, calendar.monthrange(year, month)[1]))
+    else:
+        raise ValueError(f"{every} schedules have no further occurrences")
+    return int(moment.timestamp())
+
+
+def parse_time(text: str) -> int:
+    text = text.strip()
+    try:
+        moment = datetime.strptime(text, TIMESTAMP_FORMAT)
+    except ValueError:
+        moment = datetime.strptime(text, "%Y-%m-%d")
+    return int(moment.timestamp())
+
+
+def format_time(timestamp: Optional[int]) -> str:
+    return datetime.fromtimestamp(timestamp).strftime(TIMESTAMP_FORMAT) if timestamp is not None else "-"
+
+
+class RetryPolicy:
+    def __init__(self, attempts: int = 3, delay: int = 3600, backoff: float = 2.0):
+        # attempts counts the first try, so the default retries twice: after an hour, then two more.
+        self.attempts = attempts
+        self.delay = delay
+        self.backoff = backoff
+
+    def next_delay(self, attempts: int) -> Optional[int]:
+        if attempts >= self.attempts:
+            return None
+        return int(self.delay * self.backoff ** (attempts - 1))
+
+
+class Scheduler:
+    # Standing and one-off transfers. Every schedule lives in SQLite; only those due before the horizon
+    # (now + window) are held in a heap of (next_run, id), so each tick pops what is due in O(log n) and
+    # reads the next slice of the time index, never the whole table. Heap entries are checked against the
+    # row when popped, so cancelling or rescheduling leaves stale entries behind instead of searching for them.
+    def __init__(self, path: str = "bank_schedules.db", retry: Optional[RetryPolicy] = None,
+                 window: int = 3600, clock=time.time):
+        self.path = path
+        self.retry = retry or RetryPolicy()
+        self.window = window
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.heap = []
+        self.horizon = None
+        self.last_id = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS schedules (
+                id INTEGER PRIMARY KEY,
+                cust_id TEXT NOT NULL,
+                from_account TEXT NOT NULL,
+                to_cust_id TEXT,
+                to_account TEXT NOT NULL,
+                amount INTEGER NOT NULL,
+                every TEXT NOT NULL,
+                anchor INTEGER NOT NULL,
+                occurrence INTEGER NOT NULL DEFAULT 0,
+                remaining INTEGER,
+                next_run INTEGER NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'active',
+                last_run INTEGER,
+                last_result TEXT,
+                description TEXT NOT NULL DEFAULT ''
+            );
+            CREATE INDEX IF NOT EXISTS idx_schedules_due ON schedules (next_run) WHERE status = 'active';
+            CREATE INDEX IF NOT EXISTS idx_schedules_customer ON schedules (cust_id);
+        """)
+
+    def add(self, cust_id: str, from_account: str, amount: int, start: int, every: str = 'once',
+            to_cust_id: Optional[str] = None, to_account: Optional[str] = None, count: Optional[int] = None,
+            description: str = "") -> int:
+        # Without a receiver the transfer is between the customer's own accounts, to the other one.
+        from_account = from_account.upper()
+        if from_account not in ACCOUNTS:
+            raise ValueError(f"Invalid account type: {from_account}")
+        if to_cust_id is None:
+            to_account = "SAVINGS" if from_account == "CHECKING" else "CHECKING"
+        else:
+            to_account = (to_account or "CHECKING").upper()
+            if to_account not in ACCOUNTS:
+                raise ValueError(f"Invalid account type: {to_account}")
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+        if every not in FREQUENCIES:
+            raise ValueError(f"Unknown frequency: {every}")
+        if count is not None and count <= 0:
+            raise ValueError("Count must be positive")
+        if every == 'once':
+            count = 1
+
+        start = int(start)
+        with self.lock:
+            schedule_id = self.conn.execute(
+                "INSERT INTO schedules (cust_id, from_account, to_cust_id, to_account, amount, every, anchor, "
+                "remaining, next_run, description) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (cust_id, from_account, to_cust_id, to_account, amount, every, start, count, start,
+                 description)).lastrowid
+            self.conn.commit()
+        return schedule_id
+
+    def cancel(self, schedule_id: int) -> bool:
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE schedules SET status = 'cancelled' WHERE id = ? AND status = 'active'", (schedule_id,))
+            self.conn.commit()
+        return cursor.rowcount > 0
+
+    def get(self, schedule_id: int) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM schedules WHERE id = ?", (schedule_id,)).fetchone()
+        return dict(row) if row else None
+
+    def for_customer(self, cust_id: str) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM schedules WHERE cust_id = ? ORDER BY id", (cust_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def pending(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM schedules WHERE status = 'active'").fetchone()[0]
+
+    def refill(self, now: int):
+        # Picks up schedules added since the last refill, here or by another process (scheduler.py add while
+        # run is going), by id: SQLite hands out increasing ids and schedules are never deleted. Those due
+        # before the horizon are queued now, later ones when the horizon reaches them. Then moves the horizon
+        # forward and loads the schedules that fall between the old and the new one.
+        horizon = now + self.window
+        if self.horizon is None:
+            self.last_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM schedules").fetchone()[0]
+            sql, params = "SELECT next_run, id FROM schedules WHERE status = 'active' AND next_run < ?", (horizon,)
+        else:
+            for row in self.conn.execute("SELECT next_run, id, status FROM schedules WHERE id > ?", (self.last_id,)):
+                self.last_id = max(self.last_id, row[1])
+                if row[2] == 'active' and row[0] < self.horizon:
+                    heapq.heappush(self.heap, (row[0], row[1]))
+            if horizon <= self.horizon:
+                return
+            sql = "SELECT next_run, id FROM schedules WHERE status = 'active' AND next_run >= ? AND next_run < ?"
+            params = (self.horizon, horizon)
+        for row in self.conn.execute(sql, params):
+            heapq.heappush(self.heap, (row[0], row[1]))
+        self.horizon = horizon
+
+    def take_due(self, now: int) -> List[sqlite3.Row]:
+        with self.lock:
+            self.refill(now)
+            popped = {}
+            while self.heap and self.heap[0][0] <= now:
+                next_run, schedule_id = heapq.heappop(self.heap)
+                popped[schedule_id] = next_run
+            due = []
+            ids = list(popped)
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT * FROM schedules WHERE id IN ({', '.join('?' * len(chunk))})", chunk).fetchall()
+                due.extend(row for row in rows if row['status'] == 'active' and row['next_run'] == popped[row['id']])
+        due.sort(key=lambda row: (row['next_run'], row['id']))
+        return due
+
+    def post(self, bank: Bank, row: sqlite3.Row) -> tuple[bool, str]:
+        # Every occurrence and retry has its own next_run, so a retry really posts again, while a tick
+        # re-run after a crash (before the schedules were updated) is answered from the dedup store.
+        key = f"schedule-{row['id']}-{row['anchor']}-{row['next_run']}"
+        try:
+            if row['to_cust_id'] is None:
+                return bank.transfer_internal(row['cust_id'], row['from_account'], row['amount'],
+                                              idempotency_key=key)
+            return bank.transfer_between_customers(row['cust_id'], row['to_cust_id'], row['from_account'],
+                                                   row['to_account'], row['amount'], idempotency_key=key)
+        except Exception as error:
+            return False, f"Transfer failed: {type(error).__name__}: {error}"
+
+    def outcome(self, row: sqlite3.Row, success: bool, message: str, now: int) -> tuple[str, tuple]:
+        status = 'active'
+        next_run = row['next_run']
+        occurrence = row['occurrence']
+        remaining = row['remaining']
+        attempts = row['attempts'] + 1
+        recurring = row['every'] != 'once'
+        following = occurrence_time(row['anchor'], row['every'], occurrence + 1) if recurring else None
+
+        if success:
+            result = 'posted'
+        elif not any(reason in message for reason in RETRYABLE):
+            result = 'failed'
+        else:
+            delay = self.retry.next_delay(attempts)
+            if delay is not None and (following is None or now + delay < following):
+                result = 'retrying'
+                next_run = now + delay
+            else:
+                # Out of retries: a one-off transfer gives up, a standing order skips to its next occurrence.
+                result = 'missed' if recurring else 'failed'
+
+        if result in ('posted', 'missed'):
+            attempts = 0
+            remaining = remaining - 1 if remaining is not None else None
+            if recurring and remaining != 0:
+                occurrence += 1
+                next_run = following
+            else:
+                status = 'done'
+        elif result == 'failed':
+            status = 'failed'
+        return result, (status, next_run, occurrence, remaining, attempts, now, message,
+                        row['id'], row['next_run'])
+
+    def tick(self, bank: Bank, now: Optional[float] = None) -> Dict[str, Any]:
+        # Everything due is posted inside one bank batch and the schedules are updated in one transaction
+        # afterwards, so a tick costs one round of persistence however many transfers it makes.
+        now = int(self.clock() if now is None else now)
+        started = time.perf_counter()
+        due = self.take_due(now)
+        report = {'due': len(due), 'posted': 0, 'retrying': 0, 'missed': 0, 'failed': 0}
+        updates = []
+        with bank.batch():
+            for row in due:
+                success, message = self.post(bank, row)
+                result, update = self.outcome(row, success, message, now)
+                report[result] += 1
+                updates.append(update)
+                metrics.count('bank_scheduled_transfers_total', outcome=result)
+
+        with self.lock:
+            self.conn.executemany(UPDATE, updates)
+            self.conn.commit()
+            for update in updates:
+                if update[0] == 'active' and update[1] < self.horizon:
+                    heapq.heappush(self.heap, (update[1], update[7]))
+        report['seconds'] = time.perf_counter() - started
+        return report
+
+    def run(self, bank: Bank, interval: float = 60.0, stop: Optional[threading.Event] = None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.tick(bank)
+            stop.wait(interval)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def describe(schedule: Dict[str, Any]) -> str:
+    target = f"{schedule['to_cust_id']} {schedule['to_account']}" if schedule['to_cust_id'] else schedule['to_account']
+    repeat = schedule['every'] if schedule['remaining'] is None else f"{schedule['every']} x{schedule['remaining']}"
+    line = (f"#{schedule['id']} {schedule['cust_id']} {schedule['from_account']} -> {target} "
+            f"${format_money(schedule['amount'])} {repeat}, {schedule['status']}")
+    if schedule['status'] == 'active':
+        line += f", next {format_time(schedule['next_run'])}"
+    if schedule['last_result']:
+        line += f" (last: {schedule['last_result']})"
+    if schedule['description']:
+        line += f" - {schedule['description']}"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduled and recurring transfers")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="schedule a transfer")
+    add.add_argument("cust_id")
+    add.add_argument("from_account", choices=ACCOUNTS, type=str.upper)
+    add.add_argument("amount")
+    add.add_argument("--to", dest="to_cust_id", help="receiver (default: the customer's other account)")
+    add.add_argument("--to-account", choices=ACCOUNTS, type=str.upper, default="CHECKING")
+    add.add_argument("--start", help="YYYY-MM-DD [HH:MM:SS] (default: now)")
+    add.add_argument("--every", choices=FREQUENCIES, default='once')
+    add.add_argument("--count", type=int, help="stop after this many occurrences")
+    add.add_argument("--description", default="")
+
+    listing = commands.add_parser("list", help="show a customer's schedules")
+    listing.add_argument("cust_id")
+    listing.add_argument("--json", action="store_true")
+
+    cancel = commands.add_parser("cancel", help="cancel a schedule")
+    cancel.add_argument("schedule_id", type=int)
+
+    run = commands.add_parser("run", help="post due transfers")
+    run.add_argument("--bank", default="bank.csv")
+    run.add_argument("--once", action="store_true", help="run a single tick and exit")
+    run.add_argument("--interval", type=float, default=60.0, help="seconds between ticks")
+
+    parser.add_argument("--schedules", default="bank_schedules.db")
+    args = parser.parse_args()
+
+    scheduler = Scheduler(args.schedules)
+    try:
+        if args.command == "add":
+            start = parse_time(args.start) if args.start else int(time.time())
+            try:
+                schedule_id = scheduler.add(args.cust_id, args.from_account, parse_amount(args.amount), start,
+                                            args.every, args.to_cust_id, args.to_account, args.count,
+                                            args.description)
+            except ValueError as error:
+                sys.exit(str(error))
+            print(describe(scheduler.get(schedule_id)))
+        elif args.command == "list":
+            for schedule in scheduler.for_customer(args.cust_id):
+                if args.json:
+                    print(json.dumps(schedule))
+                else:
+                    print(describe(schedule))
+        elif args.command == "cancel":
+            if not scheduler.cancel(args.schedule_id):
+                sys.exit(f"No active schedule #{args.schedule_id}")
+            print(f"Cancelled schedule #{args.schedule_id}")
+        else:
+            bank = Bank(args.bank, lazy=True)
+            try:
+                if args.once:
+                    report = scheduler.tick(bank)
+                    print(f"Due {report['due']}: posted {report['posted']}, retrying {report['retrying']}, "
+                          f"missed {report['missed']}, failed {report['failed']} in {report['seconds']:.2f}s")
+                else:
+                    scheduler.run(bank, args.interval)
+            except KeyboardInterrupt:
+                pass
+            finally:
+                bank.close()
+    finally:
+        scheduler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+HASH_SCHEME = "pbkdf2_sha256"
+HASH_ITERATIONS = 200_000
+
+
+def hash_password(password: str, iterations: int = HASH_ITERATIONS) -> str:
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return f"{HASH_SCHEME}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def is_hashed(stored: str) -> bool:
+    return stored.startswith(HASH_SCHEME + "$")
+
+
+def verify_password(password: str, stored: str) -> bool:
+    if not is_hashed(stored):
+        # Rows written before hashing was introduced still hold the plaintext password.
+        return hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+
+    try:
+        _, iterations, salt, digest = stored.split('$')
+        candidate = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), bytes.fromhex(salt), int(iterations))
+    except ValueError:
+        return False
+    return hmac.compare_digest(candidate.hex(), digest)
+
+
+class CredentialCache:
+    def __init__(self, capacity: int = 10000, ttl: float = 300.0):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.key = os.urandom(32)
+        self.lock = threading.Lock()
+        self.verified = OrderedDict()
+        self.sessions = OrderedDict()
+
+    def fingerprint(self, cust_id: str, password: str, stored: str) -> bytes:
+        # Keyed with a per-process secret and bound to the stored hash, so a password change
+        # invalidates old entries and the cache never holds anything reusable outside this process.
+        message = f"{cust_id}\0{password}\0{stored}".encode('utf-8')
+        return hmac.new(self.key, message, hashlib.sha256).digest()
+
+    def check(self, fingerprint: bytes) -> bool:
+        with self.lock:
+            expires = self.verified.get(fingerprint)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self.verified[fingerprint]
+                return False
+            self.verified.move_to_end(fingerprint)
+            return True
+
+    def remember(self, fingerprint: bytes):
+        with self.lock:
+            self.verified[fingerprint] = time.monotonic() + self.ttl
+            self.verified.move_to_end(fingerprint)
+            while len(self.verified) > self.capacity:
+                self.verified.popitem(last=False)
+
+    def open_session(self, cust_id: str) -> str:
+        token = secrets.token_urlsafe(24)
+        with self.lock:
+            self.sessions[token] = (cust_id, time.monotonic() + self.ttl)
+            while len(self.sessions) > self.capacity:
+                self.sessions.popitem(last=False)
+        return token
+
+    def session(self, token: str) -> Optional[str]:
+        with self.lock:
+            entry = self.sessions.get(token)
+            if entry is None:
+                return None
+            cust_id, expires = entry
+            if expires < time.monotonic():
+                del self.sessions[token]
+                return None
+            # Sliding expiry: an active session stays valid for another ttl seconds.
+            self.sessions[token] = (cust_id, time.monotonic() + self.ttl)
+            self.sessions.move_to_end(token)
+            return cust_id
+
+    def close_session(self, token: str):
+        with self.lock:
+            self.sessions.pop(token, None)
@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+import json
+import metrics
+from concurrent.futures import ThreadPoolExecutor
+from bank import Bank
+from fraud import RuleEngine, default_rules, load_rules
+from money import format_money, parse_amount
+from typing import Dict, Any, Optional
+
+WRITE_OPS = ('deposit', 'withdraw', 'internal_transfer', 'transfer')
+
+
+class BankServer:
+    def __init__(self, bank: Bank, group_size: int = 256):
+        self.bank = bank
+        self.group_size = group_size
+        self.queue = None
+        self.writer_task = None
+        # Every posting runs on this one thread, so writes are serialized and committed in groups.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bank-writer")
+        self.connections = 0
+
+    async def start(self, host: Optional[str] = None, port: Optional[int] = None,
+                    path: Optional[str] = None, backlog: int = 1024) -> asyncio.AbstractServer:
+        self.queue = asyncio.Queue()
+        self.writer_task = asyncio.create_task(self.writer())
+        if path:
+            return await asyncio.start_unix_server(self.handle, path=path, backlog=backlog)
+        return await asyncio.start_server(self.handle, host, port, backlog=backlog)
+
+    async def stop(self):
+        if self.writer_task:
+            self.writer_task.cancel()
+            try:
+                await self.writer_task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=True)
+
+    async def write(self, function, *args, idempotency_key: Optional[str] = None) -> tuple[bool, str]:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((function, args, idempotency_key, future))
+        return await future
+
+    async def writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            group = [await self.queue.get()]
+            while len(group) < self.group_size and not self.queue.empty():
+                group.append(self.queue.get_nowait())
+
+            try:
+                results = await loop.run_in_executor(self.executor, self.apply, group)
+            except Exception as error:
+                results = [(False, f"Internal error: {error}")] * len(group)
+
+            for (_, _, _, future), result in zip(group, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def apply(self, group: list) -> list:
+        # One batch per group: the whole group is persisted with a single journal append.
+        results = []
+        with self.bank.batch():
+            for function, args, idempotency_key, _ in group:
+                try:
+                    results.append(function(*args, idempotency_key=idempotency_key))
+                except Exception as error:
+                    results.append((False, f"Internal error: {error}"))
+        return results
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        session = {'cust_id': None, 'token': None}
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError
+                except ValueError:
+                    response = {'ok': False, 'message': "Invalid request"}
+                else:
+                    response = await self.dispatch(request, session)
+                    response['id'] = request.get('id')
+                writer.write(json.dumps(response).encode('utf-8') + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            if session['token']:
+                self.bank.logout(session['token'])
+            writer.close()
+
+    async def dispatch(self, request: Dict[str, Any], session: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get('op')
+        if op == 'login':
+            return await self.login(request, session)
+
+        customer = None
+        if request.get('token'):
+            customer = self.bank.session_customer(request['token'])
+        elif session['cust_id']:
+            customer = self.bank.get_customer(session['cust_id'])
+        if not customer:
+            return {'ok': False, 'message': "Not logged in"}
+
+        if op == 'balance':
+            return {
+                'ok': True,
+                'cust_id': customer.cust_id,
+                'checking_balance': format_money(customer.checking_balance) if customer.has_checking else None,
+                'savings_balance': format_money(customer.savings_balance) if customer.has_savings else None,
+                'active': customer.active,
+                'overdraft_count': customer.overdraft_count
+            }
+
+        if op == 'logout':
+            if session['token']:
+                self.bank.logout(session['token'])
+            session['cust_id'] = session['token'] = None
+            return {'ok': True, 'message': "Logged out"}
+
+        if op not in WRITE_OPS:
+            return {'ok': False, 'message': f"Unknown operation: {op}"}
+
+        try:
+            amount = parse_amount(str(request.get('amount', '')))
+        except ValueError:
+            return {'ok': False, 'message': "Invalid amount"}
+
+        account_type = str(request.get('account', '')).upper()
+        # With a key, a client may retry or pipeline freely: a repeat gets the first attempt's result back.
+        key = str(request['idempotency_key']) if request.get('idempotency_key') else None
+        if op == 'deposit':
+            success, message = await self.write(self.bank.deposit, customer.cust_id, account_type, amount,
+                                                idempotency_key=key)
+        elif op == 'withdraw':
+            success, message = await self.write(self.bank.withdraw, customer.cust_id, account_type, amount,
+                                                idempotency_key=key)
+        elif op == 'internal_transfer':
+            success, message = await self.write(self.bank.transfer_internal, customer.cust_id, account_type, amount,
+                                                idempotency_key=key)
+        else:
+            success, message = await self.write(
+                self.bank.transfer_between_customers, customer.cust_id, str(request.get('to_cust_id', '')),
+                account_type, str(request.get('to_account', '')).upper(), amount, idempotency_key=key)
+        return {'ok': success, 'message': message}
+
+    async def login(self, request: Dict[str, Any], session: Dict[str, Any]) -> Dict[str, Any]:
+        cust_id = str(request.get('cust_id', ''))
+        password = str(request.get('password', ''))
+        # Password hashing is CPU bound, so it runs off the event loop.
+        customer = await asyncio.get_running_loop().run_in_executor(None, self.bank.auth_customer, cust_id, password)
+        if not customer:
+            return {'ok': False, 'message': "Invalid credentials or account deactivated"}
+
+        session['cust_id'] = customer.cust_id
+        if self.bank.credentials:
+            session['token'] = self.bank.credentials.open_session(customer.cust_id)
+        return {'ok': True, 'message': f"Welcome, {customer.first_name}!", 'token': session['token']}
+
+
+async def serve(args):
+    exporter = None
+    if args.metrics_socket:
+        metrics.enable()
+        exporter = metrics.serve_socket(args.metrics_socket)
+    rules = load_rules(args.rules) if args.rules else default_rules()
+    bank = Bank(args.bank, checkpoint_interval=30.0, rules=RuleEngine(rules))
+    server = BankServer(bank)
+    listener = await server.start(args.host, args.port, args.unix)
+    address = args.unix or f"{args.host}:{args.port}"
+    print(f"Serving AHMED Bank on {address}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.stop()
+        bank.close()
+        if exporter:
+            exporter.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Line-delimited JSON bank service")
+    parser.add_argument("--bank", default="bank.csv")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--metrics-socket", help="enable metrics and serve them as Prometheus text on this Unix socket")
+    parser.add_argument("--rules", help="JSON file of velocity rules (default: the built-in rules)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+import json
+import multiprocessing
+import os
+import threading
+import uuid
+import zlib
+from bank import Bank, transfer_message
+from customer import Customer
+from fraud import RuleEngine, rules_from_config
+from idempotency import DedupStore, idempotent
+from index import IdAllocator
+from storage import CSVStorage
+from typing import Dict, Any, List, Optional
+
+
+def shard_for(cust_id: str, shards: int) -> int:
+    if cust_id.isdigit():
+        return int(cust_id) % shards
+    return zlib.crc32(cust_id.encode('utf-8')) % shards
+
+
+def apply_step(prepared: Dict[str, Dict[str, Any]], record: Dict[str, Any]):
+    # 'prepare' opens a transaction, 'commit'/'abort' closes it, anything else ('debited', 'applying')
+    # adds its fields to the open record.
+    fields = {key: value for key, value in record.items() if key != 'event'}
+    if record['event'] == 'prepare':
+        prepared[record['txid']] = fields
+    elif record['event'] in ('commit', 'abort'):
+        prepared.pop(record['txid'], None)
+    elif record['txid'] in prepared:
+        prepared[record['txid']].update(fields)
+
+
+class PrepareLog:
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = 0
+        self.valid_size = None
+        self.file = None
+
+    def replay(self) -> Dict[str, Dict[str, Any]]:
+        prepared = {}
+        self.valid_size = 0
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as file:
+                for line in file:
+                    # As in Journal: a torn last line ends the replay and is cut off before the next append.
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    apply_step(prepared, record)
+                    self.valid_size += len(line)
+                    self.entries += 1
+        return prepared
+
+    def drop_torn_tail(self):
+        # Only what the last replay read is known to be whole; appends after that are, so it is done once.
+        if self.valid_size is not None and os.path.exists(self.path):
+            if os.path.getsize(self.path) > self.valid_size:
+                os.truncate(self.path, self.valid_size)
+        self.valid_size = None
+
+    def append(self, record: Dict[str, Any]):
+        if self.file is None:
+            self.drop_torn_tail()
+            self.file = open(self.path, 'a')
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.entries += 1
+
+    def reset(self):
+        self.close()
+        with open(self.path, 'w') as file:
+            file.flush()
+            os.fsync(file.fileno())
+        self.entries = 0
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class ShardBank(Bank):
+    # Every balance change of a cross-shard transfer is bracketed by prepare-log records written before
+    # and after it, and each record notes the balance it started from. A crash inside a bracket is settled on
+    # restart by comparing that balance with the customer's persisted one, so nothing is applied twice or lost.
+    def __init__(self, csv_file: str, **kwargs):
+        super().__init__(csv_file, **kwargs)
+        self.prepare_lock = threading.Lock()
+        self.prepare_log = PrepareLog(csv_file + ".2pc")
+        self.prepared = self.prepare_log.replay()
+        self.settle_interrupted()
+
+    def customer_row(self, cust_id: str) -> Optional[Dict[str, Any]]:
+        customer = self.get_customer(cust_id)
+        if not customer:
+            return None
+        with customer.lock:
+            return customer.to_dict()
+
+    def auth_row(self, cust_id: str, password: str) -> Optional[Dict[str, Any]]:
+        customer = self.auth_customer(cust_id, password)
+        return self.customer_row(customer.cust_id) if customer else None
+
+    def balance(self, customer: Customer, account_type: str) -> int:
+        return customer.checking_balance if account_type == "CHECKING" else customer.savings_balance
+
+    def record_step(self, txid: str, event: str, **fields):
+        record = dict(fields, txid=txid, event=event)
+        with self.prepare_lock:
+            self.prepare_log.append(record)
+            apply_step(self.prepared, record)
+            if not self.prepared and self.prepare_log.entries >= 1000:
+                self.prepare_log.reset()
+
+    def settle_interrupted(self):
+        for record in list(self.prepared.values()):
+            customer = self.get_customer(record['cust_id'])
+            if not customer:
+                continue
+            balance = self.balance(customer, record['account'])
+            if 'decision' in record:
+                # A credit was being applied; if it reached the journal only the decision is missing.
+                # Otherwise the record stays open and the coordinator's commit or abort applies it again.
+                if balance == record['balance_before'] + record['amount']:
+                    self.record_step(record['txid'], record['decision'])
+            elif record['role'] == 'debit' and not record.get('debited'):
+                if balance == record['balance_before'] - record['amount']:
+                    self.record_step(record['txid'], 'debited', debited=True)
+
+    def prepare_debit(self, txid: str, cust_id: str, account_type: str, amount: int,
+                      receiver: Dict[str, str]) -> tuple[bool, Any]:
+        customer = self.get_customer(cust_id)
+        if not customer:
+            return False, "Sender customer not found"
+
+        # The debit is taken at prepare time so no other posting can spend the reserved funds;
+        # an abort credits it back.
+        with self.locked(customer):
+            if not customer.active:
+                return False, "Sender account is deactivated"
+            if amount <= 0:
+                return False, "Amount must be positive"
+            if account_type == "CHECKING":
+                if not customer.has_checking:
+                    return False, "Sender does not have a checking account"
+                if customer.checking_balance < amount:
+                    return False, "Insufficient funds in sender's checking account"
+            elif account_type == "SAVINGS":
+                if not customer.has_savings:
+                    return False, "Sender does not have a savings account"
+                if customer.savings_balance < amount:
+                    return False, "Insufficient funds in sender's savings account"
+            else:
+                return False, "Invalid sender account type"
+
+            # Screened on the sender's shard like a single-shard transfer; it counts towards the windows on commit.
+            reason = self.screen('transfer', cust_id, amount, receiver['cust_id'])
+            if reason:
+                return False, reason
+
+            self.record_step(txid, 'prepare', role='debit', cust_id=cust_id, account=account_type, amount=amount,
+                             balance_before=self.balance(customer, account_type), counterparty=receiver['cust_id'])
+            if account_type == "CHECKING":
+                customer.checking_balance -= amount
+                balance = customer.checking_balance
+            else:
+                customer.savings_balance -= amount
+                balance = customer.savings_balance
+            customer.log_transaction("TRANSFER_OUT", account_type, amount, balance,
+                                     f"Transfer to {receiver['first_name']} {receiver['last_name']}")
+            self.save_customer(customer)
+            self.record_step(txid, 'debited', debited=True)
+            return True, self.party(customer)
+
+    def party(self, customer: Customer) -> Dict[str, str]:
+        return {'cust_id': customer.cust_id, 'first_name': customer.first_name, 'last_name': customer.last_name}
+
+    def prepare_credit(self, txid: str, cust_id: str, account_type: str, amount: int) -> tuple[bool, Any]:
+        customer = self.get_customer(cust_id)
+        if not customer:
+            return False, "Receiver customer not found"
+
+        with self.locked(customer):
+            if not customer.active:
+                return False, "Receiver account is deactivated"
+            if account_type == "CHECKING":
+                if not customer.has_checking:
+                    return False, "Receiver does not have a checking account"
+            elif account_type == "SAVINGS":
+                if not customer.has_savings:
+                    return False, "Receiver does not have a savings account"
+            else:
+                return False, "Invalid receiver account type"
+
+            self.record_step(txid, 'prepare', role='credit', cust_id=cust_id, account=account_type, amount=amount)
+            return True, self.party(customer)
+
+    def settle(self, txid: str, decision: str, description: str):
+        # The decision is logged only once the balance change it needs is in the journal.
+        with self.prepare_lock:
+            record = self.prepared.get(txid)
+        if record is None:
+            return
+        credit = record['role'] == 'credit' if decision == 'commit' else bool(record.get('debited'))
+        if not credit:
+            self.record_step(txid, decision)
+            if decision == 'commit':
+                self.remember_posting('transfer', record['cust_id'], record['amount'], record.get('counterparty'))
+            return
+
+        customer = self.get_customer(record['cust_id'])
+        with self.locked(customer):
+            self.record_step(txid, 'applying', decision=decision,
+                             balance_before=self.balance(customer, record['account']))
+            if record['account'] == "CHECKING":
+                customer.checking_balance += record['amount']
+                balance = customer.checking_balance
+            else:
+                customer.savings_balance += record['amount']
+                balance = customer.savings_balance
+            customer.log_transaction("TRANSFER_IN", record['account'], record['amount'], balance, description)
+            self.save_customer(customer)
+            self.record_step(txid, decision)
+
+    def commit(self, txid: str, description: str = "") -> bool:
+        self.settle(txid, 'commit', description)
+        return True
+
+    def abort(self, txid: str) -> bool:
+        self.settle(txid, 'abort', "Reversal of failed transfer")
+        return True
+
+    def in_doubt(self) -> list:
+        with self.prepare_lock:
+            return list(self.prepared)
+
+    def close(self):
+        with self.prepare_lock:
+            self.prepare_log.close()
+        super().close()
+
+
+def run_shard(conn, csv_file: str, options: Dict[str, Any]):
+    rules = options.pop('rules', None)
+    bank = ShardBank(csv_file, rules=RuleEngine(rules_from_config(rules)) if rules is not None else None, **options)
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            method, args = message
+            try:
+                conn.send((True, getattr(bank, method)(*args)))
+            except Exception as error:
+                conn.send((False, f"{type(error).__name__}: {error}"))
+    finally:
+        bank.close()
+        conn.close()
+
+
+class ShardedBank:
+    # rules is a fraud rule config (the JSON list fraud.load_rules reads); every shard screens with it.
+    # Idempotency keys are kept here, in front of the routing, so single- and cross-shard postings share them.
+    def __init__(self, base: str = "bank", shards: int = 4, keep_history: bool = True,
+                 rules: Optional[List[Dict[str, Any]]] = None, idempotency_ttl: Optional[float] = 24 * 3600.0):
+        self.base = base
+        self.shards = shards
+        self.connections = []
+        self.locks = []
+        self.processes = []
+        options = {'keep_history': keep_history, 'rules': rules, 'idempotency_ttl': None}
+        for index in range(shards):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=run_shard, args=(child, self.shard_file(index), options),
+                                              name=f"bank-shard-{index}", daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.locks.append(threading.Lock())
+            self.processes.append(process)
+
+        self.ids = IdAllocator(CSVStorage(f"{base}.coordinator.csv"))
+        self.decision_file = f"{base}.decisions"
+        self.decision_lock = threading.Lock()
+        self.recover()
+        self.decisions = open(self.decision_file, 'a')
+        self.dedup = DedupStore(f"{base}.idempotency", ttl=idempotency_ttl) if idempotency_ttl else None
+
+    def shard_file(self, index: int) -> str:
+        return f"{self.base}.shard{index}.csv"
+
+    def call(self, shard: int, method: str, *args):
+        with self.locks[shard]:
+            self.connections[shard].send((method, args))
+            ok, result = self.connections[shard].recv()
+        if not ok:
+            raise RuntimeError(f"shard {shard} {method} failed: {result}")
+        return result
+
+    def route(self, cust_id: str) -> int:
+        return shard_for(cust_id, self.shards)
+
+    def recover(self):
+        committed = set()
+        if os.path.exists(self.decision_file):
+            with open(self.decision_file, 'r') as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if record['decision'] == 'commit':
+                        committed.add(record['txid'])
+
+        # Anything still prepared on a shard commits only if the coordinator logged the decision.
+        for shard in range(self.shards):
+            for txid in self.call(shard, 'in_doubt'):
+                if txid in committed:
+                    self.call(shard, 'commit', txid, "Transfer (recovered)")
+                else:
+                    self.call(shard, 'abort', txid)
+
+        with open(self.decision_file, 'w') as file:
+            file.flush()
+            os.fsync(file.fileno())
+
+    def log_decision(self, txid: str, decision: str):
+        with self.decision_lock:
+            self.decisions.write(json.dumps({'txid': txid, 'decision': decision}) + "\n")
+            self.decisions.flush()
+            os.fsync(self.decisions.fileno())
+
+    def get_customer(self, cust_id: str) -> Optional[Dict[str, Any]]:
+        return self.call(self.route(cust_id), 'customer_row', cust_id)
+
+    def auth_customer(self, cust_id: str, password: str) -> Optional[Dict[str, Any]]:
+        return self.call(self.route(cust_id), 'auth_row', cust_id, password)
+
+    def next_id_floor(self) -> int:
+        return max(self.call(shard, 'next_id_floor') for shard in range(self.shards))
+
+    def add_customer(self, first_name: str, last_name: str, password: str,
+                     checking: bool = False, savings: bool = False) -> str:
+        cust_id = self.ids.allocate(self.next_id_floor)
+        return self.call(self.route(cust_id), 'add_customer', first_name, last_name, password,
+                         checking, savings, cust_id)
+
+    @idempotent('deposit')
+    def deposit(self, cust_id: str, account_type: str, amount: int) -> tuple[bool, str]:
+        return self.call(self.route(cust_id), 'deposit', cust_id, account_type, amount)
+
+    @idempotent('withdraw')
+    def withdraw(self, cust_id: str, account_type: str, amount: int) -> tuple[bool, str]:
+        return self.call(self.route(cust_id), 'withdraw', cust_id, account_type, amount)
+
+    @idempotent('internal_transfer')
+    def transfer_internal(self, cust_id: str, from_account_type: str, amount: int) -> tuple[bool, str]:
+        return self.call(self.route(cust_id), 'transfer_internal', cust_id, from_account_type, amount)
+
+    @idempotent('transfer')
+    def transfer_between_customers(self, from_cust_id: str, to_cust_id: str,
+                                   from_account_type: str, to_account_type: str, amount: int) -> tuple[bool, str]:
+        from_shard = self.route(from_cust_id)
+        to_shard = self.route(to_cust_id)
+        if from_shard == to_shard:
+            return self.call(from_shard, 'transfer_between_customers', from_cust_id, to_cust_id,
+                             from_account_type, to_account_type, amount)
+
+        txid = uuid.uuid4().hex
+        ok, receiver = self.call(to_shard, 'prepare_credit', txid, to_cust_id, to_account_type, amount)
+        if not ok:
+            return False, receiver
+
+        ok, sender = self.call(from_shard, 'prepare_debit', txid, from_cust_id, from_account_type, amount, receiver)
+        if not ok:
+            self.call(to_shard, 'abort', txid)
+            return False, sender
+
+        # The decision is durable before phase two, so recovery can finish a half-applied transfer.
+        self.log_decision(txid, 'commit')
+        self.call(to_shard, 'commit', txid, f"Transfer from {sender['first_name']} {sender['last_name']}")
+        self.call(from_shard, 'commit', txid)
+        return True, transfer_message(sender['first_name'], receiver['first_name'], from_account_type,
+                                      to_account_type, amount)
+
+    def close(self):
+        for shard, connection in enumerate(self.connections):
+            with self.locks[shard]:
+                connection.send(None)
+        for process in self.processes:
+            process.join()
+        with self.decision_lock:
+            self.decisions.close()
+        if self.dedup:
+            self.dedup.close()
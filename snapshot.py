@@ -0,0 +1,289 @@
+import argparse
+import os
+import struct
+import sys
+import zlib
+from contextlib import nullcontext
+from array import array
+from journal import Journal
+from storage import CSVStorage, format_row, fsync_directory, to_cents, to_flag, write_csv_atomic
+from typing import Callable, ContextManager, Dict, Any, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"BANKSNAP"
+VERSION = 1
+HEADER = struct.Struct('<8sHBxQ')
+SECTION = struct.Struct('<QQI')
+CODECS = {'none': 0, 'zlib': 1, 'zstd': 2}
+CODEC_NAMES = {number: name for name, number in CODECS.items()}
+SEPARATOR = "\x00"
+
+CHECKING = 1
+SAVINGS = 2
+ACTIVE = 4
+
+TEXT_COLUMNS = ('id', 'first_name', 'last_name', 'password')
+NUMBER_COLUMNS = (('flags', 'B'), ('checking_balance', 'q'), ('savings_balance', 'q'), ('overdraft_count', 'q'))
+
+
+def default_codec() -> str:
+    return 'zstd' if zstandard is not None else 'zlib'
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package")
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if codec == 'zlib':
+        return zlib.compress(data, 6)
+    return data
+
+
+def decompress(data: bytes, codec: str, size: int) -> bytes:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ValueError("this snapshot is zstd-compressed; install the zstandard package to read it")
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=size)
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    return data
+
+
+def little_endian(values: array) -> array:
+    # Columns are stored little-endian so a snapshot can move between machines.
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class Snapshot:
+    def __init__(self, count: int = 0):
+        self.count = count
+        self.text = {name: [] for name in TEXT_COLUMNS}
+        self.numbers = {name: array(typecode) for name, typecode in NUMBER_COLUMNS}
+
+    def __len__(self) -> int:
+        return self.count
+
+    @classmethod
+    def from_rows(cls, rows) -> 'Snapshot':
+        snapshot = cls()
+        ids, first_names, last_names, passwords = (snapshot.text[name] for name in TEXT_COLUMNS)
+        flags, checking, savings, overdrafts = (snapshot.numbers[name] for name, _ in NUMBER_COLUMNS)
+        for row in rows:
+            ids.append(str(row['id']))
+            first_names.append(row['first_name'])
+            last_names.append(row['last_name'])
+            passwords.append(row['password'])
+            flags.append((CHECKING if to_flag(row.get('has_checking', 'False')) else 0) |
+                         (SAVINGS if to_flag(row.get('has_savings', 'False')) else 0) |
+                         (ACTIVE if to_flag(row.get('active', 'True')) else 0))
+            checking.append(to_cents(row.get('checking_balance', '0')))
+            savings.append(to_cents(row.get('savings_balance', '0')))
+            overdrafts.append(int(row.get('overdraft_count', '0')))
+        snapshot.count = len(ids)
+        return snapshot
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        # Typed rows in the shape of Customer.to_dict().
+        columns = [self.text[name] for name in TEXT_COLUMNS] + [self.numbers[name] for name, _ in NUMBER_COLUMNS]
+        for cust_id, first_name, last_name, password, flags, checking, savings, overdrafts in zip(*columns):
+            yield {
+                'id': cust_id,
+                'first_name': first_name,
+                'last_name': last_name,
+                'password': password,
+                'has_checking': bool(flags & CHECKING),
+                'has_savings': bool(flags & SAVINGS),
+                'active': bool(flags & ACTIVE),
+                'checking_balance': checking,
+                'savings_balance': savings,
+                'overdraft_count': overdrafts
+            }
+
+    def rows(self) -> Iterator[Dict[str, str]]:
+        # The same strings Bank writes for a customer, so CSV -> binary -> CSV is byte-for-byte stable.
+        return map(format_row, self.records())
+
+    def sections(self) -> Iterator[bytes]:
+        for name in TEXT_COLUMNS:
+            values = self.text[name]
+            if any(SEPARATOR in value for value in values):
+                raise ValueError(f"{name} values cannot contain NUL characters")
+            yield SEPARATOR.join(values).encode('utf-8')
+        for name, _ in NUMBER_COLUMNS:
+            yield little_endian(self.numbers[name]).tobytes()
+
+
+def write_snapshot(path: str, snapshot: Snapshot, codec: Optional[str] = None) -> int:
+    codec = codec or default_codec()
+    temp_file = path + ".tmp"
+    with open(temp_file, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, CODECS[codec], snapshot.count))
+        for raw in snapshot.sections():
+            stored = compress(raw, codec)
+            file.write(SECTION.pack(len(raw), len(stored), zlib.crc32(raw)))
+            file.write(stored)
+        file.flush()
+        os.fsync(file.fileno())
+        bytes_written = file.tell()
+    os.replace(temp_file, path)
+    fsync_directory(path)
+    return bytes_written
+
+
+def read_snapshot(path: str) -> Snapshot:
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    magic, version, codec_number, count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a bank snapshot")
+    if version != VERSION:
+        raise ValueError(f"{path} has unsupported snapshot version {version}")
+    codec = CODEC_NAMES[codec_number]
+
+    snapshot = Snapshot(count)
+    offset = HEADER.size
+    sections = []
+    for _ in range(len(TEXT_COLUMNS) + len(NUMBER_COLUMNS)):
+        size, stored_size, checksum = SECTION.unpack_from(data, offset)
+        offset += SECTION.size
+        raw = decompress(data[offset:offset + stored_size], codec, size)
+        offset += stored_size
+        if len(raw) != size or zlib.crc32(raw) != checksum:
+            raise ValueError(f"{path} is corrupt: a column failed its checksum")
+        sections.append(raw)
+
+    for name, raw in zip(TEXT_COLUMNS, sections):
+        snapshot.text[name] = raw.decode('utf-8').split(SEPARATOR) if count else []
+    for (name, typecode), raw in zip(NUMBER_COLUMNS, sections[len(TEXT_COLUMNS):]):
+        values = array(typecode)
+        values.frombytes(raw)
+        snapshot.numbers[name] = little_endian(values)
+
+    if any(len(column) != count for column in list(snapshot.text.values()) + list(snapshot.numbers.values())):
+        raise ValueError(f"{path} is corrupt: column lengths do not match the row count")
+    return snapshot
+
+
+class SnapshotStorage(CSVStorage):
+    # The journal works exactly as with CSV; only the compacted snapshot is binary.
+    preload = True
+
+    def __init__(self, snapshot_file: str = "bank.snap", journal_file: Optional[str] = None,
+                 codec: Optional[str] = None):
+        super().__init__(snapshot_file, journal_file)
+        self.snapshot_file = snapshot_file
+        self.codec = codec
+
+    def snapshot(self) -> Snapshot:
+        if not os.path.exists(self.snapshot_file):
+            return Snapshot()
+        return read_snapshot(self.snapshot_file)
+
+    def merged(self, rows: Iterator[Dict]) -> Iterator[Dict]:
+        changed = self.changed_rows()
+        for row in rows:
+            yield changed.pop(row['id'], row)
+        yield from changed.values()
+
+    def rows(self) -> Iterator[Dict[str, str]]:
+        return self.merged(self.snapshot().rows())
+
+    def records(self) -> Iterator[Dict]:
+        return self.merged(self.snapshot().records())
+
+    def checkpoint(self, customers: dict, quiesced: Callable[[], ContextManager] = nullcontext) -> tuple[int, int]:
+        with quiesced(), self.lock:
+            snapshot = Snapshot.from_rows(customer.to_dict() for customer in list(customers.values()))
+            self.journal.rotate()
+
+        bytes_written = write_snapshot(self.snapshot_file, snapshot, self.codec)
+        self.journal.discard_pending()
+        return bytes_written, len(snapshot)
+
+
+def csv_to_snapshot(csv_file: str, snapshot_file: str, codec: Optional[str] = None) -> tuple[int, int]:
+    snapshot = read_all(CSVStorage(csv_file))
+    return write_snapshot(snapshot_file, snapshot, codec), len(snapshot)
+
+
+def open_snapshot_storage(snapshot_file: str = "bank.snap", csv_file: Optional[str] = "bank.csv",
+                          codec: Optional[str] = None) -> SnapshotStorage:
+    # The snapshot keeps its own journal (<snapshot>.journal), so its checkpoints never rotate away the CSV
+    # journal. A bank that has only run on CSV so far is converted first rather than starting out empty,
+    # including one that has never checkpointed and so far lives only in its journal.
+    if not os.path.exists(snapshot_file) and csv_file and any(map(os.path.exists, csv_files(csv_file))):
+        csv_to_snapshot(csv_file, snapshot_file, codec)
+    return SnapshotStorage(snapshot_file, codec=codec)
+
+
+def csv_files(csv_file: str) -> List[str]:
+    journal = Journal(csv_file + ".journal")
+    return [csv_file, journal.path, journal.pending_path]
+
+
+def read_all(storage: CSVStorage) -> Snapshot:
+    # The compacted file with the storage's journal replayed over it.
+    try:
+        return Snapshot.from_rows(storage.rows())
+    finally:
+        storage.close()
+
+
+def snapshot_to_csv(snapshot_file: str, csv_file: str) -> tuple[int, int]:
+    snapshot = read_all(SnapshotStorage(snapshot_file))
+    # The CSV journal predates the snapshot and would replay stale rows over the new file, so it goes first;
+    # a crash before the write leaves the snapshot untouched and the conversion can simply be run again.
+    for path in csv_files(csv_file)[1:]:
+        if os.path.exists(path):
+            os.remove(path)
+    fsync_directory(csv_file)
+    return write_csv_atomic(csv_file, snapshot.rows()), len(snapshot)
+
+
+def differences(csv_file: str, snapshot_file: str) -> List[str]:
+    expected = read_all(CSVStorage(csv_file))
+    found = read_all(SnapshotStorage(snapshot_file))
+    problems = []
+    if len(expected) != len(found):
+        problems.append(f"row count {len(found)} != {len(expected)}")
+    for want, got in zip(expected.rows(), found.rows()):
+        if want != got:
+            problems.append(f"customer {want['id']}: {got} != {want}")
+            if len(problems) >= 10:
+                break
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert bank.csv to and from the binary columnar snapshot")
+    parser.add_argument("command", choices=["to-binary", "to-csv", "verify"])
+    parser.add_argument("csv_file")
+    parser.add_argument("snapshot_file")
+    parser.add_argument("--codec", choices=sorted(CODECS), help="default: zstd when installed, else zlib")
+    args = parser.parse_args()
+
+    if args.command == "to-binary":
+        size, count = csv_to_snapshot(args.csv_file, args.snapshot_file, args.codec)
+        print(f"Wrote {count} customers to {args.snapshot_file} ({size} bytes)")
+    elif args.command == "to-csv":
+        size, count = snapshot_to_csv(args.snapshot_file, args.csv_file)
+        print(f"Wrote {count} customers to {args.csv_file} ({size} bytes)")
+    else:
+        problems = differences(args.csv_file, args.snapshot_file)
+        for problem in problems:
+            print(problem)
+        print("Snapshot matches" if not problems else "Snapshot differs")
+        sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from customer import balance_change
+from history import TransactionStore
+from money import format_money, parse_money
+from storage import CSVStorage
+from transaction import TIMESTAMP_FORMAT
+from typing import Dict, Any, Iterator, List, Optional
+
+ACCOUNTS = (('CHECKING', 'has_checking', 'checking_balance'), ('SAVINGS', 'has_savings', 'savings_balance'))
+RULE = "=" * 96
+ROW_FORMAT = "{:<19}  {:<12}  {:<34}  {:>12}  {:>12}"
+
+worker_history = None
+
+
+def month_bounds(month: str) -> tuple[str, str]:
+    start = datetime.strptime(month, "%Y-%m")
+    end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start.strftime(TIMESTAMP_FORMAT), end.strftime(TIMESTAMP_FORMAT)
+
+
+def balance_at(history: TransactionStore, row: Dict[str, str], account: str, field: str, moment: str) -> int:
+    previous = history.nearest(row['id'], account, moment)
+    if previous:
+        return previous['balance_after']
+    following = history.nearest(row['id'], account, moment, before=False)
+    if following:
+        return following['balance_after'] - (balance_change(following) or 0)
+    # No history at all: the account has not moved since the snapshot balance was written.
+    return parse_money(row.get(field) or '0')
+
+
+def account_periods(history: TransactionStore, row: Dict[str, str], start: str, end: str) -> Iterator[tuple]:
+    for account, flag, field in ACCOUNTS:
+        if (row.get(flag) or 'False').lower() != 'true':
+            continue
+        transactions = history.query(row['id'], start, end, account_type=account)
+        first = next(transactions, None)
+        if first is None:
+            yield account, balance_at(history, row, account, field, start), iter(())
+        else:
+            # The opening balance follows from the first row, so active accounts need no extra query.
+            opening = first['balance_after'] - (balance_change(first) or 0)
+            yield account, opening, itertools.chain((first,), transactions)
+
+
+def summarize(transactions: Iterator[Dict[str, Any]], totals: Dict[str, List[int]]) -> Iterator[tuple]:
+    # Passes each transaction through with its signed amount while the totals are kept up to date.
+    for transaction in transactions:
+        change = balance_change(transaction)
+        if change is None:
+            change = transaction['amount']
+        entry = totals.setdefault(transaction['type'], [0, 0])
+        entry[0] += 1
+        entry[1] += transaction['amount']
+        yield transaction, change
+
+
+def render_text(row: Dict[str, str], month: str, history: TransactionStore, start: str, end: str) -> Iterator[str]:
+    yield RULE
+    yield f"{'AHMED Bank - Monthly Statement':<80}{month:>16}"
+    yield f"Customer {row['id']}: {row['first_name']} {row['last_name']}"
+    yield RULE
+    for account, opening, transactions in account_periods(history, row, start, end):
+        totals = {}
+        closing = opening
+        yield f"{account} ACCOUNT"
+        yield ROW_FORMAT.format("", "", "Opening balance", "", format_money(opening))
+        yield ROW_FORMAT.format("Date", "Type", "Description", "Amount", "Balance")
+        for transaction, change in summarize(transactions, totals):
+            closing = transaction['balance_after']
+            yield ROW_FORMAT.format(transaction['timestamp'], transaction['type'], transaction['description'][:34],
+                                    format_money(change), format_money(closing))
+        yield ROW_FORMAT.format("", "", "Closing balance", "", format_money(closing))
+        for transaction_type, (count, amount) in sorted(totals.items()):
+            yield f"  {transaction_type:<12}  {count:>6} transaction(s)  {format_money(amount):>12}"
+        yield ""
+
+
+def render_json(row: Dict[str, str], month: str, history: TransactionStore, start: str, end: str) -> Iterator[str]:
+    accounts = []
+    for account, opening, transactions in account_periods(history, row, start, end):
+        totals = {}
+        closing = opening
+        entries = []
+        for transaction, change in summarize(transactions, totals):
+            closing = transaction['balance_after']
+            entries.append({'timestamp': transaction['timestamp'], 'type': transaction['type'],
+                            'description': transaction['description'], 'amount': format_money(change),
+                            'balance_after': format_money(closing)})
+        accounts.append({
+            'account': account,
+            'opening_balance': format_money(opening),
+            'closing_balance': format_money(closing),
+            'totals': {name: {'count': count, 'amount': format_money(amount)}
+                       for name, (count, amount) in sorted(totals.items())},
+            'transactions': entries
+        })
+    yield json.dumps({'cust_id': row['id'], 'name': f"{row['first_name']} {row['last_name']}",
+                      'month': month, 'accounts': accounts})
+
+
+RENDERERS = {'text': render_text, 'jsonl': render_json}
+EXTENSIONS = {'text': 'txt', 'jsonl': 'jsonl'}
+
+
+def write_statements(rows: List[Dict[str, str]], history: TransactionStore, month: str, fmt: str, path: str) -> int:
+    start, end = month_bounds(month)
+    render = RENDERERS[fmt]
+    with open(path, 'w') as file:
+        for row in rows:
+            for line in render(row, month, history, start, end):
+                file.write(line)
+                file.write("\n")
+    return len(rows)
+
+
+def init_worker(history_file: str):
+    global worker_history
+    worker_history = TransactionStore(history_file)
+
+
+def run_chunk(rows: List[Dict[str, str]], month: str, fmt: str, path: str) -> int:
+    return write_statements(rows, worker_history, month, fmt, path)
+
+
+def chunks(rows: Iterator[Dict[str, str]], size: int) -> Iterator[List[Dict[str, str]]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate_statements(bank_file: str, history_file: str, month: str, output_dir: str, fmt: str = 'text',
+                        workers: Optional[int] = None, chunk_size: int = 2000) -> Dict[str, Any]:
+    month_bounds(month)
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    storage = CSVStorage(bank_file)
+    parts = (os.path.join(output_dir, f"{month}-part-{index:05d}.{EXTENSIONS[fmt]}")
+             for index in itertools.count())
+    started = time.perf_counter()
+    statements = 0
+
+    if workers == 1:
+        history = TransactionStore(history_file)
+        try:
+            for chunk in chunks(storage.rows(), chunk_size):
+                statements += write_statements(chunk, history, month, fmt, next(parts))
+        finally:
+            history.close()
+    else:
+        # At most two chunks per worker are queued, so memory stays flat however many customers there are.
+        with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(history_file,)) as pool:
+            pending = set()
+            for chunk in chunks(storage.rows(), chunk_size):
+                pending.add(pool.submit(run_chunk, chunk, month, fmt, next(parts)))
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    statements += sum(future.result() for future in done)
+            statements += sum(future.result() for future in pending)
+    storage.close()
+
+    elapsed = time.perf_counter() - started
+    return {'statements': statements, 'seconds': elapsed,
+            'statements_per_second': statements / elapsed if elapsed else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write monthly statements for every customer")
+    parser.add_argument("--month", required=True, help="statement month as YYYY-MM")
+    parser.add_argument("--bank", default="bank.csv")
+    parser.add_argument("--history", help="history database (default: <bank>_history.db)")
+    parser.add_argument("--format", choices=sorted(RENDERERS), default='text')
+    parser.add_argument("--output", default="statements")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    history_file = args.history or os.path.splitext(args.bank)[0] + "_history.db"
+    report = generate_statements(args.bank, history_file, args.month, args.output, args.format,
+                                 args.workers, args.chunk_size)
+    print(f"Wrote {report['statements']} statements to {args.output} in {report['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,462 @@
+import argparse
+import csv
+import json
+import mmap
+import os
+import sqlite3
+import threading
+from contextlib import nullcontext
+from journal import Journal
+from money import format_money, parse_money
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+
+FIELDNAMES = ['id', 'first_name', 'last_name', 'password', 'has_checking', 'has_savings', 'active', 'checking_balance', 'savings_balance', 'overdraft_count']
+BOOL_FIELDS = ('has_checking', 'has_savings', 'active')
+MONEY_FIELDS = ('checking_balance', 'savings_balance')
+
+
+def to_flag(value) -> bool:
+    # Rows from text snapshots carry 'True'/'False'; typed snapshots hand over real booleans.
+    return value if isinstance(value, bool) else value.lower() == 'true'
+
+
+def to_cents(value) -> int:
+    return value if isinstance(value, int) else parse_money(value)
+
+
+def format_row(record: Dict[str, Any]) -> Dict[str, str]:
+    # Customer.to_dict() keeps balances in int cents; files and journals hold them as dollar strings.
+    return {key: format_money(value) if key in MONEY_FIELDS else str(value) for key, value in record.items()}
+
+
+def fsync_directory(path: str):
+    if hasattr(os, 'O_DIRECTORY'):
+        directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def write_json_atomic(path: str, data):
+    temp_file = path + ".tmp"
+    with open(temp_file, 'w') as file:
+        json.dump(data, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_file, path)
+    fsync_directory(path)
+
+
+def write_csv_atomic(path: str, rows) -> int:
+    temp_file = path + ".tmp"
+    with open(temp_file, 'w', newline='') as file:
+        # Journaled rows may carry extra keys (the fee totals Bank stamps on them), which files do not keep.
+        writer = csv.DictWriter(file, fieldnames=FIELDNAMES, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+        file.flush()
+        os.fsync(file.fileno())
+        bytes_written = file.tell()
+    os.replace(temp_file, path)
+    fsync_directory(path)
+    return bytes_written
+
+
+class Storage:
+    # Backends that preload hand every row to Bank at startup; the others are read on demand.
+    preload = True
+
+    def rows(self) -> Iterator[Dict[str, str]]:
+        raise NotImplementedError
+
+    def records(self) -> Iterator[Dict]:
+        # What Bank loads at startup; backends with typed columns may yield bools and int cents here.
+        return self.rows()
+
+    def get(self, cust_id: str) -> Optional[Dict[str, str]]:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def save(self, rows: List[Dict[str, str]]) -> int:
+        raise NotImplementedError
+
+    def checkpoint(self, customers: dict, quiesced: Callable[[], ContextManager] = nullcontext) -> tuple[int, int]:
+        # quiesced() holds off postings, so a copy of the customers taken under it never has half a transfer.
+        raise NotImplementedError
+
+    def reserve_ids(self, count: int, floor: Callable[[], int]) -> int:
+        raise NotImplementedError
+
+    def flows(self) -> List[int]:
+        # The latest fee totals stamped on rows saved since the last checkpoint, if any.
+        return []
+
+    def close(self):
+        pass
+
+
+class CSVStorage(Storage):
+    preload = True
+
+    def __init__(self, csv_file: str = "bank.csv", journal_file: Optional[str] = None):
+        self.csv_file = csv_file
+        self.meta_file = csv_file + ".meta"
+        self.journal = Journal(journal_file or csv_file + ".journal")
+        self.lock = threading.Lock()
+
+    def changed_rows(self) -> Dict[str, Dict[str, str]]:
+        changed = {}
+        with self.lock:
+            for row in Journal(self.journal.pending_path).replay():
+                changed[row['id']] = row
+            for row in self.journal.replay():
+                changed[row['id']] = row
+        return changed
+
+    def rows(self) -> Iterator[Dict[str, str]]:
+        changed = self.changed_rows()
+        if os.path.exists(self.csv_file):
+            with open(self.csv_file, 'r', newline='') as file:
+                for row in csv.DictReader(file):
+                    yield changed.pop(row['id'], row)
+
+        yield from changed.values()
+
+    def get(self, cust_id: str) -> Optional[Dict[str, str]]:
+        for row in self.rows():
+            if row['id'] == cust_id:
+                return row
+        return None
+
+    def count(self) -> int:
+        return sum(1 for _ in self.rows())
+
+    def save(self, rows: List[Dict[str, str]]) -> int:
+        with self.lock:
+            self.journal.append(rows)
+            return self.journal.entries
+
+    def flows(self) -> List[int]:
+        # Stamps only grow, so the largest one left after merging by customer is the last one written.
+        return max((row['flows'] for row in self.changed_rows().values() if 'flows' in row), default=[])
+
+    def checkpoint(self, customers: dict, quiesced: Callable[[], ContextManager] = nullcontext) -> tuple[int, int]:
+        with quiesced(), self.lock:
+            rows = [format_row(customer.to_dict()) for customer in list(customers.values())]
+            self.journal.rotate()
+
+        bytes_written = write_csv_atomic(self.csv_file, rows)
+        self.journal.discard_pending()
+        return bytes_written, len(rows)
+
+    def reserve_ids(self, count: int, floor: Callable[[], int]) -> int:
+        meta = {}
+        if os.path.exists(self.meta_file):
+            with open(self.meta_file, 'r') as file:
+                meta = json.load(file)
+
+        start = meta['next_id'] if 'next_id' in meta else floor()
+        meta['next_id'] = start + count
+
+        write_json_atomic(self.meta_file, meta)
+        return start
+
+    def close(self):
+        with self.lock:
+            self.journal.close()
+
+
+class MmapCSVStorage(CSVStorage):
+    preload = False
+
+    def __init__(self, csv_file: str = "bank.csv", journal_file: Optional[str] = None):
+        super().__init__(csv_file, journal_file)
+        self.changed = {}
+        self.frozen = {}
+        for row in Journal(self.journal.pending_path).replay():
+            self.changed[row['id']] = row
+        for row in self.journal.replay():
+            self.changed[row['id']] = row
+        self.file = None
+        self.mm = None
+        self.open_snapshot()
+
+    def open_snapshot(self):
+        # Only id -> byte offset is kept; rows are parsed when somebody asks for them.
+        self.offsets = {}
+        self.header = FIELDNAMES
+        self.scan_pos = self.data_start = 0
+        if not os.path.exists(self.csv_file) or os.path.getsize(self.csv_file) == 0:
+            return
+
+        self.file = open(self.csv_file, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        header_end = self.mm.find(b'\n')
+        if header_end == -1:
+            header_end = len(self.mm)
+        self.header = next(csv.reader([self.mm[:header_end].decode('utf-8')]))
+        self.scan_pos = self.data_start = header_end + 1
+
+    def close_snapshot(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.file.close()
+        self.mm = None
+        self.file = None
+
+    def scan_to(self, key: Optional[bytes] = None) -> Optional[int]:
+        mm = self.mm
+        if mm is None:
+            return None
+
+        pos = self.scan_pos
+        end = len(mm)
+        found = None
+        while pos < end:
+            line_end = mm.find(b'\n', pos)
+            if line_end == -1:
+                line_end = end
+            comma = mm.find(b',', pos, line_end)
+            if comma != -1:
+                row_id = mm[pos:comma]
+                self.offsets[row_id] = pos
+                if row_id == key:
+                    found = pos
+                    pos = line_end + 1
+                    break
+            pos = line_end + 1
+        self.scan_pos = pos
+        return found
+
+    def iter_lines(self, mm: mmap.mmap, pos: int) -> Iterator[str]:
+        end = len(mm)
+        while pos < end:
+            line_end = mm.find(b'\n', pos)
+            if line_end == -1:
+                line_end = end
+            yield mm[pos:line_end].decode('utf-8')
+            pos = line_end + 1
+
+    def read_row(self, offset: int) -> Dict[str, str]:
+        line_end = self.mm.find(b'\n', offset)
+        if line_end == -1:
+            line_end = len(self.mm)
+        values = next(csv.reader([self.mm[offset:line_end].decode('utf-8')]))
+        return dict(zip(self.header, values))
+
+    def get(self, cust_id: str) -> Optional[Dict[str, str]]:
+        with self.lock:
+            row = self.changed.get(cust_id) or self.frozen.get(cust_id)
+            if row:
+                return row
+
+            key = cust_id.encode('utf-8')
+            offset = self.offsets.get(key)
+            if offset is None:
+                offset = self.scan_to(key)
+            return self.read_row(offset) if offset is not None else None
+
+    def rows(self) -> Iterator[Dict[str, str]]:
+        with self.lock:
+            mm = self.mm
+            header = self.header
+            data_start = self.data_start
+            changed = dict(self.frozen)
+            changed.update(self.changed)
+
+        if mm is not None:
+            for row in csv.DictReader(self.iter_lines(mm, data_start), fieldnames=header):
+                yield changed.pop(row['id'], row)
+
+        yield from changed.values()
+
+    def count(self) -> int:
+        with self.lock:
+            self.scan_to()
+            extra = set(self.changed) | set(self.frozen)
+            return len(self.offsets) + sum(1 for cust_id in extra if cust_id.encode('utf-8') not in self.offsets)
+
+    def save(self, rows: List[Dict[str, str]]) -> int:
+        with self.lock:
+            self.journal.append(rows)
+            for row in rows:
+                self.changed[row['id']] = row
+            return self.journal.entries
+
+    def checkpoint(self, customers: dict, quiesced: Callable[[], ContextManager] = nullcontext) -> tuple[int, int]:
+        with quiesced(), self.lock:
+            self.frozen.update(self.changed)
+            self.changed = {}
+            self.journal.rotate()
+
+        next_file = self.csv_file + ".next"
+        written = 0
+
+        def counted():
+            nonlocal written
+            for row in self.rows():
+                written += 1
+                yield row
+
+        bytes_written = write_csv_atomic(next_file, counted())
+        with self.lock:
+            # The old map has to be released before the rename on platforms that lock mapped files.
+            self.close_snapshot()
+            os.replace(next_file, self.csv_file)
+            fsync_directory(self.csv_file)
+            self.open_snapshot()
+            self.frozen = {}
+        self.journal.discard_pending()
+        return bytes_written, written
+
+    def close(self):
+        super().close()
+        with self.lock:
+            self.close_snapshot()
+
+
+class SQLiteStorage(Storage):
+    preload = False
+
+    def __init__(self, db_file: str = "bank.db", synchronous: str = "FULL"):
+        self.db_file = db_file
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={synchronous}")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS customers (
+                id TEXT PRIMARY KEY,
+                first_name TEXT NOT NULL,
+                last_name TEXT NOT NULL,
+                password TEXT NOT NULL,
+                has_checking INTEGER NOT NULL DEFAULT 0,
+                has_savings INTEGER NOT NULL DEFAULT 0,
+                active INTEGER NOT NULL DEFAULT 1,
+                checking_balance INTEGER NOT NULL DEFAULT 0,
+                savings_balance INTEGER NOT NULL DEFAULT 0,
+                overdraft_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.upsert_sql = (
+            f"INSERT INTO customers ({', '.join(FIELDNAMES)}) VALUES ({', '.join('?' for _ in FIELDNAMES)}) "
+            f"ON CONFLICT(id) DO UPDATE SET {', '.join(f'{name} = excluded.{name}' for name in FIELDNAMES[1:])}"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.select_sql = f"SELECT {', '.join(FIELDNAMES)} FROM customers"
+
+    def to_row(self, values: tuple) -> Dict[str, str]:
+        row = dict(zip(FIELDNAMES, values))
+        for name in BOOL_FIELDS:
+            row[name] = 'True' if row[name] else 'False'
+        for name in MONEY_FIELDS:
+            row[name] = format_money(int(row[name]))
+        return {key: str(value) for key, value in row.items()}
+
+    def to_params(self, row: Dict[str, str]) -> tuple:
+        return (
+            row['id'], row['first_name'], row['last_name'], row['password'],
+            int(row['has_checking'].lower() == 'true'),
+            int(row['has_savings'].lower() == 'true'),
+            int(row['active'].lower() == 'true'),
+            parse_money(row['checking_balance']),
+            parse_money(row['savings_balance']),
+            int(row['overdraft_count'])
+        )
+
+    def rows(self) -> Iterator[Dict[str, str]]:
+        with self.lock:
+            cursor = self.conn.execute(self.select_sql + " ORDER BY id")
+        while True:
+            with self.lock:
+                batch = cursor.fetchmany(1000)
+            if not batch:
+                return
+            for values in batch:
+                yield self.to_row(values)
+
+    def get(self, cust_id: str) -> Optional[Dict[str, str]]:
+        with self.lock:
+            values = self.conn.execute(self.select_sql + " WHERE id = ?", (cust_id,)).fetchone()
+        return self.to_row(values) if values else None
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+
+    def save(self, rows: List[Dict[str, str]]) -> int:
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(self.upsert_sql, [self.to_params(row) for row in rows])
+                stamps = [row['flows'] for row in rows if 'flows' in row]
+                if stamps:
+                    self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('flows', ?)",
+                                      (json.dumps(max(stamps)),))
+        return 0
+
+    def flows(self) -> List[int]:
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'flows'").fetchone()
+        return json.loads(row[0]) if row else []
+
+    def reserve_ids(self, count: int, floor: Callable[[], int]) -> int:
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        start = int(row[0]) if row else floor()
+        with self.lock:
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', ?)", (str(start + count),))
+        return start
+
+    def checkpoint(self, customers: dict, quiesced: Callable[[], ContextManager] = nullcontext) -> tuple[int, int]:
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return os.path.getsize(self.db_file), 0
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def export_csv(storage: Storage, csv_file: str) -> int:
+    return write_csv_atomic(csv_file, storage.rows())
+
+
+def import_csv(storage: Storage, csv_file: str, batch_size: int = 5000) -> int:
+    source = CSVStorage(csv_file)
+    imported = 0
+    batch = []
+    for row in source.rows():
+        batch.append(row)
+        if len(batch) >= batch_size:
+            storage.save(batch)
+            imported += len(batch)
+            batch = []
+    if batch:
+        storage.save(batch)
+        imported += len(batch)
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy customers between bank.csv and an SQLite database")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("csv_file")
+    parser.add_argument("db_file")
+    args = parser.parse_args()
+
+    storage = SQLiteStorage(args.db_file)
+    try:
+        if args.command == "import":
+            print(f"Imported {import_csv(storage, args.csv_file)} customers into {args.db_file}")
+        else:
+            print(f"Exported {args.db_file} to {args.csv_file} ({export_csv(storage, args.csv_file)} bytes)")
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from bank import Bank
+from banking import BankingMenu
+from fraud import RuleEngine, default_rules
+from metrics import Histogram
+from typing import Dict, Any, Iterator, List, Optional
+
+
+class SessionEnded(Exception):
+    pass
+
+
+class HeadlessMenu(BankingMenu):
+    # Answers come from a recorded session instead of the keyboard; output is kept as plain text
+    # (no colour codes) when asked for, and otherwise dropped without being rendered at all.
+    # Recordings hold {"password": key} in place of passwords, filled in at replay from the replay-only
+    # passwords by key (customer ID, or name for a registration), else from the one default password.
+    def __init__(self, bank: Bank, inputs: List[Any], keep_output: bool = False,
+                 password: Optional[str] = None, passwords: Optional[Dict[str, str]] = None):
+        super().__init__(bank=bank)
+        self.inputs = iter(inputs)
+        self.output = [] if keep_output else None
+        self.password = password
+        self.passwords = passwords or {}
+
+    def ask(self, prompt: str, color: str, secret: Optional[str] = None) -> str:
+        answer = next(self.inputs, SessionEnded)
+        if answer is SessionEnded:
+            raise SessionEnded()
+        if isinstance(answer, dict):
+            key = answer.get('password')
+            answer = self.passwords.get(key, self.password)
+            if answer is None:
+                raise ValueError(f"no password for {key!r}; replay with --passwords or --password")
+        if self.output is not None:
+            self.output.append(prompt + ('*' * len(answer) if secret is not None else answer))
+        return answer
+
+    def say(self, text: str, color: Optional[str] = None, attrs: Optional[List[str]] = None):
+        if self.output is not None:
+            self.output.append(text)
+
+
+def read_sessions(path: str) -> Iterator[Dict[str, Any]]:
+    # One session per line: {"name": ..., "inputs": [...]} as banking.py --record writes it, or a bare list.
+    # A {"password": key} answer is a password left out of the recording (null in older recordings).
+    with open(path, 'r') as file:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            session = json.loads(line)
+            if isinstance(session, list):
+                session = {'inputs': session}
+            session.setdefault('name', f"{os.path.basename(path)}:{number}")
+            session['inputs'] = [{'password': None} if answer is None else
+                                 answer if isinstance(answer, dict) else str(answer) for answer in session['inputs']]
+            yield session
+
+
+def replay(menu: HeadlessMenu) -> tuple[List[tuple], bool]:
+    # Times each menu action from the choice being made to the menu coming back; the redraw is not counted.
+    # A session is complete when it runs out of answers at the menu or chooses Exit, not part-way through.
+    timings = []
+    while True:
+        try:
+            ch = menu.choose()
+        except SessionEnded:
+            return timings, True
+        name = menu.action(ch) or 'invalid'
+        started = time.perf_counter()
+        try:
+            keep_going = menu.handle(ch)
+        except SessionEnded:
+            return timings, False
+        timings.append((name, time.perf_counter() - started))
+        if not keep_going:
+            return timings, True
+
+
+def copy_data(csv_file: str, directory: str) -> str:
+    # The snapshot, its journal and sidecar files, plus the history and event databases next to it.
+    stem = os.path.splitext(csv_file)[0]
+    for path in glob.glob(glob.escape(csv_file) + "*") + glob.glob(glob.escape(stem) + "_*.db*"):
+        shutil.copy2(path, directory)
+    return os.path.join(directory, os.path.basename(csv_file))
+
+
+def read_passwords(path: str) -> Dict[str, str]:
+    # One "key:password" per line, the key being a customer ID or, for registrations, "first last".
+    passwords = {}
+    with open(path, 'r') as file:
+        for line in file:
+            line = line.rstrip('\n')
+            if line.strip():
+                key, password = line.split(':', 1)
+                passwords[key] = password
+    return passwords
+
+
+def run_sessions(csv_file: str, sessions: List[Dict[str, Any]], keep_output: bool = False,
+                 rules: bool = True, password: Optional[str] = None,
+                 passwords: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="teller-") as directory:
+        started = time.perf_counter()
+        bank = Bank(copy_data(csv_file, directory), rules=RuleEngine(default_rules()) if rules else None)
+        loaded = time.perf_counter()
+        timings = {}
+        incomplete = []
+        errors = []
+        outputs = []
+        try:
+            for session in sessions:
+                menu = HeadlessMenu(bank, session['inputs'], keep_output, password, passwords)
+                try:
+                    session_timings, complete = replay(menu)
+                except Exception as error:
+                    errors.append(f"{session['name']}: {type(error).__name__}: {error}")
+                    continue
+                finally:
+                    if keep_output:
+                        outputs.append({'name': session['name'], 'output': menu.output})
+                for name, seconds in session_timings:
+                    timings.setdefault(name, []).append(seconds)
+                if not complete:
+                    incomplete.append(session['name'])
+        finally:
+            bank.close()
+        return {
+            'sessions': len(sessions),
+            'load_seconds': loaded - started,
+            'replay_seconds': time.perf_counter() - loaded,
+            'timings': timings,
+            'incomplete': incomplete,
+            'errors': errors,
+            'outputs': outputs
+        }
+
+
+def replay_sessions(csv_file: str, sessions: List[Dict[str, Any]], workers: int = 1,
+                    keep_output: bool = False, rules: bool = True, password: Optional[str] = None,
+                    passwords: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    # Each worker replays its share of the sessions against its own copy of the data, so runs never
+    # touch the source files or see each other's postings.
+    workers = max(1, min(workers, len(sessions)))
+    shares = [sessions[index::workers] for index in range(workers)]
+    started = time.perf_counter()
+    if workers == 1:
+        results = [run_sessions(csv_file, shares[0], keep_output, rules, password, passwords)]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(run_sessions, [csv_file] * workers, shares,
+                                    [keep_output] * workers, [rules] * workers, [password] * workers,
+                                    [passwords] * workers))
+    elapsed = time.perf_counter() - started
+
+    histograms = {}
+    for result in results:
+        for name, samples in result['timings'].items():
+            histogram = histograms.setdefault(name, Histogram())
+            for seconds in samples:
+                histogram.record(seconds)
+    actions = sum(histogram.count for histogram in histograms.values())
+    return {
+        'sessions': len(sessions),
+        'workers': workers,
+        'actions': actions,
+        'seconds': elapsed,
+        'actions_per_second': actions / elapsed if elapsed else 0.0,
+        'load_seconds': max(result['load_seconds'] for result in results),
+        'latency': {name: histograms[name].summary() for name in sorted(histograms)},
+        'incomplete': [name for result in results for name in result['incomplete']],
+        'errors': [error for result in results for error in result['errors']],
+        'outputs': [output for result in results for output in result['outputs']]
+    }
+
+
+def render(report: Dict[str, Any]) -> str:
+    lines = [f"Replayed {report['sessions']} sessions ({report['actions']} actions) on {report['workers']} "
+             f"worker(s) in {report['seconds']:.2f}s, {report['actions_per_second']:.0f} actions/s",
+             f"  {'action':<26}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+    for name, summary in report['latency'].items():
+        lines.append(f"  {name:<26}{summary['count']:>8}{summary['p50_seconds'] * 1e3:>10.3f}"
+                     f"{summary['p99_seconds'] * 1e3:>10.3f}{summary['max_seconds'] * 1e3:>10.3f}")
+    if report['incomplete']:
+        lines.append(f"Sessions that ran out of input mid-action: {', '.join(report['incomplete'])}")
+    for error in report['errors']:
+        lines.append(f"Failed: {error}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded teller sessions against a copy of the bank")
+    parser.add_argument("sessions", help="JSONL file of sessions (banking.py --record=FILE writes one)")
+    parser.add_argument("--bank", default="bank.csv")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, each on its own data copy")
+    parser.add_argument("--repeat", type=int, default=1, help="replay every session this many times")
+    parser.add_argument("--no-rules", action="store_true", help="skip the fraud velocity rules")
+    parser.add_argument("--show-output", action="store_true", help="print each session's screen output")
+    parser.add_argument("--password", default=os.environ.get("TELLER_PASSWORD"),
+                        help="password for the prompts recordings leave out (default: $TELLER_PASSWORD)")
+    parser.add_argument("--passwords", help="file of key:password lines, keyed by customer ID (or 'first last' "
+                                            "for registrations); --password covers keys it lacks")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    sessions = list(read_sessions(args.sessions)) * args.repeat
+    if not sessions:
+        sys.exit(f"No sessions in {args.sessions}")
+    passwords = read_passwords(args.passwords) if args.passwords else None
+    report = replay_sessions(args.bank, sessions, args.workers, args.show_output, not args.no_rules,
+                             args.password, passwords)
+
+    if args.show_output:
+        for output in report['outputs']:
+            print(f"--- {output['name']}")
+            print("\n".join(output['output']))
+    if args.json:
+        print(json.dumps({name: value for name, value in report.items() if name != 'outputs'}))
+    else:
+        print(render(report))
+    sys.exit(1 if report['errors'] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+import pytest
+from bank import Bank
+from snapshot import open_snapshot_storage
+from storage import SQLiteStorage
+
+
+def overdraw(bank: Bank, cust_id: str):
+    assert bank.withdraw(cust_id, "CHECKING", 10_00)[0]
+
+
+@pytest.mark.parametrize("backend", ["csv", "lazy", "snapshot", "sqlite"])
+def test_fee_totals_survive_a_crash(tmp_path, backend):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+
+    def open_bank():
+        storage = None
+        if backend == "snapshot":
+            storage = open_snapshot_storage(os.path.join(tmp_path, "bank.snap"), csv_file)
+        elif backend == "sqlite":
+            storage = SQLiteStorage(os.path.join(tmp_path, "bank.db"))
+        return Bank(csv_file, keep_history=False, idempotency_ttl=None, storage=storage, lazy=backend == "lazy")
+
+    bank = open_bank()
+    cust_ids = [bank.add_customer("Ada", "Lovelace", "pw", checking=True) for _ in range(3)]
+    overdraw(bank, cust_ids[0])
+    bank.checkpoint()
+    overdraw(bank, cust_ids[1])
+    with bank.batch():
+        overdraw(bank, cust_ids[2])
+    bank.storage.close()
+
+    bank = open_bank()
+    flows = bank.dashboard()
+    assert (flows['overdraft_fees'], flows['overdraft_fee_revenue']) == (3, 105_00)
+    bank.close()
@@ -0,0 +1,56 @@
+import os
+import random
+import threading
+from bank import Bank
+from benchmarks.generate import generate
+
+
+def total(bank: Bank) -> int:
+    return sum(customer.checking_balance + customer.savings_balance for customer in bank.customers.values())
+
+
+def test_concurrent_transfers_conserve_money(tmp_path):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+    generate(csv_file, 20, 1)
+    bank = Bank(csv_file, keep_history=False, compact_every=50, idempotency_ttl=None)
+    expected = total(bank)
+
+    def transfers(seed: int):
+        rng = random.Random(seed)
+        for _ in range(200):
+            sender, receiver = rng.sample(range(10001, 10021), 2)
+            bank.transfer_between_customers(str(sender), str(receiver), "CHECKING", "CHECKING",
+                                            rng.randint(1_00, 500_00))
+
+    threads = [threading.Thread(target=transfers, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert total(bank) == expected
+
+    # Reopened without a final checkpoint, as after a crash: the snapshot plus journal still add up.
+    bank.storage.close()
+    reopened = Bank(csv_file, keep_history=False, idempotency_ttl=None)
+    assert total(reopened) == expected
+    reopened.close()
+
+
+def test_journal_replay_drops_a_torn_tail(tmp_path):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+    generate(csv_file, 3, 1)
+    bank = Bank(csv_file, keep_history=False, idempotency_ttl=None)
+    before = bank.get_customer("10001").checking_balance
+    bank.deposit("10001", "CHECKING", 1_00)
+    bank.storage.close()
+    with open(csv_file + ".journal", 'a') as file:
+        file.write('{"id":"10001","first_na')
+
+    bank = Bank(csv_file, keep_history=False, idempotency_ttl=None)
+    assert bank.get_customer("10001").checking_balance == before + 1_00
+    bank.deposit("10001", "CHECKING", 2_00)
+    bank.storage.close()
+
+    bank = Bank(csv_file, keep_history=False, idempotency_ttl=None)
+    assert bank.get_customer("10001").checking_balance == before + 3_00
+    bank.close()
@@ -0,0 +1,33 @@
+import os
+from bank import Bank
+from batch import read_instructions
+from benchmarks.generate import generate
+
+
+def test_batch_reports_every_line_by_its_file_line(tmp_path):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+    generate(csv_file, 3, 1)
+    instructions = os.path.join(tmp_path, "instructions.jsonl")
+    with open(instructions, 'w') as file:
+        file.write('{"op": "deposit", "cust_id": 10001, "account": "checking", "amount": 12.5}\n'
+                   '\n'
+                   '[1, 2]\n'
+                   '{"op": "deposit", "cust_id": \n'
+                   '{"op": "withdraw", "cust_id": "10001", "account": "CHECKING", "amount": "2.50"}\n')
+
+    bank = Bank(csv_file, keep_history=False)
+    before = bank.get_customer("10001").checking_balance
+    report = bank.post_batch(read_instructions(instructions))
+    assert [(line, success) for line, success, _ in report.outcomes] == [
+        (1, True), (3, False), (4, False), (5, True)]
+    assert report.outcomes[1][2] == "Invalid instruction"
+    assert report.outcomes[2][2] == "Invalid instruction"
+    assert bank.get_customer("10001").checking_balance == before + 10_00
+    bank.close()
+
+
+def test_csv_instructions_carry_their_file_line(tmp_path):
+    instructions = os.path.join(tmp_path, "instructions.csv")
+    with open(instructions, 'w') as file:
+        file.write("op,cust_id,account,amount\ndeposit,10001,CHECKING,1.00\ndeposit,10002,CHECKING,2.00\n")
+    assert [line for line, _ in read_instructions(instructions)] == [2, 3]
@@ -0,0 +1,36 @@
+import os
+import sqlite3
+import threading
+from history import TransactionStore
+from transaction import Transaction
+
+
+def committed(path: str, cust_id: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM transactions WHERE cust_id = ?", (cust_id,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_batch_in_one_thread_does_not_defer_other_threads_commits(tmp_path):
+    path = os.path.join(tmp_path, "bank_history.db")
+    store = TransactionStore(path)
+    inside = threading.Event()
+    release = threading.Event()
+
+    def batch():
+        with store.deferred_commit():
+            store.append("10001", Transaction("DEPOSIT", "CHECKING", 1_00, 1_00))
+            inside.set()
+            release.wait()
+
+    thread = threading.Thread(target=batch)
+    thread.start()
+    inside.wait()
+    store.append("10002", Transaction("DEPOSIT", "CHECKING", 2_00, 2_00))
+    assert committed(path, "10002") == 1
+    release.set()
+    thread.join()
+    assert committed(path, "10001") == 1
+    store.close()
@@ -0,0 +1,48 @@
+import os
+import threading
+from bank import Bank
+from benchmarks.generate import generate
+
+
+def open_bank(tmp_path) -> Bank:
+    return Bank(os.path.join(tmp_path, "bank.csv"), keep_history=False)
+
+
+def test_keyed_posting_is_answered_from_the_journal_after_restart(tmp_path):
+    generate(os.path.join(tmp_path, "bank.csv"), 3, 1)
+    bank = open_bank(tmp_path)
+    before = bank.get_customer("10001").checking_balance
+    first = bank.deposit("10001", "CHECKING", 5_00, idempotency_key="pay-1")
+    bank.close()
+
+    bank = open_bank(tmp_path)
+    assert bank.deposit("10001", "CHECKING", 5_00, idempotency_key="pay-1") == first
+    assert bank.deposit("10001", "CHECKING", 6_00, idempotency_key="pay-1")[0] is False
+    assert bank.get_customer("10001").checking_balance == before + 5_00
+    bank.close()
+
+
+def test_flush_journals_only_the_calling_threads_results(tmp_path):
+    generate(os.path.join(tmp_path, "bank.csv"), 3, 1)
+    bank = open_bank(tmp_path)
+    inside = threading.Event()
+    release = threading.Event()
+
+    def batch():
+        with bank.batch():
+            bank.deposit("10001", "CHECKING", 1_00, idempotency_key="batched")
+            inside.set()
+            release.wait()
+
+    thread = threading.Thread(target=batch)
+    thread.start()
+    inside.wait()
+    bank.deposit("10002", "CHECKING", 1_00, idempotency_key="direct")
+    with open(bank.dedup.path) as file:
+        journaled = file.read()
+    release.set()
+    thread.join()
+    assert "10002:direct" in journaled and "10001:batched" not in journaled
+    with open(bank.dedup.path) as file:
+        assert "10001:batched" in file.read()
+    bank.close()
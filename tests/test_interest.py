@@ -0,0 +1,52 @@
+import os
+import numpy as np
+import pytest
+from bank import Bank
+from benchmarks.generate import generate
+from interest import RateSchedule, assess, run_end_of_day
+
+
+def balances(checking):
+    count = len(checking)
+    return {
+        'ids': [str(10001 + index) for index in range(count)],
+        'checking': np.array(checking, dtype=np.int64),
+        'savings': np.zeros(count, dtype=np.int64),
+        'has_checking': np.ones(count, dtype=bool),
+        'has_savings': np.zeros(count, dtype=bool),
+        'active': np.ones(count, dtype=bool)
+    }
+
+
+def test_overdrawn_fee_uses_balance_before_the_run():
+    schedule = RateSchedule(maintenance_fee=5_00, minimum_balance=500_00, overdrawn_fee=10_00)
+    # $0.00 and $4.99 go negative only through this run's maintenance fee; -$0.01 was already overdrawn.
+    assessments = assess(balances([0, 4_99, 5_00, -1]), schedule, month_end=True)
+    assert assessments['maintenance'].tolist() == [5_00, 5_00, 5_00, 5_00]
+    assert assessments['checking_overdrawn'].tolist() == [0, 0, 0, 10_00]
+
+
+def test_overdrawn_fee_without_maintenance():
+    assessments = assess(balances([0, -1]), RateSchedule(overdrawn_fee=10_00))
+    assert assessments['maintenance'].tolist() == [0, 0]
+    assert assessments['checking_overdrawn'].tolist() == [0, 10_00]
+
+
+def test_posting_the_same_day_twice_is_refused(tmp_path):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+    generate(csv_file, 3, 1)
+    bank = Bank(csv_file, keep_history=False)
+    try:
+        schedule = RateSchedule(maintenance_fee=5_00, minimum_balance=10**9)
+        run_end_of_day(bank, schedule, month_end=True, day="2026-03-30")
+        after = bank.get_customer("10001").checking_balance
+        with pytest.raises(ValueError, match="already posted for 2026-03-30"):
+            run_end_of_day(bank, schedule, month_end=True, day="2026-03-30")
+        with pytest.raises(ValueError, match="Month-end fees were already posted for 2026-03"):
+            run_end_of_day(bank, schedule, month_end=True, day="2026-03-31")
+        assert bank.get_customer("10001").checking_balance == after
+
+        run_end_of_day(bank, schedule, month_end=True, day="2026-03-31", force=True)
+        assert bank.get_customer("10001").checking_balance == after - 5_00
+    finally:
+        bank.close()
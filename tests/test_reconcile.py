@@ -0,0 +1,50 @@
+import json
+import os
+from bank import Bank
+from history import TransactionStore
+from reconcile import Reconciler, ReconciliationState
+from storage import CSVStorage
+
+
+def reconcile(csv_file: str, state_file: str, checkpoint_every: int = 10000) -> dict:
+    history = TransactionStore(os.path.splitext(csv_file)[0] + "_history.db")
+    storage = CSVStorage(csv_file)
+    reconciler = Reconciler(history, storage, state_file, checkpoint_every=checkpoint_every)
+    try:
+        return reconciler.run()
+    finally:
+        reconciler.state.close()
+        storage.close()
+        history.close()
+
+
+def test_checkpoints_append_only_the_accounts_that_changed(tmp_path):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+    state_file = os.path.join(tmp_path, "bank_reconcile.json")
+    bank = Bank(csv_file, idempotency_ttl=None)
+    cust_ids = [bank.add_customer("Ada", "Lovelace", "pw", checking=True) for _ in range(20)]
+    for cust_id in cust_ids:
+        bank.deposit(cust_id, "CHECKING", 100_00)
+    bank.checkpoint()
+    assert reconcile(csv_file, state_file)['issues'] == {}
+
+    bank.deposit(cust_ids[0], "CHECKING", 1_00)
+    bank.transfer_between_customers(cust_ids[1], cust_ids[2], "CHECKING", "CHECKING", 5_00)
+    bank.checkpoint()
+    report = reconcile(csv_file, state_file, checkpoint_every=1)
+    assert report['processed'] == 3 and report['issues'] == {}
+    # The first run journaled all 20 accounts, so the next change rewrote the full state; the two after it
+    # were appended on their own.
+    with open(state_file + ".journal") as file:
+        records = [json.loads(line) for line in file]
+    assert [list(record['balances']) for record in records] == [[f"{cust_ids[1]}:CHECKING"],
+                                                                [f"{cust_ids[2]}:CHECKING"]]
+
+    # Reloading from the saved state plus the journal matches a scan from scratch.
+    reconcile(csv_file, os.path.join(tmp_path, "fresh.json"))
+    state = ReconciliationState(state_file)
+    fresh = ReconciliationState(os.path.join(tmp_path, "fresh.json"))
+    state.close()
+    fresh.close()
+    assert (state.last_seq, state.balances, state.transfer_net) == (fresh.last_seq, fresh.balances, fresh.transfer_net)
+    bank.close()
@@ -0,0 +1,50 @@
+import os
+import pytest
+from bank import Bank
+from benchmarks.generate import generate
+from scheduler import Scheduler
+
+START = 1_700_000_000
+
+
+@pytest.fixture
+def bank(tmp_path):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+    generate(csv_file, 3, 1)
+    bank = Bank(csv_file, keep_history=False)
+    yield bank
+    bank.close()
+
+
+def test_schedule_added_by_another_process_runs(bank, tmp_path):
+    path = os.path.join(tmp_path, "bank_schedules.db")
+    runner = Scheduler(path)
+    other = Scheduler(path)
+    try:
+        assert runner.tick(bank, START)['due'] == 0
+        schedule_id = other.add("10001", "CHECKING", 1_00, START + 60, to_cust_id="10002")
+        before = bank.get_customer("10002").checking_balance
+
+        report = runner.tick(bank, START + 120)
+        assert report['posted'] == 1
+        assert runner.get(schedule_id)['status'] == 'done'
+        assert bank.get_customer("10002").checking_balance == before + 1_00
+    finally:
+        other.close()
+        runner.close()
+
+
+def test_recurring_schedule_posts_each_occurrence_once(bank, tmp_path):
+    scheduler = Scheduler(os.path.join(tmp_path, "bank_schedules.db"))
+    try:
+        schedule_id = scheduler.add("10001", "CHECKING", 1_00, START, every='daily', to_cust_id="10002", count=2)
+        before = bank.get_customer("10002").checking_balance
+
+        assert scheduler.tick(bank, START)['posted'] == 1
+        assert scheduler.tick(bank, START + 60)['due'] == 0
+        assert scheduler.get(schedule_id)['next_run'] == START + 86400
+        assert scheduler.tick(bank, START + 86400)['posted'] == 1
+        assert scheduler.get(schedule_id)['status'] == 'done'
+        assert bank.get_customer("10002").checking_balance == before + 2_00
+    finally:
+        scheduler.close()
@@ -0,0 +1,73 @@
+import os
+from benchmarks.generate import generate
+from sharding import ShardBank
+
+
+def open_shard(csv_file: str) -> ShardBank:
+    return ShardBank(csv_file, keep_history=False, idempotency_ttl=None)
+
+
+def crash(bank: ShardBank):
+    # Drop the bank without a checkpoint; everything already appended stays on disk.
+    bank.prepare_log.close()
+    bank.storage.close()
+
+
+def test_debit_saved_before_its_record_is_settled_on_restart(tmp_path):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+    generate(csv_file, 3, 1)
+    bank = open_shard(csv_file)
+    customer = bank.get_customer("10001")
+    before = customer.checking_balance
+    bank.record_step("tx1", 'prepare', role='debit', cust_id="10001", account="CHECKING", amount=1_00,
+                     balance_before=before, counterparty="10002")
+    with bank.locked(customer):
+        customer.checking_balance -= 1_00
+        bank.save_customer(customer)
+    crash(bank)
+
+    bank = open_shard(csv_file)
+    assert bank.prepared["tx1"]['debited'] is True
+    bank.abort("tx1")
+    assert bank.in_doubt() == []
+    assert bank.get_customer("10001").checking_balance == before
+    bank.close()
+
+
+def test_credit_saved_before_its_decision_is_not_applied_twice(tmp_path):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+    generate(csv_file, 3, 1)
+    bank = open_shard(csv_file)
+    customer = bank.get_customer("10002")
+    before = customer.checking_balance
+    assert bank.prepare_credit("tx2", "10002", "CHECKING", 1_00)[0]
+    bank.record_step("tx2", 'applying', decision='commit', balance_before=before)
+    with bank.locked(customer):
+        customer.checking_balance += 1_00
+        bank.save_customer(customer)
+    crash(bank)
+
+    bank = open_shard(csv_file)
+    assert bank.in_doubt() == []
+    bank.commit("tx2")
+    assert bank.get_customer("10002").checking_balance == before + 1_00
+    bank.close()
+
+
+def test_prepare_log_cuts_a_torn_tail_before_appending(tmp_path):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+    generate(csv_file, 3, 1)
+    bank = open_shard(csv_file)
+    assert bank.prepare_credit("tx3", "10002", "CHECKING", 1_00)[0]
+    crash(bank)
+    with open(csv_file + ".2pc", 'a') as file:
+        file.write('{"txid": "tx3", "ev')
+
+    bank = open_shard(csv_file)
+    assert bank.in_doubt() == ["tx3"]
+    assert bank.prepare_credit("tx4", "10002", "CHECKING", 2_00)[0]
+    crash(bank)
+
+    bank = open_shard(csv_file)
+    assert sorted(bank.in_doubt()) == ["tx3", "tx4"]
+    bank.close()
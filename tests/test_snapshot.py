@@ -0,0 +1,45 @@
+import os
+from bank import Bank
+from benchmarks.generate import generate
+from snapshot import differences, open_snapshot_storage, snapshot_to_csv
+
+
+def snapshot_bank(directory):
+    csv_file = os.path.join(directory, "bank.csv")
+    storage = open_snapshot_storage(os.path.join(directory, "bank.snap"), csv_file)
+    return Bank(csv_file, storage=storage, keep_history=False)
+
+
+def test_journal_only_csv_bank_converts_to_snapshot(tmp_path):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+    bank = Bank(csv_file, keep_history=False)
+    cust_id = bank.add_customer("Ada", "Lovelace", "pw", checking=True)
+    bank.deposit(cust_id, "CHECKING", 25_00)
+    bank.storage.close()
+    assert not os.path.exists(csv_file)
+
+    bank = snapshot_bank(tmp_path)
+    assert bank.get_customer(cust_id).checking_balance == 25_00
+    bank.close()
+
+
+def test_snapshot_postings_survive_going_back_to_csv(tmp_path):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+    generate(csv_file, 3, 1)
+    bank = Bank(csv_file, keep_history=False)
+    bank.deposit("10001", "CHECKING", 1_00)
+    bank.storage.close()
+
+    bank = snapshot_bank(tmp_path)
+    expected = bank.get_customer("10001").checking_balance + 25_00
+    bank.deposit("10001", "CHECKING", 25_00)
+    bank.storage.close()
+    snapshot_file = os.path.join(tmp_path, "bank.snap")
+    assert os.path.getsize(snapshot_file + ".journal") > 0
+
+    snapshot_to_csv(snapshot_file, csv_file)
+    assert not os.path.exists(csv_file + ".journal")
+    assert differences(csv_file, snapshot_file) == []
+    bank = Bank(csv_file, keep_history=False)
+    assert bank.get_customer("10001").checking_balance == expected
+    bank.close()
@@ -0,0 +1,57 @@
+import builtins
+import json
+import os
+from bank import Bank
+from banking import BankingMenu
+from benchmarks.generate import PASSWORD, generate
+from teller import read_passwords, replay_sessions
+
+
+def record(csv_file, answers, monkeypatch):
+    typed = iter(answers)
+    monkeypatch.setattr(builtins, 'input', lambda prompt='': next(typed))
+    menu = BankingMenu(bank=Bank(csv_file, keep_history=False, idempotency_ttl=None))
+    menu.recording = []
+    menu.run()
+    return json.dumps({'inputs': menu.recording})
+
+
+def test_recorded_session_holds_no_password(tmp_path, monkeypatch):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+    generate(csv_file, 3, 1)
+    line = record(csv_file, ["1", "10001", PASSWORD, "5", "1", "10.00", "7", "3"], monkeypatch)
+    assert PASSWORD not in line
+
+    session = json.loads(line)
+    assert session['inputs'] == ["1", "10001", {'password': "10001"}, "5", "1", "10.00", "7", "3"]
+    report = replay_sessions(csv_file, [dict(session, name="recorded")], keep_output=True, password=PASSWORD)
+    assert not report['errors'] and not report['incomplete']
+    output = "\n".join(report['outputs'][0]['output'])
+    assert "Login successful!" in output
+    assert PASSWORD not in output
+
+
+def test_replay_without_password_is_an_error(tmp_path):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+    generate(csv_file, 3, 1)
+    report = replay_sessions(csv_file, [{'name': "recorded", 'inputs': ["1", "10001", {'password': "10001"}]}])
+    assert report['errors'] == ["recorded: ValueError: no password for '10001'; replay with --passwords or --password"]
+
+
+def test_recording_with_several_passwords_replays_from_a_mapping(tmp_path, monkeypatch):
+    csv_file = os.path.join(tmp_path, "bank.csv")
+    generate(csv_file, 3, 1)
+    answers = ["2", "Ada", "Lovelace", "pw-ada", "4",
+               "1", "10004", "pw-ada", "1", "7",
+               "1", "10001", PASSWORD, "1", "7", "3"]
+    line = record(csv_file, answers, monkeypatch)
+    assert "pw-ada" not in line and PASSWORD not in line
+
+    passwords_file = os.path.join(tmp_path, "passwords.txt")
+    with open(passwords_file, 'w') as file:
+        file.write(f"Ada Lovelace:pw-ada\n10004:pw-ada\n10001:{PASSWORD}\n")
+    session = dict(json.loads(line), name="recorded")
+    report = replay_sessions(csv_file, [session], keep_output=True, passwords=read_passwords(passwords_file))
+    assert not report['errors'] and not report['incomplete']
+    output = "\n".join(report['outputs'][0]['output'])
+    assert output.count("Login successful!") == 2
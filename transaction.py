@@ -1,25 +1,117 @@
-from datetime import datetime
-from typing import Dict, Any
-
-class Transaction:    
-    def __init__(self, transaction_type: str, account_type: str, amount: float, 
-                 balance_after: float, description: str = ""):
-        self.timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.type = transaction_type
-        self.account = account_type
-        self.amount = amount
-        self.balance_after = balance_after
-        self.description = description
-    
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            'timestamp': self.timestamp,
-            'type': self.type,
-            'account': self.account,
-            'amount': self.amount,
-            'balance_after': self.balance_after,
-            'description': self.description
-        }
-    
-    def __str__(self) -> str:
-        return f"{self.timestamp} - {self.type} {self.account} - ${self.amount:.2f} - Balance: ${self.balance_after:.2f}"
+import time
+from array import array
+from datetime import datetime
+from money import format_money
+from typing import Dict, Any, Optional
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+TRANSACTION_TYPES = ['DEPOSIT', 'WITHDRAWAL', 'TRANSFER_OUT', 'TRANSFER_IN', 'INTEREST', 'FEE']
+ACCOUNT_TYPES = ['CHECKING', 'SAVINGS']
+TRANSACTION_TYPE_CODES = {name: code for code, name in enumerate(TRANSACTION_TYPES)}
+ACCOUNT_TYPE_CODES = {name: code for code, name in enumerate(ACCOUNT_TYPES)}
+
+
+def encode(names: list, codes: dict, name: str) -> int:
+    code = codes.get(name)
+    if code is None:
+        code = codes[name] = len(names)
+        names.append(name)
+    return code
+
+
+def format_timestamp(created: int) -> str:
+    return datetime.fromtimestamp(created).strftime(TIMESTAMP_FORMAT)
+
+
+def parse_timestamp(timestamp: str) -> int:
+    return int(datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp())
+
+
+class Transaction:
+    __slots__ = ('created', 'type_code', 'account_code', 'amount', 'balance_after', 'description')
+
+    def __init__(self, transaction_type: str, account_type: str, amount: int,
+                 balance_after: int, description: str = "", created: Optional[int] = None):
+        self.created = int(time.time()) if created is None else created
+        self.type_code = encode(TRANSACTION_TYPES, TRANSACTION_TYPE_CODES, transaction_type)
+        self.account_code = encode(ACCOUNT_TYPES, ACCOUNT_TYPE_CODES, account_type)
+        self.amount = amount
+        self.balance_after = balance_after
+        self.description = description
+
+    @property
+    def timestamp(self) -> str:
+        return format_timestamp(self.created)
+
+    @property
+    def type(self) -> str:
+        return TRANSACTION_TYPES[self.type_code]
+
+    @property
+    def account(self) -> str:
+        return ACCOUNT_TYPES[self.account_code]
+
+    @classmethod
+    def from_dict(cls, row: Dict[str, Any]) -> 'Transaction':
+        return cls(row['type'], row['account'], row['amount'], row['balance_after'],
+                   row.get('description', ''), parse_timestamp(row['timestamp']))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'timestamp': self.timestamp,
+            'type': self.type,
+            'account': self.account,
+            'amount': self.amount,
+            'balance_after': self.balance_after,
+            'description': self.description
+        }
+
+    def __str__(self) -> str:
+        return f"{self.timestamp} - {self.type} {self.account} - ${format_money(self.amount)} - Balance: ${format_money(self.balance_after)}"
+
+
+class TransactionLog:
+    __slots__ = ('created', 'type_codes', 'account_codes', 'amounts', 'balances', 'descriptions')
+
+    def __init__(self):
+        self.created = array('q')
+        self.type_codes = array('B')
+        self.account_codes = array('B')
+        self.amounts = array('q')
+        self.balances = array('q')
+        self.descriptions = []
+
+    def append(self, transaction: Transaction):
+        self.created.append(transaction.created)
+        self.type_codes.append(transaction.type_code)
+        self.account_codes.append(transaction.account_code)
+        self.amounts.append(transaction.amount)
+        self.balances.append(transaction.balance_after)
+        self.descriptions.append(transaction.description)
+
+    def transaction(self, index: int) -> Transaction:
+        transaction = Transaction.__new__(Transaction)
+        transaction.created = self.created[index]
+        transaction.type_code = self.type_codes[index]
+        transaction.account_code = self.account_codes[index]
+        transaction.amount = self.amounts[index]
+        transaction.balance_after = self.balances[index]
+        transaction.description = self.descriptions[index]
+        return transaction
+
+    def __len__(self) -> int:
+        return len(self.created)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.transaction(i).to_dict() for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transaction index out of range")
+        return self.transaction(index).to_dict()
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.transaction(index).to_dict()